@@ -0,0 +1,167 @@
+import numpy as np
+
+
+def word_ids(*word_lists):
+    """Map words to integer IDs shared across the given lists"""
+    vocabulary = {}
+    return [
+        np.array([vocabulary.setdefault(word, len(vocabulary)) for word in words], dtype=np.int64)
+        for words in word_lists
+    ]
+
+
+def edit_distance_matrix(source, target):
+    """Full Levenshtein DP matrix for two integer sequences, computed one vectorized row at a time"""
+    n, m = len(source), len(target)
+    matrix = np.empty((n + 1, m + 1), dtype=np.int32)
+    offsets = np.arange(m + 1, dtype=np.int32)
+    matrix[0] = offsets
+    for i in range(1, n + 1):
+        previous = matrix[i - 1]
+        row = matrix[i]
+        row[0] = i
+        # Substitution/match and deletion only depend on the previous row
+        np.minimum(previous[:-1] + (target != source[i - 1]), previous[1:] + 1, out=row[1:])
+        # Insertion chains along the row: row[j] = min(row[j], row[j - 1] + 1)
+        row[:] = np.minimum.accumulate(row - offsets) + offsets
+    return matrix
+
+
+def edit_distance(source, target):
+    """
+    Levenshtein distance between two sequences of hashable symbols (e.g. strings)
+    Uses Myers' bit-parallel algorithm: each column of the DP is one Python integer, so a whole
+    column is updated with a handful of big-int operations instead of a loop over its cells
+    """
+    m = len(source)
+    if m == 0:
+        return len(target)
+    
+    # Bitmask of the positions where each symbol occurs in source
+    peq = {}
+    for i, symbol in enumerate(source):
+        peq[symbol] = peq.get(symbol, 0) | (1 << i)
+    
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    positive, negative, score = mask, 0, m
+    for symbol in target:
+        eq = peq.get(symbol, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        horizontal_positive = negative | ~(xh | positive)
+        horizontal_negative = positive & xh
+        if horizontal_positive & last:
+            score += 1
+        elif horizontal_negative & last:
+            score -= 1
+        horizontal_positive = (horizontal_positive << 1) | 1
+        horizontal_negative <<= 1
+        positive = (horizontal_negative | ~(xv | horizontal_positive)) & mask
+        negative = horizontal_positive & xv & mask
+    return score
+
+
+def _codes(text):
+    # One integer per character, without a Python-level loop
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+
+
+def edit_distance_batch(sources, targets, chunk_size=1024):
+    """
+    Levenshtein distances between sources[k] and targets[k] for many string pairs at once
+    The bit-parallel recurrence of edit_distance, run on uint64 arrays with one element per pair:
+    sources are split into 64-character blocks (Hyyro's multi-block variant), and every NumPy
+    operation advances all pairs of a length bucket by one target character and block
+    """
+    count = len(sources)
+    distances = np.zeros(count, dtype=np.int64)
+    if count == 0:
+        return distances
+    source_codes = [_codes(source) for source in sources]
+    target_codes = [_codes(target) for target in targets]
+    source_lengths = np.array([len(codes) for codes in source_codes], dtype=np.int64)
+    target_lengths = np.array([len(codes) for codes in target_codes], dtype=np.int64)
+
+    one = np.uint64(1)
+    high = np.uint64(63)
+    # Similar lengths in the same bucket keep the padding small
+    order = np.lexsort((target_lengths, source_lengths))
+    for start in range(0, count, chunk_size):
+        bucket = order[start:start + chunk_size]
+        n = source_lengths[bucket]
+        m = target_lengths[bucket]
+        size = len(bucket)
+        blocks = max(1, -(-int(n.max()) // 64))
+
+        # Padding never reaches row n[k] of pair k: bits only flow to higher rows and later blocks
+        source = np.full((size, blocks * 64), -1, dtype=np.int64)
+        target = np.full((size, max(1, int(m.max()))), -2, dtype=np.int64)
+        for row, k in enumerate(bucket):
+            source[row, :n[row]] = source_codes[k]
+            target[row, :m[row]] = target_codes[k]
+
+        positive = np.full((blocks, size), ~np.uint64(0))
+        negative = np.zeros((blocks, size), dtype=np.uint64)
+        # Row n[k] - 1 holds the distance; it sits in block last_block[k] at bit last_bit[k]
+        last_block = np.maximum(n - 1, 0) // 64
+        last_bit = np.left_shift(one, (np.maximum(n - 1, 0) % 64).astype(np.uint64))
+        in_block = [last_block == b for b in range(blocks)]
+        score = n.copy()
+
+        for j in range(int(m.max())):
+            # Positions in each source block matching this column's target character, packed to uint64
+            matches = (source == target[:, j:j + 1]).reshape(size, blocks, 64)
+            peq = np.packbits(matches, axis=2, bitorder='little').view('<u8')[:, :, 0].T
+            # Columns past a pair's target length still run but are not counted
+            active = j < m
+            # Horizontal delta entering each block's lowest row as 0/1 bits; row 0 grows by one per column
+            plus_in = np.ones(size, dtype=np.uint64)
+            minus_in = np.zeros(size, dtype=np.uint64)
+            for b in range(blocks):
+                pv, mv = positive[b], negative[b]
+                xv = peq[b] | mv
+                eq = peq[b] | minus_in
+                xh = (((eq & pv) + pv) ^ pv) | eq
+                ph = mv | ~(xh | pv)
+                mh = pv & xh
+
+                here = active & in_block[b]
+                score += here & ((ph & last_bit) != 0)
+                score -= here & ((mh & last_bit) != 0)
+
+                plus_out = ph >> high
+                minus_out = mh >> high
+                ph = (ph << one) | plus_in
+                mh = (mh << one) | minus_in
+                positive[b] = mh | ~(xv | ph)
+                negative[b] = ph & xv
+                plus_in, minus_in = plus_out, minus_out
+        distances[bucket] = np.where(n == 0, m, score)
+    return distances
+
+
+def align(expected, actual, expected_ids=None, actual_ids=None):
+    """
+    Align two token lists and return (distance, ops)
+    ops: list of (op, expected_token, actual_token) with op in 'match', 'substitute', 'delete', 'insert'
+    """
+    if expected_ids is None or actual_ids is None:
+        expected_ids, actual_ids = word_ids(expected, actual)
+    matrix = edit_distance_matrix(expected_ids, actual_ids)
+
+    ops = []
+    i, j = len(expected), len(actual)
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and matrix[i, j] == matrix[i - 1, j - 1] + (expected_ids[i - 1] != actual_ids[j - 1]):
+            op = 'match' if expected_ids[i - 1] == actual_ids[j - 1] else 'substitute'
+            ops.append((op, expected[i - 1], actual[j - 1]))
+            i, j = i - 1, j - 1
+        elif i > 0 and matrix[i, j] == matrix[i - 1, j] + 1:
+            ops.append(('delete', expected[i - 1], None))
+            i -= 1
+        else:
+            ops.append(('insert', None, actual[j - 1]))
+            j -= 1
+    ops.reverse()
+    return int(matrix[-1, -1]), ops
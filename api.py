@@ -0,0 +1,284 @@
+"""Headless HTTP API for conversation generation, speech synthesis and pronunciation grading.
+
+Workers keep no per-client state, so any number of replicas can run behind a load balancer:
+
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+
+Workers on one host share the on-disk stores. The conversation library is an append-only log
+that every worker reads back before each lookup, so a conversation stored by one worker is
+found by the others. The response cache is an append-only log too, locked while a worker
+appends or compacts it; a worker picks up the others' entries when it starts and whenever it
+writes one itself. Replicas on separate hosts need a shared volume for KB_PATH,
+RESPONSE_CACHE_PATH and AUDIO_CACHE_DIR.
+
+Streamlit app processes publish how much session state they hold to SESSION_STATS_DIR; /stats
+reports those figures next to the workers' own queues, so one endpoint covers the deployment.
+
+Audio travels as base64 in JSON. Synthesis requests arriving at the same time are merged into
+one synthesize_batch call per engine, and every endpoint answers 503 with Retry-After once its
+queue is full instead of letting work pile up.
+"""
+import asyncio
+import base64
+import io
+import os
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from audio_io import CODECS, codec_mime
+from conversation_generator import conversation_prompt, get_response_async
+from conversation_parser import parse_conversation
+from knowledge_base import knowledge_base
+from session_store import collect_reports
+from tts_engines import tts_engines
+
+# Requests generating or grading at once per worker; more are turned away
+API_MAX_IN_FLIGHT = int(os.getenv('API_MAX_IN_FLIGHT', 32))
+# Lines merged into one synthesis call, and how long to wait for more to arrive
+TTS_MAX_BATCH = int(os.getenv('TTS_MAX_BATCH', 16))
+TTS_BATCH_WINDOW_MS = float(os.getenv('TTS_BATCH_WINDOW_MS', 20))
+# Lines waiting for synthesis per engine before new requests are turned away
+TTS_MAX_QUEUE = int(os.getenv('TTS_MAX_QUEUE', 256))
+
+
+class Overloaded(HTTPException):
+    def __init__(self, what):
+        super().__init__(status_code=503, detail=f"{what} queue is full, retry shortly",
+                         headers={'Retry-After': '1'})
+
+
+class Limiter:
+    def __init__(self, name, max_in_flight):
+        """Caps concurrent requests, rejecting rather than queueing the excess"""
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+    async def __aenter__(self):
+        # Only touched from the event loop, so no lock is needed
+        if self.in_flight >= self.max_in_flight:
+            raise Overloaded(self.name)
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        self.in_flight -= 1
+        return False
+
+
+class SynthesisBatcher:
+    def __init__(self, engine, codec=None, max_batch=TTS_MAX_BATCH, window_ms=TTS_BATCH_WINDOW_MS,
+                 max_queue=TTS_MAX_QUEUE, workers=1):
+        """Merges lines from concurrent requests into synthesize_batch calls on one engine and codec"""
+        self.engine = engine
+        self.codec = engine.output_codec(codec)
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(workers)]
+
+    async def synthesize(self, texts, voices):
+        """Queue every line of one request; returns audio bytes (or None) per line"""
+        if self.queue.maxsize - self.queue.qsize() < len(texts):
+            raise Overloaded(f"{self.engine.name} synthesis")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text, voice in zip(texts, voices):
+            future = loop.create_future()
+            self.queue.put_nowait((text, voice, future))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def _next_batch(self):
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            texts, voices, futures = zip(*batch)
+            try:
+                # Synthesis is blocking (model forward pass or HTTP), so keep it off the event loop
+                results = await asyncio.to_thread(self.engine.synthesize_batch, list(texts), list(voices), self.codec)
+            except Exception as e:
+                print(f"Error in batched synthesis on {self.engine.name}: {e}")
+                results = [None] * len(batch)
+            for future, audio_data in zip(futures, results):
+                if not future.done():
+                    future.set_result(audio_data)
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+_batchers = {}
+_generate_limiter = Limiter("generation", API_MAX_IN_FLIGHT)
+_grade_limiter = Limiter("grading", API_MAX_IN_FLIGHT)
+
+
+def get_batcher(name, codec=None):
+    """The batcher for an engine and output codec, started on first use"""
+    try:
+        engine = tts_engines.get(name)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    key = f"{name}/{engine.output_codec(codec)}"
+    if key not in _batchers:
+        # A local model runs one batch at a time; gTTS lines are independent HTTP requests
+        _batchers[key] = SynthesisBatcher(engine, codec, workers=1 if engine.model else 4)
+    return _batchers[key]
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    for batcher in list(_batchers.values()):
+        await batcher.close()
+    tts_engines.close()
+
+
+app = FastAPI(title="AI English Conversation Simulator", lifespan=lifespan)
+
+
+class GenerateRequest(BaseModel):
+    requirement: str
+    use_cache: bool = True
+    use_library: bool = True
+
+
+class SynthesizeRequest(BaseModel):
+    lines: List[str]
+    engine: str = 'gtts'
+    voice_a: Optional[str] = None
+    voice_b: Optional[str] = None
+    # e.g. 'wav' for lines that will be joined into a track; engines with a fixed format ignore it
+    codec: Optional[str] = None
+
+
+class GradeRequest(BaseModel):
+    audio: str  # base64-encoded WAV/AIFF/FLAC recording
+    expected: str
+    backend: Optional[str] = None
+
+
+@app.get('/healthz')
+async def healthz():
+    return {'status': 'ok'}
+
+
+@app.get('/engines')
+async def engines():
+    """Available TTS engines with their voices and output MIME type"""
+    result = []
+    for name in tts_engines.names():
+        engine = tts_engines.get(name)
+        result.append({'name': name, 'label': engine.label, 'voices': list(engine.voices), 'mime': engine.mime})
+    return result
+
+
+@app.post('/generate')
+async def generate(request: GenerateRequest):
+    """Generate a conversation, reusing a stored one when a past requirement is close enough"""
+    async with _generate_limiter:
+        if request.use_library:
+            match = await asyncio.to_thread(knowledge_base.lookup, request.requirement)
+            if match:
+                return {'conversation': match[0], 'similarity': match[1]}
+
+        try:
+            conversation = await get_response_async(conversation_prompt(request.requirement), request.use_cache)
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=f"Conversation generation failed: {e}")
+        if conversation and request.use_library:
+            await asyncio.to_thread(knowledge_base.add, request.requirement, conversation)
+        return {'conversation': conversation, 'similarity': None}
+
+
+@app.post('/synthesize')
+async def synthesize(request: SynthesizeRequest):
+    """Synthesize conversation lines; failed lines come back with audio set to null"""
+    if request.codec is not None and request.codec not in CODECS:
+        raise HTTPException(status_code=400, detail=f"Unknown audio codec '{request.codec}', choose from {', '.join(CODECS)}")
+    batcher = get_batcher(request.engine, request.codec)
+    engine = batcher.engine
+    lines = parse_conversation(request.lines)
+    voices = engine.voices_for(lines, request.voice_a, request.voice_b)
+
+    results = await batcher.synthesize([line.text for line in lines], voices)
+    return {
+        'engine': engine.name,
+        'mime': codec_mime(batcher.codec),
+        'segments': [
+            {
+                'text': line.text,
+                'speaker': line.speaker,
+                'audio': base64.b64encode(audio_data).decode('ascii') if audio_data else None,
+            }
+            for line, audio_data in zip(lines, results)
+        ],
+    }
+
+
+def _grade(audio_data, expected, backend):
+    import speech_recognition as sr
+    from speech_practice import speech_practice
+    try:
+        with sr.AudioFile(io.BytesIO(audio_data)) as source:
+            audio = speech_practice.recognizer.record(source)
+    except Exception as e:
+        # Whatever the decoder trips over, the recording is the client's problem
+        raise ValueError(f"Could not decode audio: {e}")
+    user_text = speech_practice.speech_to_text(audio, backend)
+    try:
+        return speech_practice.grade(audio, user_text, expected)
+    except Exception as e:
+        # Like practice_line: a grading failure is reported in the result, not as a server error
+        result = speech_practice._empty_result()
+        result['user_text'] = user_text
+        result['feedback'].append(f"❌ Error during grading: {str(e)}")
+        return result
+
+
+@app.post('/grade')
+async def grade(request: GradeRequest):
+    """Recognize a recorded attempt and score it against the expected line"""
+    async with _grade_limiter:
+        try:
+            audio_data = base64.b64decode(request.audio, validate=True)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="audio must be base64-encoded")
+        try:
+            return await asyncio.to_thread(_grade, audio_data, request.expected, request.backend)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+async def metrics():
+    """Per-engine TTS metrics in the Prometheus text format"""
+    return tts_engines.prometheus_text()
+
+
+@app.get('/stats')
+async def stats():
+    """Per-engine TTS metrics, current queue depths and the app processes' session memory as JSON"""
+    return {
+        'engines': tts_engines.metrics(),
+        'synthesis_queues': {name: batcher.queue.qsize() for name, batcher in _batchers.items()},
+        'generating': _generate_limiter.in_flight,
+        'grading': _grade_limiter.in_flight,
+        'session_memory': collect_reports(),
+    }
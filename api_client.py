@@ -0,0 +1,129 @@
+import base64
+import threading
+from audio_io import PCM_CODEC
+from conversation_track import pcm_segments
+
+
+def retry_after(error):
+    """Seconds to wait when a request was turned away by a full service queue (503), else None"""
+    response = getattr(error, 'response', None)
+    if response is None or response.status_code != 503:
+        return None
+    return response.headers.get('Retry-After', '1')
+
+
+class RemoteEngine:
+    def __init__(self, client, info):
+        """A TTS engine served by the API, usable wherever the page expects a local engine"""
+        self.client = client
+        self.name = info['name']
+        self.label = info['label']
+        self.voices = tuple(info['voices'])
+        self.mime = info['mime']
+        # Models live in the service, so there is nothing to warm up here
+        self.model = None
+
+    def is_ready(self):
+        return True
+
+    def warm_up(self):
+        return True
+
+    def close(self):
+        pass
+
+    def stream(self, conversation_lines, voice_a=None, voice_b=None, codec=None):
+        """Yield segments like TTSEngine.stream; the service synthesizes the lines as one batch"""
+        for segment in self.client.synthesize(conversation_lines, self.name, voice_a, voice_b, codec):
+            if segment['audio']:
+                yield segment
+
+    def stream_pcm(self, conversation_lines, voice_a=None, voice_b=None):
+        """Yield segments like TTSEngine.stream_pcm, fetched as WAV where the engine can produce it"""
+        return pcm_segments(self.stream(conversation_lines, voice_a, voice_b, codec=PCM_CODEC))
+
+
+class ApiClient:
+    def __init__(self, base_url, timeout=120):
+        """Thin client for api.py, mirroring the engine registry's interface"""
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._http = None
+        self._engines = None
+        self._lock = threading.Lock()
+
+    def _client(self):
+        with self._lock:
+            if self._http is None:
+                import httpx
+                self._http = httpx.Client(base_url=self.base_url, timeout=self.timeout)
+            return self._http
+
+    def _request(self, method, path, **kwargs):
+        response = self._client().request(method, path, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _engine_info(self):
+        if self._engines is None:
+            self._engines = {info['name']: info for info in self._request('GET', '/engines').json()}
+        return self._engines
+
+    def names(self):
+        return list(self._engine_info())
+
+    def label(self, name):
+        return self._engine_info()[name]['label']
+
+    def get(self, name):
+        if name not in self._engine_info():
+            raise ValueError(f"Unknown TTS engine '{name}', choose from {', '.join(self._engine_info())}")
+        return RemoteEngine(self, self._engine_info()[name])
+
+    def metrics(self):
+        return self._request('GET', '/stats').json()['engines']
+
+    def prometheus_text(self):
+        return self._request('GET', '/metrics').text
+
+    def generate(self, requirement):
+        """Return (conversation text, library similarity or None)"""
+        result = self._request('POST', '/generate', json={'requirement': requirement}).json()
+        return result['conversation'] or '', result['similarity']
+
+    def synthesize(self, conversation_lines, engine, voice_a=None, voice_b=None, codec=None):
+        """Segments with decoded audio bytes, or None for lines that failed"""
+        lines = [getattr(line, 'raw', line) for line in conversation_lines]
+        result = self._request('POST', '/synthesize', json={
+            'lines': lines, 'engine': engine, 'voice_a': voice_a, 'voice_b': voice_b, 'codec': codec,
+        }).json()
+        for segment in result['segments']:
+            if segment['audio']:
+                segment['audio'] = base64.b64decode(segment['audio'])
+        return result['segments']
+
+    def grade(self, audio_data, expected_text, backend=None):
+        """Score a WAV recording against the expected line"""
+        return self._request('POST', '/grade', json={
+            'audio': base64.b64encode(audio_data).decode('ascii'),
+            'expected': getattr(expected_text, 'text', expected_text),
+            'backend': backend,
+        }).json()
+
+    def practice_line(self, expected_text, backend=None):
+        """Record from the local microphone and have the service grade it"""
+        from speech_practice import speech_practice
+        result = speech_practice._empty_result()
+        try:
+            audio = speech_practice.record_speech()
+            if not audio:
+                result['feedback'].append("❌ No speech detected. Please try again.")
+                return result
+            return self.grade(audio.get_wav_data(), expected_text, backend)
+        except Exception as e:
+            wait = retry_after(e)
+            if wait is not None:
+                result['feedback'].append(f"⏳ The grading service is busy. Please try again in {wait}s.")
+            else:
+                result['feedback'].append(f"❌ Error during practice: {str(e)}")
+            return result
@@ -1,49 +1,226 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import os
 import time
-from conversation_generator import get_response
-from tts_generator import conversation_to_speech
-from generate_speak import conversation_to_speech_fairseq
-from speech_practice import speech_practice
-import base64
+from concurrent.futures import ThreadPoolExecutor
+from conversation_generator import conversation_prompt, get_response, iter_response_lines
+from practice_jobs import practice_jobs
+from tts_models import model_registry
+from tts_engines import tts_engines
+from audio_store import audio_store
+from audio_io import AUDIO_CODEC, codec_mime
+from knowledge_base import knowledge_base
+from session_store import session_store
+from conversation_parser import parse_conversation, parse_line
+
+def render_audio_segment(segment, index):
+    """Render one stored segment; Streamlit serves the file by URL instead of inlining it"""
+    if index:
+        st.markdown("---")
+    # Touching the file keeps it from being pruned while this session still shows it
+    path = audio_store.touch(segment['audio_id'])
+    if path is None:
+        st.caption(f"Audio for \"{segment['text']}\" has expired; generate speech again to replay it.")
+    else:
+        st.audio(path, format=segment['mime'])
+    
+    if 'offsets' in segment:
+        # A whole-conversation track: list each line with the time it starts at
+        for offset in segment['offsets']:
+            minutes, seconds = divmod(int(offset['start']), 60)
+            speaker = f"{offset['speaker']}: " if offset['speaker'] else ""
+            st.markdown(f"`{minutes}:{seconds:02d}` **{speaker}{offset['text']}**")
+        return
+    
+    # Display the text after the audio player
+    st.markdown(f"**{segment['text']}**")
+
+def store_speech(conversation_lines, engine, voice_a, voice_b):
+    """Synthesize lines with the selected engine, yielding segments saved to the audio store"""
+    # Engines yield segments as they finish, so each player appears as soon as its line is ready
+    for segment in engine.stream(conversation_lines, voice_a, voice_b):
+        # Keep only the audio ID in session state; the bytes live in the audio store
+        yield {
+            'text': segment['text'],
+            'audio_id': audio_store.put(segment['audio'], engine.mime),
+            'mime': engine.mime,
+            'engine': engine.label
+        }
+
+def store_track(conversation_lines, engine, voice_a, voice_b):
+    """Synthesize every line and store them as one conversation track; None if nothing was synthesized"""
+    from conversation_track import build_track
+    # Lines arrive as PCM, so the track is the only lossy encode
+    audio_data, offsets = build_track(engine.stream_pcm(conversation_lines, voice_a, voice_b))
+    if audio_data is None:
+        return None
+    return {
+        'text': "Full conversation",
+        'audio_id': audio_store.put(audio_data, codec_mime(AUDIO_CODEC)),
+        'mime': codec_mime(AUDIO_CODEC),
+        'engine': engine.label,
+        'offsets': offsets
+    }
+
+def start_conversation(conversation_lines):
+    """Replace the stored conversation, dropping audio and practice state tied to the previous one"""
+    st.session_state['conversation'] = conversation_lines
+    st.session_state.pop('audio_segments', None)
+    st.session_state.pop('practice_results', None)
+    # Practice keys embed the line's content, so old ones would never be looked up again
+    st.session_state.pop('practice_states', None)
+    for job_id in st.session_state.pop('practice_jobs', {}).values():
+        practice_jobs.cancel(job_id)
+
+def enforce_session_budget():
+    """Account this session's state and move old practice results, then old players, to the shared store over budget"""
+    ctx = get_script_run_ctx()
+    session_id = ctx.session_id if ctx is not None else 'default'
+    size = session_store.enforce(session_id, st.session_state, demotable=('practice_results', 'audio_segments'))
+    st.sidebar.caption(f"Session memory: {size / 1024:.0f} KB of {session_store.max_bytes / 1024:.0f} KB")
+
+def render_practice_result(result, practice_text):
+    """Show the scores and feedback for one graded attempt"""
+    if result['success']:
+        # Display results
+        st.success("✅ Speech recorded successfully!")
+        
+        # Scores
+        col_score1, col_score2 = st.columns(2)
+        with col_score1:
+            st.metric("Pronunciation", f"{result['pronunciation_score']}/100")
+        with col_score2:
+            st.metric("Fluency", f"{result['fluency_score']}/100")
+        st.caption(
+            f"Speaking time {result['speech_duration']:.1f}s · "
+            f"{result['pause_count']} pause(s)"
+        )
+        
+        # What you said
+        st.markdown(f"**You said:** {result['user_text']}")
+        st.markdown(f"**Expected:** {practice_text}")
+        
+        # Feedback
+        st.markdown("**Feedback:**")
+        for feedback in result['feedback']:
+            st.markdown(f"• {feedback}")
+        
+        # Overall score
+        overall_score = (result['pronunciation_score'] + result['fluency_score']) / 2
+        if overall_score >= 80:
+            st.success(f"🎉 Overall Score: {overall_score:.1f}/100 - Great job!")
+        elif overall_score >= 60:
+            st.warning(f"📈 Overall Score: {overall_score:.1f}/100 - Keep practicing!")
+        else:
+            st.error(f"📚 Overall Score: {overall_score:.1f}/100 - More practice needed!")
+    
+    else:
+        st.error("❌ Failed to record speech. Please try again.")
+        for feedback in result['feedback']:
+            st.markdown(f"• {feedback}")
+
+def report_api_error(error, action):
+    """Show a failed service call on the page instead of a traceback"""
+    from api_client import retry_after
+    print(f"Error {action}: {error}")
+    wait = retry_after(error)
+    if wait is not None:
+        st.warning(f"⏳ The service is busy {action}. Please try again in {wait}s.")
+    else:
+        st.error(f"❌ The service failed {action}: {error}. Please check API_URL or try again.")
+
+@st.cache_resource
+def get_api_client(base_url):
+    """One API client (and connection pool) per process"""
+    from api_client import ApiClient
+    return ApiClient(base_url)
 
 # Page config
 st.set_page_config(page_title="AI English Conversation Simulator", layout="centered")
 
+# Thin-client mode: with API_URL set, generation, synthesis and grading run in the api.py service
+api_url = os.getenv('API_URL')
+if api_url:
+    import httpx
+    api = get_api_client(api_url)
+    # Connection errors, full queues (503) and other non-2xx answers are reported by report_api_error
+    api_errors = httpx.HTTPError
+else:
+    api = None
+    api_errors = ()
+engines = api if api is not None else tts_engines
+
 # Title
 st.title("🗣️ AI English Conversation Simulator")
 
 # TTS Engine Selection
-tts_engine = st.selectbox(
+try:
+    engine_names = engines.names()
+except api_errors as e:
+    report_api_error(e, "listing TTS engines")
+    st.stop()
+engine_name = st.selectbox(
     "🔊 Choose TTS Engine", 
-    ["Google TTS (gTTS)", "Fairseq TTS (Local)"],
-    help="Google TTS: Cloud-based, high quality. Fairseq TTS: Local, works offline."
+    engine_names,
+    format_func=engines.label,
+    help="Google TTS: Cloud-based, high quality. Fairseq TTS / Tacotron2: Local, works offline."
 )
+engine = engines.get(engine_name)
+tts_engine = engine.label
+
+# Warm up a local model once per process instead of on the first click
+if engine.model is not None:
+    if not engine.is_ready():
+        with st.spinner(f"⏳ Loading {tts_engine} model..."):
+            engine.warm_up()
+    load_time = model_registry.load_times().get(engine.model)
+    if load_time is not None:
+        st.caption(f"{tts_engine} model loaded in {load_time:.1f}s")
+
+# Per-engine latency, real-time factor and cache hit rate for this process
+with st.sidebar.expander("📈 TTS engine metrics"):
+    try:
+        st.json(engines.metrics())
+        st.download_button("Export (Prometheus)", engines.prometheus_text(), file_name="tts_metrics.prom")
+    except api_errors as e:
+        report_api_error(e, "reading TTS metrics")
 
-# Voice Selection (only show if using gTTS)
-if tts_engine == "Google TTS (gTTS)":
+# Voice Selection (only for engines with more than one voice)
+if engine.voices:
     col1, col2 = st.columns(2)
     with col1:
         voice_a = st.selectbox(
             "🎤 Speaker A Voice",
-            ["default", "british", "australian", "indian", "irish", "canadian", "south_african"],
+            engine.voices,
             help="Choose voice for Speaker A"
         )
     with col2:
         voice_b = st.selectbox(
             "🎤 Speaker B Voice", 
-            ["british", "default", "australian", "indian", "irish", "canadian", "south_african"],
-            index=1,
+            engine.voices,
+            index=min(1, len(engine.voices) - 1),
             help="Choose voice for Speaker B"
         )
 else:
-    voice_a = "default"
-    voice_b = "british"
+    voice_a = None
+    voice_b = None
 
 user_requirement = st.text_area(
     "📝 Enter your conversation requirement",
     height=100
 )
 
+# Streaming options
+stream_conv = st.checkbox("⚡ Show lines as they are generated", value=True)
+speak_lines = stream_conv and st.checkbox(
+    "🔊 Speak each line as it arrives",
+    help="Starts text-to-speech for every line while the rest of the conversation is still being written."
+)
+single_track = st.checkbox(
+    "🎧 Combine speech into one conversation track",
+    help="One player for the whole dialogue instead of one per line."
+)
+
 # Simulate speaking UI
 col1, col2 = st.columns(2)
 
@@ -53,47 +230,125 @@ with col2:
     generate_speech = st.button("🔊 Generate Speech")
 
 if generate_conv:
-    prompt = f"{user_requirement}\n Format as alternating lines for two speakers, e.g., 'A: ...', 'B: ...'."
-    conversation_text = get_response(prompt)
-    if not conversation_text:
-        st.error("No response from the AI. Please check your API settings or try again.")
+    prompt = conversation_prompt(user_requirement)
+    
+    if api is not None:
+        # The service checks and updates the library itself; its answer is used like a library match
+        try:
+            library_match = api.generate(user_requirement)
+        except api_errors as e:
+            report_api_error(e, "generating the conversation")
+            library_match = None
     else:
-        conversation_lines = conversation_text.strip().split('\n')
+        # Serve a stored dialogue when a past requirement is close enough
+        library_match = knowledge_base.lookup(user_requirement)
+    if library_match and library_match[1] is not None:
+        st.caption(f"📚 Reused a stored conversation (similarity {library_match[1]:.2f})")
+    
+    if api is not None and library_match is None:
+        # Already reported; the page must not fall back to calling the LLM itself
+        pass
+    elif stream_conv:
         st.markdown("### 💬 Conversation")
-        for line in conversation_lines:
-            st.markdown(f"**{line}**")
-        st.session_state['conversation'] = conversation_lines
+        conversation_area = st.container()
+        audio_area = st.container()
+        conversation_lines = []
+        stored_segments = []
+        pending_audio = []
+        
+        def render_ready(wait=False):
+            # Render finished lines in conversation order
+            while pending_audio and (wait or pending_audio[0].done()):
+                try:
+                    ready = pending_audio.pop(0).result()
+                except api_errors as e:
+                    with audio_area:
+                        report_api_error(e, "synthesizing a line")
+                    continue
+                for stored in ready:
+                    with audio_area:
+                        if not stored_segments:
+                            st.markdown(f"### 🔊 Audio Playback ({tts_engine})")
+                        render_audio_segment(stored, len(stored_segments))
+                    stored_segments.append(stored)
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            if library_match:
+                line_source = library_match[0].split('\n')
+            else:
+                line_source = iter_response_lines(prompt)
+            for raw_line in line_source:
+                # Parse each line once as it arrives
+                line = parse_line(raw_line)
+                if line is None:
+                    continue
+                conversation_area.markdown(f"**{line.raw}**")
+                conversation_lines.append(line)
+                if speak_lines:
+                    pending_audio.append(executor.submit(
+                        lambda line=line: list(store_speech([line], engine, voice_a, voice_b))
+                    ))
+                render_ready()
+            render_ready(wait=True)
+        
+        if not conversation_lines:
+            st.error("No response from the AI. Please check your API settings or try again.")
+        else:
+            if not library_match:
+                knowledge_base.add(user_requirement, '\n'.join(line.raw for line in conversation_lines))
+            start_conversation(conversation_lines)
+            if stored_segments:
+                st.session_state['audio_segments'] = stored_segments
+    else:
+        conversation_text = library_match[0] if library_match else get_response(prompt)
+        if not conversation_text:
+            st.error("No response from the AI. Please check your API settings or try again.")
+        else:
+            if not library_match:
+                knowledge_base.add(user_requirement, conversation_text)
+            # Parse once; reruns reuse the stored Lines
+            conversation_lines = parse_conversation(conversation_text)
+            st.markdown("### 💬 Conversation")
+            for line in conversation_lines:
+                st.markdown(f"**{line.raw}**")
+            start_conversation(conversation_lines)
 
 # Generate Speech Button
 if 'conversation' in st.session_state and generate_speech:
     with st.spinner(f"🗣️ Generating speech using {tts_engine}..."):
-        if tts_engine == "Google TTS (gTTS)":
-            audio_segments = conversation_to_speech(st.session_state['conversation'], voice_a, voice_b)
-        else:  # Fairseq TTS
-            audio_segments = conversation_to_speech_fairseq(st.session_state['conversation'])
+        st.markdown(f"### 🔊 Audio Playback ({tts_engine})")
+        stored_segments = []
         
-        if audio_segments:
-            st.markdown(f"### 🔊 Audio Playback ({tts_engine})")
-            
-            for i, segment in enumerate(audio_segments):
-                # Convert audio data to base64 for HTML audio player
-                audio_b64 = base64.b64encode(segment['audio']).decode()
-                audio_html = f"""
-                <audio controls style="width: 100%; margin: 10px 0;">
-                    <source src="data:audio/wav;base64,{audio_b64}" type="audio/wav">
-                    Your browser does not support the audio element.
-                </audio>
-                """
-                st.markdown(audio_html, unsafe_allow_html=True)
-                
-                # Display the text after the audio player
-                st.markdown(f"**{segment['text']}**")
-                
-                # Add a small delay between segments for better UX
-                if i < len(audio_segments) - 1:
-                    st.markdown("---")
+        try:
+            if single_track:
+                track = store_track(st.session_state['conversation'], engine, voice_a, voice_b)
+                if track is not None:
+                    render_audio_segment(track, 0)
+                    stored_segments.append(track)
+            else:
+                for stored in store_speech(st.session_state['conversation'], engine, voice_a, voice_b):
+                    render_audio_segment(stored, len(stored_segments))
+                    stored_segments.append(stored)
+        except api_errors as e:
+            report_api_error(e, f"synthesizing speech with {tts_engine}")
         else:
-            st.error(f"Failed to generate speech using {tts_engine}. Please try again.")
+            if not stored_segments:
+                st.error(f"Failed to generate speech using {tts_engine}. Please try again.")
+        
+        if stored_segments:
+            st.session_state['audio_segments'] = stored_segments
+
+# Re-render stored players on later reruns without regenerating or re-sending inline audio
+elif st.session_state.get('audio_segments') and not generate_conv:
+    # Segments moved to the shared store over budget are read back; ones pruned from it are gone
+    segments = [s for s in map(session_store.restore, st.session_state['audio_segments']) if s is not None]
+    if segments:
+        st.markdown(f"### 🔊 Audio Playback ({segments[0]['engine']})")
+    for i, segment in enumerate(segments):
+        render_audio_segment(segment, i)
+
+# Keep this session within its memory budget
+enforce_session_budget()
 
 # Speech Practice Section
 if 'conversation' in st.session_state:
@@ -101,23 +356,40 @@ if 'conversation' in st.session_state:
     st.markdown("### 🎤 Practice Speaking")
     st.info("Click 'Practice' next to any line to record your speech and get feedback!")
     
+    # Imported here so start-up without a conversation doesn't load speech_recognition
+    from speech_practice import speech_practice
+    
+    recognizer_backend = st.selectbox(
+        "🧠 Speech Recognition",
+        ["google", "wav2vec2"],
+        index=0 if speech_practice.default_backend == "google" else 1,
+        format_func=lambda name: {"google": "Google (Cloud)", "wav2vec2": "wav2vec2 (Local)"}[name],
+        help="Google: cloud recognition. wav2vec2: runs on this machine, no network round-trip."
+    )
+    if api is None and recognizer_backend == "wav2vec2" and not model_registry.is_loaded('wav2vec2'):
+        with st.spinner("⏳ Loading local speech recognition model..."):
+            speech_practice.get_backend(recognizer_backend).warm_up()
+    
     # Initialize practice states if not exists
     if 'practice_states' not in st.session_state:
         st.session_state.practice_states = {}
+    if 'practice_jobs' not in st.session_state:
+        st.session_state.practice_jobs = {}
+    if 'practice_results' not in st.session_state:
+        st.session_state.practice_results = {}
     
     for i, line in enumerate(st.session_state['conversation']):
-        # Extract just the text part for practice
-        practice_text = line.strip()
-        if ': ' in practice_text:
-            practice_text = practice_text.split(': ', 1)[1]
+        # Lines were parsed once when the conversation was generated
+        practice_text = line.text
         
         col1, col2 = st.columns([3, 1])
         
         with col1:
-            st.markdown(f"**{line}**")
+            st.markdown(f"**{line.raw}**")
         
         with col2:
-            practice_key = f"practice_{i}"
+            # Tie practice state to the line's content so a new conversation starts fresh
+            practice_key = f"practice_{i}_{line.cache_key[:12]}"
             
             # Check if practice is active for this line
             is_practicing = st.session_state.practice_states.get(practice_key, False)
@@ -129,52 +401,48 @@ if 'conversation' in st.session_state:
             else:
                 # Practice mode is active
                 st.markdown(f"**Practice this line:** {practice_text}")
-                st.info("🎤 Click 'Start Recording' and speak clearly...")
+                job_id = st.session_state.practice_jobs.get(practice_key)
                 
-                if st.button("🎙️ Start Recording", key=f"record_{i}"):
-                    with st.spinner("🎤 Recording your speech..."):
-                        result = speech_practice.practice_line(practice_text)
-                    
-                    if result['success']:
-                        # Display results
-                        st.success("✅ Speech recorded successfully!")
-                        
-                        # Scores
-                        col_score1, col_score2 = st.columns(2)
-                        with col_score1:
-                            st.metric("Pronunciation", f"{result['pronunciation_score']}/100")
-                        with col_score2:
-                            st.metric("Fluency", f"{result['fluency_score']}/100")
-                        
-                        # What you said
-                        st.markdown(f"**You said:** {result['user_text']}")
-                        st.markdown(f"**Expected:** {practice_text}")
-                        
-                        # Feedback
-                        st.markdown("**Feedback:**")
-                        for feedback in result['feedback']:
-                            st.markdown(f"• {feedback}")
-                        
-                        # Overall score
-                        overall_score = (result['pronunciation_score'] + result['fluency_score']) / 2
-                        if overall_score >= 80:
-                            st.success(f"🎉 Overall Score: {overall_score:.1f}/100 - Great job!")
-                        elif overall_score >= 60:
-                            st.warning(f"📈 Overall Score: {overall_score:.1f}/100 - Keep practicing!")
-                        else:
-                            st.error(f"📚 Overall Score: {overall_score:.1f}/100 - More practice needed!")
-                    
+                if job_id is None:
+                    st.info("🎤 Click 'Start Recording' and speak clearly...")
+                    if st.button("🎙️ Start Recording", key=f"record_{i}"):
+                        # Record and grade in the background; this run returns immediately
+                        st.session_state.practice_results.pop(practice_key, None)
+                        st.session_state.practice_jobs[practice_key] = practice_jobs.submit(
+                            line, recognizer_backend, api.practice_line if api is not None else None
+                        )
+                        st.rerun()
+                else:
+                    status = practice_jobs.status(job_id)
+                    if status == 'done':
+                        st.session_state.practice_results[practice_key] = practice_jobs.result(job_id)
+                        del st.session_state.practice_jobs[practice_key]
+                    elif status == 'unknown':
+                        del st.session_state.practice_jobs[practice_key]
+                    elif status == 'queued':
+                        st.info("⏳ Waiting for a free recorder...")
                     else:
-                        st.error("❌ Failed to record speech. Please try again.")
-                        for feedback in result['feedback']:
-                            st.markdown(f"• {feedback}")
+                        st.info("🎤 Recording your speech...")
+                
+                result = session_store.restore(st.session_state.practice_results.get(practice_key))
+                if result is not None:
+                    render_practice_result(result, practice_text)
                 
                 # Add a button to exit practice mode
                 if st.button("❌ Exit Practice", key=f"exit_{i}"):
-                    st.session_state.practice_states[practice_key] = False
+                    # Keep only active lines, so practice state is bounded by the conversation's length
+                    st.session_state.practice_states.pop(practice_key, None)
+                    job_id = st.session_state.practice_jobs.pop(practice_key, None)
+                    if job_id is not None:
+                        practice_jobs.cancel(job_id)
+                    st.session_state.practice_results.pop(practice_key, None)
                     st.rerun()
         
         # Add separator between lines
         if i < len(st.session_state['conversation']) - 1:
             st.markdown("---")
-
+    
+    # Poll running jobs with a short sleep instead of blocking the script on the microphone
+    if st.session_state.practice_jobs:
+        time.sleep(0.5)
+        st.rerun()
@@ -0,0 +1,145 @@
+import os
+import re
+import hashlib
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """Normalize text so trivially different spellings of a line share a cache entry"""
+    text = unicodedata.normalize('NFC', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def cache_key(engine, voice, text, sample_rate, codec=None):
+    """Content address for a synthesized line; codec is given by engines whose output format is configurable"""
+    raw = f"{engine}\x00{voice}\x00{sample_rate}\x00{normalize_text(text)}"
+    if codec is not None:
+        raw += f"\x00{codec}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class AudioCache:
+    def __init__(self, cache_dir=None, max_memory_bytes=None):
+        """Two-tier TTS output cache: an in-memory LRU bounded by bytes and a sharded on-disk store"""
+        if cache_dir is None:
+            cache_dir = os.getenv('AUDIO_CACHE_DIR', '.audio_cache')
+        if max_memory_bytes is None:
+            max_memory_bytes = int(os.getenv('AUDIO_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # engine -> [hits, misses], so each engine's hit rate can be reported separately
+        self._engine_counts = {}
+
+    def _path(self, key):
+        # Shard by key prefix so no single directory grows too large
+        return os.path.join(self.cache_dir, key[:2], f"{key}.bin")
+
+    def _remember(self, key, audio_data):
+        """Insert into the memory tier, evicting least recently used entries over budget"""
+        if len(audio_data) > self.max_memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= len(self._memory.pop(key))
+            self._memory[key] = audio_data
+            self._memory_bytes += len(audio_data)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _count(self, engine, hit):
+        # Called with self._lock held
+        counts = self._engine_counts.setdefault(engine, [0, 0])
+        counts[0 if hit else 1] += 1
+
+    def get(self, engine, voice, text, sample_rate, codec=None):
+        """Return cached audio bytes or None"""
+        key = cache_key(engine, voice, text, sample_rate, codec)
+
+        with self._lock:
+            audio_data = self._memory.get(key)
+            if audio_data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self._count(engine, True)
+                return audio_data
+
+        try:
+            with open(self._path(key), 'rb') as f:
+                audio_data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+                self._count(engine, False)
+            return None
+        except OSError as e:
+            print(f"Error reading audio cache: {e}")
+            with self._lock:
+                self.misses += 1
+                self._count(engine, False)
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self._count(engine, True)
+        self._remember(key, audio_data)
+        return audio_data
+
+    def put(self, engine, voice, text, sample_rate, audio_data, codec=None):
+        """Store audio bytes in both tiers"""
+        if not audio_data:
+            return
+        key = cache_key(engine, voice, text, sample_rate, codec)
+        self._remember(key, audio_data)
+
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary name first so readers never see a partial file
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio_data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error writing audio cache: {e}")
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def stats(self, engine=None):
+        """Hit/miss counters and memory usage; with an engine, only that engine's lookups"""
+        with self._lock:
+            if engine is not None:
+                hits, misses = self._engine_counts.get(engine, (0, 0))
+                return {
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+                }
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+            }
+
+
+# Global instance
+audio_cache = AudioCache()
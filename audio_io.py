@@ -0,0 +1,79 @@
+import io
+import os
+import numpy as np
+
+# Output codecs for locally synthesized audio: name -> (libsndfile format, subtype, MIME type)
+CODECS = {
+    'wav': ('WAV', 'PCM_16', 'audio/wav'),
+    'ogg': ('OGG', 'OPUS', 'audio/ogg'),
+    'mp3': ('MP3', 'MPEG_LAYER_III', 'audio/mpeg'),
+}
+# Codec of audio that is stored and served: per-line players and the conversation track. MP3 plays
+# in every browser at a fraction of WAV's size
+AUDIO_CODEC = os.getenv('AUDIO_CODEC', 'mp3')
+# Codec of audio passed between components, e.g. engines to the track builder; lossless, so the
+# compressed codec is only ever applied once, at the edge
+PCM_CODEC = 'wav'
+# Opus only encodes at these rates
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def codec_mime(codec):
+    """MIME type of a codec's output"""
+    return CODECS[codec][2]
+
+
+def resample(samples, from_rate, to_rate):
+    """Linear-interpolation resampling, enough for speech going up to a common rate"""
+    if from_rate == to_rate or len(samples) == 0:
+        return samples
+    length = int(round(len(samples) * to_rate / from_rate))
+    positions = np.arange(length, dtype=np.float64) * (from_rate / to_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def encode_audio(samples, sample_rate, codec):
+    """Encode a waveform in memory with a codec from CODECS"""
+    # Imported here so the gTTS path doesn't need libsndfile
+    import soundfile as sf
+    if codec not in CODECS:
+        raise ValueError(f"Unknown audio codec '{codec}', choose from {', '.join(CODECS)}")
+    file_format, subtype, _ = CODECS[codec]
+
+    if codec == 'ogg' and sample_rate not in OPUS_SAMPLE_RATES:
+        # e.g. 22.05 kHz from the local engines goes up to 24 kHz
+        target_rate = next((rate for rate in OPUS_SAMPLE_RATES if rate >= sample_rate), OPUS_SAMPLE_RATES[-1])
+        samples = resample(np.asarray(samples, dtype=np.float32), sample_rate, target_rate)
+        sample_rate = target_rate
+
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, sample_rate, format=file_format, subtype=subtype)
+    return buffer.getvalue()
+
+
+def wav_bytes(samples, sample_rate):
+    """Encode a waveform as 16-bit PCM WAV bytes in memory"""
+    return encode_audio(samples, sample_rate, PCM_CODEC)
+
+
+def gtts_bytes(tts):
+    """Fetch a gTTS object's MP3 stream straight into memory"""
+    buffer = io.BytesIO()
+    tts.write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+def audio_duration(audio_data):
+    """Length of encoded audio in seconds, or None if libsndfile can't read the format"""
+    import soundfile as sf
+    try:
+        return sf.info(io.BytesIO(audio_data)).duration
+    except Exception:
+        return None
+
+
+def decode_audio(audio_data):
+    """Decode WAV/MP3/OGG bytes to mono float32 samples; returns (samples, sample_rate)"""
+    import soundfile as sf
+    samples, sample_rate = sf.read(io.BytesIO(audio_data), dtype='float32', always_2d=True)
+    return samples.mean(axis=1), sample_rate
@@ -0,0 +1,117 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+# File extensions for the MIME types our engines produce, and for state demoted from sessions
+MIME_EXTENSIONS = {
+    'audio/wav': '.wav',
+    'audio/mpeg': '.mp3',
+    'audio/ogg': '.ogg',
+    'application/json': '.json',
+}
+
+
+class AudioStore:
+    def __init__(self, store_dir=None, max_bytes=None, prune_every=100):
+        """
+        Write-once store for rendered audio segments, addressed by content ID
+        The store is bounded by max_bytes on disk: every prune_every writes, the least recently
+        used files are removed until it fits. Reading a file through touch() marks it as used
+        """
+        if store_dir is None:
+            store_dir = os.getenv('AUDIO_STORE_DIR', '.audio_store')
+        if max_bytes is None:
+            max_bytes = int(os.getenv('AUDIO_STORE_MAX_BYTES', 1024 * 1024 * 1024))
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def path(self, audio_id):
+        """File path of a stored segment"""
+        return os.path.join(self.store_dir, audio_id[:2], audio_id)
+
+    def touch(self, audio_id):
+        """Mark a stored segment as recently used and return its path, or None if it was pruned"""
+        path = self.path(audio_id)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, audio_data, mime='audio/wav'):
+        """Store audio bytes once and return their ID"""
+        extension = MIME_EXTENSIONS.get(mime, '')
+        audio_id = hashlib.sha256(audio_data).hexdigest()[:32] + extension
+        if self.touch(audio_id) is not None:
+            return audio_id
+
+        path = self.path(audio_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary name first so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(audio_data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.prune_every == 0
+        if due:
+            self.prune()
+        return audio_id
+
+    def get(self, audio_id):
+        """Return stored audio bytes or None"""
+        try:
+            with open(self.path(audio_id), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_json(self, value):
+        """Store a JSON-serializable value and return its ID"""
+        return self.put(json.dumps(value, sort_keys=True).encode('utf-8'), 'application/json')
+
+    def get_json(self, value_id):
+        """Return a value stored with put_json, or None if it is gone"""
+        data = self.get(value_id)
+        if data is None:
+            return None
+        self.touch(value_id)
+        return json.loads(data)
+
+    def prune(self):
+        """Remove the least recently used files until the store fits max_bytes; returns bytes removed"""
+        files = []
+        for root, _, names in os.walk(self.store_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        # Oldest first; other processes share the directory, so a file may already be gone
+        for _, size, path in sorted(files):
+            if total - removed <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += size
+            except OSError:
+                continue
+        if removed:
+            print(f"Audio store over {self.max_bytes / 1024 / 1024:.0f} MB, removed {removed / 1024 / 1024:.1f} MB")
+        return removed
+
+
+# Global instance
+audio_store = AudioStore()
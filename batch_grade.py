@@ -0,0 +1,169 @@
+"""Grade uploaded practice recordings in bulk.
+
+The manifest is JSONL ({"audio": "path.wav", "expected": "text"} per line) or CSV with
+audio,expected columns. Results are written as JSONL, or Parquet when the output ends in .parquet.
+A file that can't be decoded, recognized or graded gets a row with success false and its error.
+Recordings are batched by file size, so each batch holds clips of similar length that wav2vec2
+can recognize in one padded forward pass; rows are written in that order, keyed by audio path.
+
+    python batch_grade.py manifest.jsonl -o results.jsonl --workers 8 --backend wav2vec2
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import speech_recognition as sr
+from speech_practice import SpeechPractice
+
+# Per-process grader, created once by the pool initializer so models stay loaded between batches
+_practice = None
+
+
+def _init_worker(backend):
+    global _practice
+    _practice = SpeechPractice(backend)
+    _practice.get_backend().warm_up()
+
+
+def load_manifest(path):
+    """Read (audio, expected) items; relative audio paths are resolved against the manifest"""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.endswith('.csv'):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    return [
+        {'audio': os.path.join(base_dir, row['audio']), 'expected': row['expected']}
+        for row in rows
+    ]
+
+
+def grade_batch(items):
+    """Decode a batch of recordings, recognize them in one call and score each one"""
+    audios = []
+    errors = []
+    for item in items:
+        try:
+            with sr.AudioFile(item['audio']) as source:
+                audios.append(_practice.recognizer.record(source))
+            errors.append(None)
+        except Exception as e:
+            audios.append(None)
+            errors.append(f"Could not decode audio: {e}")
+
+    decoded = [audio for audio in audios if audio is not None]
+    try:
+        texts = iter(_practice.speech_to_text_batch(decoded) if decoded else [])
+    except Exception as e:
+        # Without transcripts nothing in the batch can be graded, but the other batches still can
+        texts = iter([None] * len(decoded))
+        errors = [error or f"Could not recognize speech: {e}" for error in errors]
+
+    results = []
+    for item, audio, error in zip(items, audios, errors):
+        result = None
+        if audio is not None:
+            user_text = next(texts)
+            if error is None:
+                # One unreadable or unusual file must not abort the whole run
+                try:
+                    result = _practice.grade(audio, user_text, item['expected'])
+                except Exception as e:
+                    error = f"Could not grade audio: {e}"
+        if result is None:
+            result = _practice._empty_result()
+            result['feedback'].append(f"❌ {error}")
+        results.append({'audio': item['audio'], 'expected': item['expected'], 'error': error, **result})
+    return results
+
+
+class ResultWriter:
+    def __init__(self, path):
+        """Stream results to JSONL, or collect them for a single Parquet write"""
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self.rows = []
+        self.file = None
+
+    def __enter__(self):
+        if not self.parquet:
+            self.file = open(self.path, 'w', encoding='utf-8')
+        return self
+
+    def write(self, rows):
+        if self.parquet:
+            self.rows.extend(rows)
+        else:
+            for row in rows:
+                self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def __exit__(self, *exc):
+        if self.file is not None:
+            self.file.close()
+        elif exc[0] is None:
+            import pandas as pd
+            frame = pd.DataFrame(self.rows)
+            # Nested lists don't map cleanly onto Parquet columns
+            for column in ('feedback', 'word_alignment'):
+                if column in frame:
+                    frame[column] = frame[column].map(json.dumps)
+            frame.to_parquet(self.path, index=False)
+        return False
+
+
+def _audio_size(item):
+    try:
+        return os.path.getsize(item['audio'])
+    except OSError:
+        # Reported as a decode error when its batch is graded
+        return 0
+
+
+def grade_manifest(manifest_path, output_path, workers=None, batch_size=16, backend=None, report_every=10):
+    """Grade every manifest item on a process pool and return a throughput summary"""
+    # Similar sizes mean similar durations, which the recognizer can batch with little padding
+    items = sorted(load_manifest(manifest_path), key=_audio_size)
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    graded = 0
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(backend,)) as executor:
+        with ResultWriter(output_path) as writer:
+            for batch_number, results in enumerate(executor.map(grade_batch, batches), 1):
+                writer.write(results)
+                graded += len(results)
+                failed += sum(1 for result in results if not result['success'])
+                if batch_number % report_every == 0 or graded == len(items):
+                    elapsed = time.perf_counter() - start
+                    print(f"Graded {graded}/{len(items)} files ({graded / elapsed:.1f} files/s)")
+
+    elapsed = time.perf_counter() - start
+    return {
+        'files': graded,
+        'failed': failed,
+        'seconds': elapsed,
+        'files_per_second': graded / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grade practice recordings listed in a manifest")
+    parser.add_argument('manifest', help="JSONL or CSV manifest with audio and expected fields")
+    parser.add_argument('-o', '--output', default='results.jsonl', help="Output .jsonl or .parquet file")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--batch-size', type=int, default=16, help="Recordings recognized per batch")
+    parser.add_argument('--backend', default=None, help="Speech recognizer: google or wav2vec2")
+    args = parser.parse_args(argv)
+
+    summary = grade_manifest(args.manifest, args.output, args.workers, args.batch_size, args.backend)
+    print(f"Done: {summary['files']} files, {summary['failed']} failed, "
+          f"{summary['seconds']:.1f}s ({summary['files_per_second']:.1f} files/s)")
+
+
+if __name__ == "__main__":
+    main()
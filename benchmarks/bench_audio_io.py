@@ -0,0 +1,68 @@
+"""Per-line overhead of encoding synthesized audio: temp-file round-trip vs in-memory, and codec sizes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_audio_io
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from audio_io import CODECS, encode_audio, wav_bytes
+
+
+def temp_file_wav_bytes(samples, sample_rate):
+    """The previous approach: write a NamedTemporaryFile, read it back, unlink it"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as fp:
+        temp_filename = fp.name
+    sf.write(temp_filename, samples, sample_rate)
+    with open(temp_filename, 'rb') as f:
+        audio_data = f.read()
+    os.unlink(temp_filename)
+    return audio_data
+
+
+def time_per_call(func, samples, sample_rate, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(samples, sample_rate)
+    return (time.perf_counter() - start) / repeats
+
+
+def codec_sizes(samples, sample_rate):
+    """Encoded bytes per line for each output codec"""
+    sizes = {}
+    for codec in CODECS:
+        try:
+            sizes[codec] = len(encode_audio(samples, sample_rate, codec))
+        except Exception as e:
+            # Older libsndfile builds lack MP3 or Opus
+            print(f"{codec} unavailable: {e}")
+    return sizes
+
+
+def run(line_seconds=3.0, sample_rate=22050, repeats=200):
+    """Return mean per-line encode time in milliseconds for both approaches, and bytes per codec"""
+    rng = np.random.default_rng(0)
+    samples = rng.uniform(-1, 1, int(line_seconds * sample_rate)).astype(np.float32)
+
+    # Both approaches must produce identical bytes
+    assert temp_file_wav_bytes(samples, sample_rate) == wav_bytes(samples, sample_rate)
+
+    return {
+        'temp_file_ms': time_per_call(temp_file_wav_bytes, samples, sample_rate, repeats) * 1000,
+        'in_memory_ms': time_per_call(wav_bytes, samples, sample_rate, repeats) * 1000,
+        'codec_bytes': codec_sizes(samples, sample_rate),
+    }
+
+
+if __name__ == "__main__":
+    results = run()
+    print(f"temp file round-trip: {results['temp_file_ms']:.3f} ms/line")
+    print(f"in-memory encoding:   {results['in_memory_ms']:.3f} ms/line")
+    print(f"speed-up:             {results['temp_file_ms'] / results['in_memory_ms']:.1f}x")
+    for codec, size in results['codec_bytes'].items():
+        print(f"{codec:<4} {size / 1024:8.1f} KiB/line")
@@ -0,0 +1,56 @@
+"""End-to-end latency from a requirement to conversation audio, with OpenAI and gTTS stood in locally.
+
+Covers what the page does on 'Generate Conversation' with 'Speak each line as it arrives':
+stream the dialogue, parse each line, and start synthesizing it while the rest is still arriving.
+
+    python -m benchmarks.bench_end_to_end
+"""
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.stubs import patched_gtts, patched_openai, scratch_audio_cache, stub_server
+from conversation_generator import conversation_prompt, iter_response_lines
+from conversation_parser import parse_line
+from tts_engines import GTTSEngine
+
+
+def run(conversations=5, latency=0.1, max_workers=4):
+    """Return time to the first audio segment and to the whole conversation, in milliseconds"""
+    first_audio = []
+    total = []
+    with stub_server(latency) as url, patched_openai(url), patched_gtts(url):
+        engine = GTTSEngine(retries=0)
+        for _ in range(conversations):
+            # A fresh requirement and an empty audio cache, so nothing is reused between runs
+            prompt = conversation_prompt(f"ordering coffee {uuid.uuid4().hex[:8]}")
+            with scratch_audio_cache(), ThreadPoolExecutor(max_workers=max_workers) as executor:
+                start = time.perf_counter()
+                first_done = []
+                futures = []
+                for raw_line in iter_response_lines(prompt, use_cache=False):
+                    line = parse_line(raw_line)
+                    if line is None:
+                        continue
+                    voice = 'british' if line.speaker == 'B' else 'default'
+                    futures.append(executor.submit(engine.synthesize, line.text, voice))
+                    if len(futures) == 1:
+                        futures[0].add_done_callback(lambda _: first_done.append(time.perf_counter()))
+                for future in futures:
+                    future.result()
+                total.append((time.perf_counter() - start) * 1000)
+                first_audio.append((first_done[0] - start) * 1000)
+
+    return {
+        'stub_latency_ms': latency * 1000,
+        'first_audio_p50_ms': float(np.percentile(first_audio, 50)),
+        'conversation_p50_ms': float(np.percentile(total, 50)),
+        'conversation_p95_ms': float(np.percentile(total, 95)),
+    }
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        print(f"{name:22s} {value:8.1f}")
@@ -0,0 +1,89 @@
+"""Import-time regression check for the modules app.py loads at start-up.
+
+Uses ``python -X importtime`` in a fresh interpreter, so results aren't skewed by modules this
+process already imported. Exits non-zero if start-up imports exceed the budget or pull in a
+heavy dependency that should only load on first use. tests/test_import_time.py runs the
+heavy-module check under pytest; the time budget stays here, where a slow machine can't fail CI.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_import_time --budget-ms 1000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Project modules imported at the top of app.py
+STARTUP_MODULES = [
+    'conversation_generator', 'practice_jobs', 'tts_models', 'tts_engines',
+    'audio_store', 'knowledge_base', 'conversation_parser', 'session_store',
+]
+
+# Must not be imported until an engine, model or recognizer is actually used
+HEAVY_MODULES = [
+    'torch', 'torchaudio', 'fairseq', 'transformers', 'nltk', 'sentence_transformers',
+    'speech_recognition', 'openai', 'gtts', 'soundfile',
+]
+
+
+def measure(modules=STARTUP_MODULES):
+    """Return cumulative import microseconds per module and the heavy modules that got loaded"""
+    code = (
+        "import sys, json\n"
+        f"import {', '.join(modules)}\n"
+        f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        # The name column starts after one separator space; nested imports are indented further
+        name = fields[2][1:].rstrip()
+        if name in modules:
+            cumulative[name] = int(fields[1])
+
+    return {
+        'modules_us': cumulative,
+        'total_ms': sum(cumulative.values()) / 1000,
+        'heavy_imported': json.loads(completed.stdout.strip().splitlines()[-1]),
+    }
+
+
+def run():
+    return measure()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=1000.0)
+    args = parser.parse_args(argv)
+
+    results = measure()
+    for name, micros in sorted(results['modules_us'].items(), key=lambda item: -item[1]):
+        print(f"  {name:24s} {micros / 1000:8.1f} ms")
+    print(f"total: {results['total_ms']:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if results['total_ms'] > args.budget_ms:
+        print("FAIL: start-up imports are over budget")
+        failed = True
+    if results['heavy_imported']:
+        print(f"FAIL: heavy modules imported at start-up: {', '.join(results['heavy_imported'])}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Insert throughput and lookup latency of the conversation library at 100k entries.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_knowledge_base
+"""
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from knowledge_base import ConversationLibrary
+
+TOPICS = [
+    "ordering coffee", "job interview", "hotel check-in", "asking for directions",
+    "doctor appointment", "buying a train ticket", "returning a shirt", "small talk at work",
+    "renting an apartment", "restaurant reservation", "lost luggage", "bank account opening",
+]
+MODIFIERS = [
+    "polite", "casual", "formal", "short", "long", "beginner", "advanced", "friendly",
+    "at the airport", "in London", "on the phone", "with a manager", "for a student",
+]
+
+
+def synthetic_requirements(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(MODIFIERS)} {rng.choice(TOPICS)} {rng.choice(MODIFIERS)} #{i}"
+        for i in range(count)
+    ]
+
+
+def run(entries=100_000, batch_size=1000, queries=200):
+    """Return insert throughput and lookup latency percentiles in milliseconds"""
+    requirements = synthetic_requirements(entries)
+    with tempfile.TemporaryDirectory() as path:
+        library = ConversationLibrary(path=path, flush_every=entries)
+
+        start = time.perf_counter()
+        for i in range(0, entries, batch_size):
+            batch = requirements[i:i + batch_size]
+            library.add_many([(r, "A: Hello!\nB: Hi!") for r in batch])
+        insert_seconds = time.perf_counter() - start
+
+        latencies = []
+        for requirement in synthetic_requirements(queries, seed=1):
+            start = time.perf_counter()
+            library.lookup(requirement)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'entries': entries,
+        'inserts_per_second': entries / insert_seconds,
+        'lookup_p50_ms': float(np.percentile(latencies, 50)),
+        'lookup_p95_ms': float(np.percentile(latencies, 95)),
+    }
+
+
+if __name__ == "__main__":
+    results = run()
+    print(f"entries:        {results['entries']}")
+    print(f"inserts/second: {results['inserts_per_second']:.0f}")
+    print(f"lookup p50:     {results['lookup_p50_ms']:.2f} ms")
+    print(f"lookup p95:     {results['lookup_p95_ms']:.2f} ms")
@@ -0,0 +1,49 @@
+"""Conversation generation overhead against a local OpenAI stand-in.
+
+Measures get_response round trips and time to the first streamed line with the response cache
+off, so the numbers cover client, connection pool and parsing cost rather than model time.
+
+    python -m benchmarks.bench_llm
+"""
+import time
+
+import numpy as np
+
+from benchmarks.stubs import patched_openai, stub_server
+from conversation_generator import conversation_prompt, get_response, iter_response_lines
+
+
+def run(requests=50, latency=0.0):
+    """Return get_response and first-streamed-line latency percentiles in milliseconds"""
+    prompt = conversation_prompt("ordering coffee")
+    with stub_server(latency) as url, patched_openai(url):
+        # The first call opens the pooled connection
+        get_response(prompt, use_cache=False)
+
+        round_trips = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            get_response(prompt, use_cache=False)
+            round_trips.append((time.perf_counter() - start) * 1000)
+
+        first_lines = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            lines = iter_response_lines(prompt, use_cache=False)
+            next(lines)
+            first_lines.append((time.perf_counter() - start) * 1000)
+            lines.close()
+
+    return {
+        'stub_latency_ms': latency * 1000,
+        'get_response_p50_ms': float(np.percentile(round_trips, 50)),
+        'get_response_p95_ms': float(np.percentile(round_trips, 95)),
+        'first_line_p50_ms': float(np.percentile(first_lines, 50)),
+        'first_line_p95_ms': float(np.percentile(first_lines, 95)),
+    }
+
+
+if __name__ == "__main__":
+    results = run()
+    for name, value in results.items():
+        print(f"{name:22s} {value:8.2f}")
@@ -0,0 +1,64 @@
+"""Pronunciation scoring throughput: difflib SequenceMatcher vs the edit-distance engine.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_scoring
+"""
+import random
+import re
+import time
+from difflib import SequenceMatcher
+
+from speech_practice import SpeechPractice
+
+WORDS = (
+    "i would like a coffee please with milk and sugar could you tell me where the station is "
+    "thank you very much for your help have a nice day see you tomorrow at the office"
+).split()
+
+
+def sequence_matcher_score(user_text, expected_text):
+    """The previous implementation of calculate_pronunciation_score"""
+    user_clean = re.sub(r'[^\w\s]', '', user_text.lower())
+    expected_clean = re.sub(r'[^\w\s]', '', expected_text.lower())
+    return round(SequenceMatcher(None, user_clean, expected_clean).ratio() * 100, 1)
+
+
+def synthetic_pairs(count, words_per_line, seed=0):
+    """Expected lines plus a recognition with a few dropped and substituted words"""
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        expected = [rng.choice(WORDS) for _ in range(words_per_line)]
+        user = [w if rng.random() > 0.15 else rng.choice(WORDS) for w in expected if rng.random() > 0.05]
+        pairs.append((' '.join(user), ' '.join(expected)))
+    return pairs
+
+
+def pairs_per_second(func, pairs):
+    start = time.perf_counter()
+    func(pairs)
+    return len(pairs) / (time.perf_counter() - start)
+
+
+def run(count=2000, words_per_line=(8, 40)):
+    """Return pairs/second for each implementation at each line length"""
+    practice = SpeechPractice()
+    results = {}
+    for words in words_per_line:
+        pairs = synthetic_pairs(count, words)
+        results[words] = {
+            'sequence_matcher': pairs_per_second(lambda p: [sequence_matcher_score(u, e) for u, e in p], pairs),
+            'edit_distance': pairs_per_second(
+                lambda p: [practice.calculate_pronunciation_score(u, e) for u, e in p], pairs),
+            'score_batch': pairs_per_second(lambda p: practice.score_batch(p), pairs),
+            'score_batch_aligned': pairs_per_second(lambda p: practice.score_batch(p, with_alignment=True), pairs),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    for words, result in run().items():
+        print(f"{words} words/line:")
+        for name, rate in result.items():
+            print(f"  {name:20s} {rate:10.0f} pairs/s")
@@ -0,0 +1,71 @@
+"""Speech synthesis throughput: gTTS against a local stand-in, and the local models' real-time factor.
+
+gTTS lines go to benchmarks.stubs, which answers after a fixed delay, so the serial vs concurrent
+numbers show how well request latency is hidden. The local engines run on whatever device torch
+picks; an engine whose model can't be loaded is reported as skipped.
+
+    python -m benchmarks.bench_tts
+"""
+import time
+import uuid
+
+from audio_io import audio_duration
+from benchmarks.stubs import CONVERSATION, patched_gtts, scratch_audio_cache, stub_server
+from tts_engines import GTTSEngine, tts_engines
+
+
+def unique_lines(count):
+    """Distinct conversation lines, so nothing is served from the audio cache"""
+    base = CONVERSATION.split('\n')
+    nonce = uuid.uuid4().hex[:8]
+    return [f"{base[i % len(base)]} ({nonce} {i})" for i in range(count)]
+
+
+def gtts_throughput(lines, latency, max_workers):
+    with stub_server(latency) as url, patched_gtts(url), scratch_audio_cache():
+        engine = GTTSEngine(max_workers=max_workers, retries=0)
+        start = time.perf_counter()
+        segments = list(engine.stream(unique_lines(lines)))
+        elapsed = time.perf_counter() - start
+    return {
+        'lines': len(segments),
+        'seconds': elapsed,
+        'lines_per_second': len(segments) / elapsed,
+    }
+
+
+def local_real_time_factor(name, lines):
+    engine = tts_engines.get(name)
+    if not engine.warm_up():
+        return {'skipped': f"{name} model could not be loaded"}
+
+    texts = unique_lines(lines)
+    with scratch_audio_cache():
+        start = time.perf_counter()
+        results = engine.synthesize_batch(texts)
+        elapsed = time.perf_counter() - start
+
+    durations = [audio_duration(audio_data) for audio_data in results if audio_data]
+    audio_seconds = sum(duration for duration in durations if duration)
+    return {
+        'lines': len(durations),
+        'seconds': elapsed,
+        'audio_seconds': audio_seconds,
+        # Below 1.0 is faster than real time
+        'real_time_factor': elapsed / audio_seconds if audio_seconds else None,
+    }
+
+
+def run(lines=24, latency=0.1, workers=(1, 4), local_engines=('fastspeech2', 'tacotron2')):
+    """Return gTTS lines/second per worker count and each local engine's real-time factor"""
+    results = {'stub_latency_ms': latency * 1000}
+    for max_workers in workers:
+        results[f'gtts_workers_{max_workers}'] = gtts_throughput(lines, latency, max_workers)
+    for name in local_engines:
+        results[name] = local_real_time_factor(name, min(lines, 8))
+    return results
+
+
+if __name__ == "__main__":
+    for name, result in run().items():
+        print(f"{name}: {result}")
@@ -0,0 +1,34 @@
+"""Cost of the voice-activity pass per second of recorded audio.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_vad
+"""
+import time
+
+import numpy as np
+
+from voice_activity import analyze_voice_activity
+
+
+def synthetic_recording(seconds, sample_rate, seed=0):
+    """Alternating tone bursts and low-level noise, as 16-bit PCM bytes"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    envelope = (np.sin(2 * np.pi * 0.5 * t) > 0).astype(np.float32)
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) * envelope + rng.normal(0, 0.002, len(t))
+    return (signal * 32767).astype(np.int16).tobytes()
+
+
+def run(seconds=10, sample_rate=16000, repeats=200):
+    """Return milliseconds of processing per second of audio"""
+    frame_data = synthetic_recording(seconds, sample_rate)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        analyze_voice_activity(frame_data, sample_rate, 2)
+    elapsed = (time.perf_counter() - start) / repeats
+    return {'ms_per_audio_second': elapsed * 1000 / seconds}
+
+
+if __name__ == "__main__":
+    print(f"voice activity: {run()['ms_per_audio_second']:.4f} ms per second of audio")
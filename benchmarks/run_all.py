@@ -0,0 +1,113 @@
+"""Run the benchmark suite and write the results as JSON, to track performance across commits.
+
+    python -m benchmarks.run_all                          # all benchmarks -> benchmarks/results/<commit>.json
+    python -m benchmarks.run_all --only scoring vad -o out.json
+    python -m benchmarks.run_all --compare benchmarks/results/<older commit>.json
+
+A benchmark whose dependencies aren't installed is recorded as skipped rather than failing the run.
+"""
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import subprocess
+import time
+
+BENCHMARKS = {
+    'import_time': 'benchmarks.bench_import_time',
+    'audio_io': 'benchmarks.bench_audio_io',
+    'scoring': 'benchmarks.bench_scoring',
+    'vad': 'benchmarks.bench_vad',
+    'knowledge_base': 'benchmarks.bench_knowledge_base',
+    'llm': 'benchmarks.bench_llm',
+    'tts': 'benchmarks.bench_tts',
+    'end_to_end': 'benchmarks.bench_end_to_end',
+}
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(module_name):
+    """Run one benchmark module; returns its results, or why it was skipped or failed"""
+    start = time.perf_counter()
+    try:
+        results = importlib.import_module(module_name).run()
+    except ImportError as e:
+        return {'skipped': str(e)}
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+    return {'results': results, 'seconds': time.perf_counter() - start}
+
+
+def flatten(value, prefix=''):
+    """{'a': {'b': 1}} -> {'a.b': 1}, numbers only"""
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def compare(previous, current):
+    """Print every metric present in both runs with its relative change"""
+    old = flatten({name: entry.get('results') for name, entry in previous['benchmarks'].items()})
+    new = flatten({name: entry.get('results') for name, entry in current['benchmarks'].items()})
+    print(f"\nChange since {(previous.get('commit') or 'previous run')[:12]}:")
+    for key in sorted(old.keys() & new.keys()):
+        if old[key]:
+            change = (new[key] - old[key]) / abs(old[key]) * 100
+            print(f"  {key:50s} {old[key]:12.3f} -> {new[key]:12.3f}  ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Benchmarks to run (default: all)")
+    parser.add_argument('-o', '--output', help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    commit = current_commit()
+    report = {
+        'commit': commit,
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'benchmarks': {},
+    }
+    for name in args.only or BENCHMARKS:
+        print(f"Running {name}...")
+        entry = run_benchmark(BENCHMARKS[name])
+        report['benchmarks'][name] = entry
+        if 'results' not in entry:
+            print(f"  {next(iter(entry))}: {next(iter(entry.values()))}")
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{(commit or 'uncommitted')[:12]}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
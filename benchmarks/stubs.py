@@ -0,0 +1,190 @@
+"""Local stand-ins for the OpenAI and Google TTS endpoints, so benchmarks need no network or API keys.
+
+Both servers run on 127.0.0.1 in a background thread and answer with fixed content after an
+optional delay, which keeps the measured time down to this project's own overhead.
+"""
+import base64
+import io
+import json
+import math
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+import wave
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONVERSATION = (
+    "A: Good morning! Could I get a large latte, please?\n"
+    "B: Of course. Would you like any syrup with that?\n"
+    "A: Just a little vanilla, thank you.\n"
+    "B: That will be four fifty. Is that for here or to go?\n"
+    "A: To go, please.\n"
+    "B: Here you are. Have a great day!"
+)
+
+# Proxy variables would route requests for the local stubs elsewhere
+PROXY_VARIABLES = ('http_proxy', 'https_proxy', 'all_proxy', 'HTTP_PROXY', 'HTTPS_PROXY', 'ALL_PROXY')
+
+
+def tone_wav(seconds=1.0, sample_rate=24000, frequency=220.0):
+    """A short 16-bit WAV tone built with the standard library, used as the stub's speech"""
+    count = int(seconds * sample_rate)
+    frames = b''.join(
+        struct.pack('<h', int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate)))
+        for i in range(count)
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(frames)
+    return buffer.getvalue()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.counts['connections'] = self.server.counts.get('connections', 0) + 1
+        # Headers and body go out in separate writes; don't let Nagle hold the body for a delayed ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self._read_body()
+        time.sleep(self.server.latency)
+        if self.path.endswith('/chat/completions'):
+            self._chat_completion(json.loads(body or b'{}'))
+        elif self.path.endswith('/batchexecute'):
+            self._google_tts()
+        else:
+            self.send_error(404)
+
+    def _chat_completion(self, request):
+        content = self.server.conversation
+        if request.get('stream'):
+            # Server-sent events, one line of the conversation per chunk
+            chunks = [line + '\n' for line in content.split('\n')]
+            events = []
+            for chunk in chunks:
+                events.append({
+                    'id': 'stub', 'object': 'chat.completion.chunk', 'created': 0, 'model': request.get('model'),
+                    'choices': [{'index': 0, 'delta': {'content': chunk}, 'finish_reason': None}],
+                })
+            events.append({
+                'id': 'stub', 'object': 'chat.completion.chunk', 'created': 0, 'model': request.get('model'),
+                'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}],
+            })
+            body = ''.join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+            self._send(body.encode('utf-8'), 'text/event-stream')
+            return
+
+        response = {
+            'id': 'stub', 'object': 'chat.completion', 'created': 0, 'model': request.get('model'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        }
+        self._send(json.dumps(response).encode('utf-8'), 'application/json')
+
+    def _google_tts(self):
+        # The batchexecute framing gTTS parses: a line carrying the RPC id and the base64 audio
+        audio = base64.b64encode(self.server.audio).decode('ascii')
+        line = f'[["wrb.fr","jQ1olc","[\\"{audio}\\"]",null,null,null,"generic"]]'
+        self._send(f")]}}'\n\n{len(line)}\n{line}\n".encode('utf-8'), 'application/json')
+
+
+@contextmanager
+def stub_server(latency=0.0, conversation=CONVERSATION, audio=None, counts=None):
+    """
+    Run the stub server; yields its base URL
+    counts: optional dict whose 'connections' entry counts accepted TCP connections, so a test can
+    check that a client reuses its pooled connection
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.counts = counts if counts is not None else {}
+    server.lock = threading.Lock()
+    server.conversation = conversation
+    server.audio = audio if audio is not None else tone_wav()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def patched_openai(base_url):
+    """Point conversation_generator's shared clients at the stub"""
+    import conversation_generator
+    saved = {name: os.environ.get(name) for name in ('AZURE_OPENAI_API_ENDPOINT', 'AZURE_OPENAI_API_KEY')}
+    os.environ['AZURE_OPENAI_API_ENDPOINT'] = f"{base_url}/v1"
+    os.environ['AZURE_OPENAI_API_KEY'] = 'stub'
+    # Clients are created once per process, so drop any made before the patch
+    conversation_generator._client = None
+    conversation_generator._async_clients.clear()
+    try:
+        yield
+    finally:
+        conversation_generator._client = None
+        conversation_generator._async_clients.clear()
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@contextmanager
+def patched_gtts(base_url):
+    """Send gTTS requests to the stub instead of translate.google.*"""
+    import gtts.tts
+    original = gtts.tts._translate_url
+    gtts.tts._translate_url = lambda tld='com', path='': f"{base_url}/{path}"
+    saved = {name: os.environ.pop(name) for name in PROXY_VARIABLES if name in os.environ}
+    try:
+        yield
+    finally:
+        gtts.tts._translate_url = original
+        os.environ.update(saved)
+
+
+@contextmanager
+def scratch_audio_cache():
+    """Start the shared audio cache empty in a temporary directory, so every line is synthesized"""
+    from audio_cache import audio_cache
+    original = audio_cache.cache_dir
+    with tempfile.TemporaryDirectory() as path:
+        audio_cache.cache_dir = path
+        audio_cache.clear_memory()
+        try:
+            yield
+        finally:
+            audio_cache.cache_dir = original
+            audio_cache.clear_memory()
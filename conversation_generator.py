@@ -1,24 +1,357 @@
 import os
+import re
+import asyncio
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from dotenv import load_dotenv
-import openai
 
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock; writers are then only serialized within one process
+    fcntl = None
 
-def get_response(input_text):
-    load_dotenv()
-    client = openai.OpenAI(
-        base_url=os.getenv('AZURE_OPENAI_API_ENDPOINT'),
-        api_key=os.getenv('AZURE_OPENAI_API_KEY')
+# Read .env once per process rather than on every request
+load_dotenv()
+
+MODEL = "GPT-4o-mini"
+SYSTEM_PROMPT = "You are a helpful assistant."
+
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', 60))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 2))
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', 20))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', 30))
+
+_client = None
+# Event loop -> async client; httpx binds an async connection pool to the loop that opened it
+_async_clients = {}
+_client_lock = threading.Lock()
+
+
+def _client_options():
+    return {
+        'base_url': os.getenv('AZURE_OPENAI_API_ENDPOINT'),
+        'api_key': os.getenv('AZURE_OPENAI_API_KEY'),
+        'timeout': OPENAI_TIMEOUT,
+        'max_retries': OPENAI_MAX_RETRIES,
+    }
+
+
+def _limits():
+    import httpx
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
     )
 
-    system_prompt = "You are a helpful assistant."
+
+def get_client():
+    """Shared OpenAI client; its connection pool and TLS sessions are reused across requests"""
+    global _client
+    if _client is None:
+        # openai is imported on first use; it is one of the slowest imports at app start-up
+        import openai
+        with _client_lock:
+            if _client is None:
+                _client = openai.OpenAI(
+                    http_client=openai.DefaultHttpxClient(limits=_limits()),
+                    **_client_options()
+                )
+    return _client
+
+
+def get_async_client():
+    """
+    Async OpenAI client for the running event loop, reused by every request made on that loop
+    Each asyncio.run (a batch job, a Streamlit rerun thread) gets its own client, since a pooled
+    connection opened on one loop can't be used from another
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import openai
+        with _client_lock:
+            # Forget clients whose loop has finished; their connections can't be reused
+            for closed in [other for other in _async_clients if other.is_closed()]:
+                del _async_clients[closed]
+            client = _async_clients.get(loop)
+            if client is None:
+                client = _async_clients[loop] = openai.AsyncOpenAI(
+                    http_client=openai.DefaultAsyncHttpxClient(limits=_limits()),
+                    **_client_options()
+                )
+    return client
+
+
+class ResponseCache:
+    def __init__(self, path=None, ttl=None, max_entries=None, variants=None):
+        """
+        Exact-match cache of LLM responses with TTL, LRU eviction and an append-only log on disk
+        Processes sharing the log take a file lock to append or compact it, and pick up each
+        other's records whenever they write
+        """
+        self.path = path or os.getenv('RESPONSE_CACHE_PATH', '.response_cache.jsonl')
+        self.ttl = float(ttl if ttl is not None else os.getenv('RESPONSE_CACHE_TTL', 7 * 24 * 3600))
+        self.max_entries = int(max_entries if max_entries is not None else os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 1000))
+        # Number of distinct responses collected per prompt before serving them round-robin
+        self.variants = int(variants if variants is not None else os.getenv('RESPONSE_CACHE_VARIANTS', 1))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Records in the log file, live or superseded; the log is compacted when it outgrows the cache
+        self._logged = 0
+        # How far into which log file this process has read; compaction replaces the file
+        self._inode = None
+        self._offset = 0
+        self.hits = 0
+        self.misses = 0
+        self._catch_up()
+
+    @staticmethod
+    def key(input_text, model, system_prompt):
+        normalized = re.sub(r'\s+', ' ', input_text).strip().lower()
+        raw = f"{model}\x00{system_prompt}\x00{normalized}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    @contextmanager
+    def _log_lock(self):
+        """Exclusive lock on the log across processes, held for appends and compaction"""
+        if fcntl is None:
+            yield
+            return
+        # A sidecar file, since compaction swaps the log itself for a new file
+        try:
+            lock_file = open(self.path + '.lock', 'a')
+        except OSError as e:
+            print(f"Error locking response cache: {e}")
+            yield
+            return
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _catch_up(self):
+        """
+        Replay records appended since this process last read or wrote the log
+        Called with the locks held (or from __init__ before the cache is shared)
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_ino != self._inode or stat.st_size < self._offset:
+                    # New file, or another process compacted it: replay it from the start
+                    self._inode, self._offset, self._logged = stat.st_ino, 0, 0
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"Error loading response cache: {e}")
+            return
+        # A partly written last line is left for the next read
+        end = data.rfind(b'\n') + 1
+        self._offset += end
+        now = time.time()
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+                key, created, response = record['key'], record['created'], record['response']
+            except (ValueError, TypeError, KeyError):
+                # A line torn by a crash mid-append, or a file in an older format
+                continue
+            self._logged += 1
+            entry = self._entries.get(key)
+            if entry is not None and response in entry['variants']:
+                continue
+            # Later records for a prompt add variants to earlier ones
+            if now - created < self.ttl:
+                self._insert(key, response, created)
+
+    def _insert(self, key, response, created):
+        # Called with the lock held (or from __init__ before the cache is shared)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = {'created': created, 'variants': [], 'next': 0}
+            self._entries[key] = entry
+        if response not in entry['variants']:
+            entry['variants'].append(response)
+            del entry['variants'][:-self.variants]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _append(self, record):
+        # Called with the locks held; one write of one line, so the cost doesn't grow with the cache
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+                f.flush()
+                self._inode, self._offset = os.fstat(f.fileno()).st_ino, f.tell()
+            self._logged += 1
+        except OSError as e:
+            print(f"Error saving response cache: {e}")
+
+    def _rewrite(self):
+        """Replace the log with only the live entries; called with the locks held"""
+        records = [
+            {'key': key, 'created': entry['created'], 'response': response}
+            for key, entry in self._entries.items()
+            for response in entry['variants']
+        ]
+        temp_path = None
+        try:
+            # A unique temporary name, so concurrent writers never share one; the rename is atomic
+            directory = os.path.dirname(os.path.abspath(self.path))
+            with tempfile.NamedTemporaryFile(
+                'w', encoding='utf-8', dir=directory, prefix=os.path.basename(self.path) + '.',
+                suffix='.tmp', delete=False
+            ) as f:
+                temp_path = f.name
+                f.writelines(json.dumps(record) + '\n' for record in records)
+                f.flush()
+                inode, offset = os.fstat(f.fileno()).st_ino, f.tell()
+            os.replace(temp_path, self.path)
+            self._inode, self._offset, self._logged = inode, offset, len(records)
+        except OSError as e:
+            print(f"Error compacting response cache: {e}")
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def get(self, input_text, model, system_prompt):
+        """Return a cached response, or None when more variants should be generated"""
+        key = self.key(input_text, model, system_prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry['created'] >= self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None or len(entry['variants']) < self.variants:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            response = entry['variants'][entry['next'] % len(entry['variants'])]
+            entry['next'] = (entry['next'] + 1) % len(entry['variants'])
+            return response
+
+    def add(self, input_text, model, system_prompt, response):
+        """Record a fresh response for the prompt"""
+        if not response:
+            return
+        key = self.key(input_text, model, system_prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            created = entry['created'] if entry is not None else time.time()
+            if entry is not None and response in entry['variants']:
+                self._entries.move_to_end(key)
+                return
+            with self._log_lock():
+                # Records other processes appended are kept, both here and through a compaction
+                self._catch_up()
+                self._insert(key, response, created)
+                self._append({'key': key, 'created': created, 'response': response})
+                if self._logged > 2 * self.max_entries * self.variants:
+                    self._rewrite()
+
+    def clear(self):
+        with self._lock, self._log_lock():
+            self._catch_up()
+            self._entries.clear()
+            self._rewrite()
+
+
+# Global instance
+response_cache = ResponseCache()
+
+
+def conversation_prompt(requirement):
+    """Prompt asking for a two-speaker dialogue that meets the user's requirement"""
+    return f"{requirement}\n Format as alternating lines for two speakers, e.g., 'A: ...', 'B: ...'."
+
+
+def _messages(input_text):
+    return [
+        {"role":"system", "content": SYSTEM_PROMPT},
+        {"role":"user", "content" : input_text}
+    ]
+
+
+def get_response(input_text, use_cache=True):
+    if use_cache:
+        cached = response_cache.get(input_text, MODEL, SYSTEM_PROMPT)
+        if cached is not None:
+            return cached
+    
+    client = get_client()
     
     response = client.chat.completions.create(
-        model="GPT-4o-mini",
-        messages=[
-            {"role":"system", "content": system_prompt},
-            {"role":"user", "content" : input_text}
-        ],
+        model=MODEL,
+        messages=_messages(input_text),
     )
-    return response.choices[0].message.content
+    content = response.choices[0].message.content
+    if use_cache:
+        response_cache.add(input_text, MODEL, SYSTEM_PROMPT, content)
+    return content
 
-    
\ No newline at end of file
+
+async def get_response_async(input_text, use_cache=True):
+    if use_cache:
+        cached = response_cache.get(input_text, MODEL, SYSTEM_PROMPT)
+        if cached is not None:
+            return cached
+    
+    client = get_async_client()
+    
+    response = await client.chat.completions.create(
+        model=MODEL,
+        messages=_messages(input_text),
+    )
+    content = response.choices[0].message.content
+    if use_cache:
+        # The cache appends to a file; keep that blocking I/O off the event loop
+        await asyncio.to_thread(response_cache.add, input_text, MODEL, SYSTEM_PROMPT, content)
+    return content
+
+
+def iter_response_lines(input_text, use_cache=True):
+    """Stream the response and yield each non-empty line as soon as it is complete"""
+    if use_cache:
+        cached = response_cache.get(input_text, MODEL, SYSTEM_PROMPT)
+        if cached is not None:
+            for line in cached.split("\n"):
+                if line.strip():
+                    yield line.strip()
+            return
+    
+    client = get_client()
+    
+    stream = client.chat.completions.create(
+        model=MODEL,
+        messages=_messages(input_text),
+        stream=True,
+    )
+    
+    content = ""
+    buffer = ""
+    for chunk in stream:
+        # Azure sends a leading chunk with no choices (content filter results)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content or ""
+        content += delta
+        buffer += delta
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            if line.strip():
+                yield line.strip()
+    
+    if buffer.strip():
+        yield buffer.strip()
+    
+    if use_cache:
+        response_cache.add(input_text, MODEL, SYSTEM_PROMPT, content)
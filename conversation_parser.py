@@ -0,0 +1,56 @@
+import re
+import hashlib
+from audio_cache import normalize_text
+
+
+def clean_text(text):
+    """Lowercase and strip punctuation, as used for scoring"""
+    return re.sub(r'[^\w\s]', '', text.lower())
+
+
+class Line:
+    __slots__ = ('raw', 'speaker', 'text', 'normalized', 'clean', 'tokens', 'cache_key')
+
+    def __init__(self, raw, speaker, text):
+        """One conversation line, parsed once and shared by the page, TTS engines and scorer"""
+        self.raw = raw
+        self.speaker = speaker
+        self.text = text
+        self.normalized = normalize_text(text)
+        self.clean = clean_text(text)
+        self.tokens = self.clean.split()
+        self.cache_key = hashlib.sha1(f"{speaker}\x00{self.normalized}".encode('utf-8')).hexdigest()
+
+    def __str__(self):
+        return self.raw
+
+    def __repr__(self):
+        return f"Line({self.raw!r})"
+
+
+def parse_line(raw):
+    """Parse 'A: text' into a Line; None for blank lines"""
+    raw = raw.strip()
+    if not raw:
+        return None
+
+    # Split off speaker labels like "A:", "B:"
+    speaker = None
+    text = raw
+    if ': ' in raw:
+        speaker_label, text = raw.split(': ', 1)
+        text = text.strip()
+        speaker = speaker_label.strip()
+    return Line(raw, speaker, text)
+
+
+def parse_conversation(conversation):
+    """Parse a conversation given as text or a list of lines; already-parsed Lines pass through"""
+    if isinstance(conversation, str):
+        conversation = conversation.split('\n')
+    lines = []
+    for item in conversation:
+        line = item if isinstance(item, Line) else parse_line(item)
+        if line is not None:
+            lines.append(line)
+    return lines
@@ -0,0 +1,61 @@
+import numpy as np
+from audio_io import AUDIO_CODEC, decode_audio, encode_audio, resample
+
+# gTTS's rate; the local engines' 22.05 kHz is upsampled to it, so no engine is downsampled
+TRACK_SAMPLE_RATE = 24000
+
+
+def pcm_segments(segments):
+    """Decode engine segments' 'audio' into float32 mono 'samples' and their 'sample_rate'"""
+    for segment in segments:
+        try:
+            samples, sample_rate = decode_audio(segment['audio'])
+        except Exception as e:
+            print(f"Skipping undecodable segment '{segment['text']}': {e}")
+            continue
+        pcm = {key: value for key, value in segment.items() if key != 'audio'}
+        pcm['samples'] = samples
+        pcm['sample_rate'] = sample_rate
+        yield pcm
+
+
+def build_track(segments, sample_rate=TRACK_SAMPLE_RATE, gap=0.3, speaker_gap=0.6, codec=None):
+    """
+    Join synthesized lines into one conversation track, encoded once
+    segments: dicts with 'text', 'samples', 'sample_rate' and optionally 'speaker', as yielded by
+    an engine's stream_pcm, so no line has been through a lossy codec before the track is encoded
+    gap: seconds of silence between consecutive lines of the same speaker
+    speaker_gap: seconds of silence when the speaker changes
+    codec: output codec from audio_io.CODECS (default AUDIO_CODEC, since the track is served as is)
+    Returns (audio_data, offsets) where offsets lists each line's text, speaker, start and end in seconds
+    """
+    # Resample every line once before laying out the track
+    lines = [(segment, resample(segment['samples'], segment['sample_rate'], sample_rate)) for segment in segments]
+    if not lines:
+        return None, []
+
+    starts = []
+    position = 0
+    previous_speaker = None
+    for index, (segment, samples) in enumerate(lines):
+        if index:
+            speaker = segment.get('speaker')
+            pause = speaker_gap if speaker != previous_speaker else gap
+            position += int(round(pause * sample_rate))
+        starts.append(position)
+        position += len(samples)
+        previous_speaker = segment.get('speaker')
+
+    # One preallocated buffer; the gaps are already silence
+    track = np.zeros(position, dtype=np.float32)
+    offsets = []
+    for start, (segment, samples) in zip(starts, lines):
+        track[start:start + len(samples)] = samples
+        offsets.append({
+            'text': segment['text'],
+            'speaker': segment.get('speaker'),
+            'start': start / sample_rate,
+            'end': (start + len(samples)) / sample_rate,
+        })
+
+    return encode_audio(track, sample_rate, codec or AUDIO_CODEC), offsets
@@ -1,115 +1,165 @@
+import os
 import torch
 import torchaudio
-import tempfile
-import os
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import soundfile as sf
 import numpy as np
+from tts_models import model_registry
+from audio_cache import audio_cache
+from audio_io import CODECS, PCM_CODEC, encode_audio
+from conversation_parser import parse_conversation
+
+def _load_tacotron2():
+    """Registry loader for the torchaudio Tacotron2 + WaveRNN bundle"""
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    try:
+        bundle = torchaudio.pipelines.TACOTRON2_WAVERNN_CHAR_LJSPEECH
+        processor = bundle.get_text_processor()
+        model = bundle.get_tacotron2().to(device)
+        vocoder = bundle.get_vocoder().to(device)
+        print("Using torchaudio TTS model")
+        return processor, model, vocoder
+    except Exception as e:
+        print(f"torchaudio TTS not available, using fallback: {e}")
+        return None
 
 class FairseqTTS:
     def __init__(self):
         """Initialize Fairseq TTS with a simpler, more reliable approach"""
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model = None
-        self.tokenizer = None
+        self.vocoder = None
+        self.processor = None
+        self.sample_rate = 22050
+        # Output codec from audio_io.CODECS; engines choose what they serve
+        self.codec = PCM_CODEC
         self.initialized = False
         
     def initialize_model(self):
-        """Initialize the TTS model - using a simpler approach than the original"""
+        """Initialize the TTS model from the shared registry (loaded once per process)"""
         try:
-            # Using a simpler TTS model that's more reliable
-            model_name = "facebook/fastspeech2-en-ljspeech"
-            
-            # For now, we'll use a fallback approach since Fairseq can be complex
-            # This will use a simpler TTS solution
             print("Initializing TTS model...")
-            
-            # Alternative: Use torchaudio's TTS models if available
-            try:
-                # Try to use torchaudio's TTS
-                bundle = torchaudio.pipelines.TACOTRON2_WAVERNN_CHAR_LJSPEECH
-                self.model = bundle.get_tacotron2().to(self.device)
-                self.vocoder = bundle.get_wavernn().to(self.device)
-                self.initialized = True
-                print("Using torchaudio TTS model")
-                return True
-            except:
-                print("torchaudio TTS not available, using fallback")
+            bundle = model_registry.get('tacotron2')
+            if bundle is None:
                 return False
+            self.processor, self.model, self.vocoder = bundle
+            self.initialized = True
+            return True
                 
         except Exception as e:
             print(f"Error initializing Fairseq TTS: {e}")
             return False
     
-    def text_to_speech(self, text, output_path=None):
-        """Convert text to speech using Fairseq/torchaudio"""
+    def synthesize_batch(self, texts):
+        """Synthesize several texts in one Tacotron2/WaveRNN forward pass, returning normalized waveforms"""
         if not self.initialized:
             if not self.initialize_model():
-                return None
+                return [None] * len(texts)
         
         try:
-            if hasattr(self, 'model') and hasattr(self, 'vocoder'):
-                # Use torchaudio TTS
-                with torch.no_grad():
-                    # Tokenize text
-                    tokens, lengths = self.model.tokenizer(text)
-                    tokens = tokens.to(self.device)
-                    
-                    # Generate mel spectrogram
-                    mel_outputs, mel_output_lengths, alignments = self.model.infer(tokens, lengths)
-                    
-                    # Generate waveform
-                    waveform, lengths = self.vocoder(mel_outputs, mel_output_lengths)
-                    
-                    # Convert to numpy and normalize
-                    audio = waveform[0].cpu().numpy()
-                    audio = audio / np.max(np.abs(audio))  # Normalize
-                    
-                    # Save to temporary file if no output path specified
-                    if output_path is None:
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as fp:
-                            output_path = fp.name
-                    
-                    # Save audio
-                    sf.write(output_path, audio, 22050)
-                    
-                    # Read back as bytes for Streamlit
-                    with open(output_path, 'rb') as f:
-                        audio_data = f.read()
-                    
-                    # Clean up temp file
-                    if output_path.startswith('/tmp'):
-                        os.unlink(output_path)
-                    
-                    return audio_data
-            
-            else:
-                print("TTS model not properly initialized")
-                return None
+            with torch.no_grad():
+                # Tokenize and pad all texts together
+                tokens, lengths = self.processor(texts)
+                
+                # Tacotron2's encoder packs sequences, so the batch must be sorted longest first
+                order = torch.argsort(lengths, descending=True)
+                tokens = tokens[order].to(self.device)
+                lengths = lengths[order].to(self.device)
                 
+                # Generate mel spectrograms and waveforms for the whole batch
+                mel_outputs, mel_output_lengths, alignments = self.model.infer(tokens, lengths)
+                waveforms, wave_lengths = self.vocoder(mel_outputs, mel_output_lengths)
+                
+                # Trim padding and restore the original line order
+                results = [None] * len(texts)
+                for position, index in enumerate(order.tolist()):
+                    audio = waveforms[position, :wave_lengths[position]].cpu().numpy()
+                    peak = np.max(np.abs(audio))
+                    if peak > 0:
+                        audio = audio / peak  # Normalize
+                    results[index] = audio
+                return results
+                
+        except Exception as e:
+            print(f"Error in batched text-to-speech: {e}")
+            return [None] * len(texts)
+    
+    def _encode(self, audio, output_path=None, codec=None):
+        """Encode a waveform in memory (default codec self.codec), also saving it if output_path is given"""
+        codec = codec or self.codec
+        if output_path is not None:
+            # A file keeps the format its extension asks for
+            extension = os.path.splitext(output_path)[1].lstrip('.').lower()
+            codec = extension if extension in CODECS else codec
+        audio_data = encode_audio(audio, self.sample_rate, codec)
+        if output_path is not None:
+            with open(output_path, 'wb') as f:
+                f.write(audio_data)
+        return audio_data
+    
+    def text_to_speech(self, text, output_path=None):
+        """Convert text to speech using Fairseq/torchaudio"""
+        if output_path is None:
+            audio_data = audio_cache.get('tacotron2', 'ljspeech', text, self.sample_rate, self.codec)
+            if audio_data is not None:
+                return audio_data
+        
+        audio = self.synthesize_batch([text])[0]
+        if audio is None:
+            return None
+        
+        try:
+            audio_data = self._encode(audio, output_path)
         except Exception as e:
             print(f"Error in text-to-speech: {e}")
             return None
+        
+        if output_path is None:
+            audio_cache.put('tacotron2', 'ljspeech', text, self.sample_rate, audio_data, self.codec)
+        return audio_data
     
-    def conversation_to_speech(self, conversation_lines):
-        """Convert a conversation to speech using Fairseq"""
-        audio_segments = []
+    def text_to_speech_batch(self, texts, codec=None):
+        """Convert several texts to encoded audio (default codec self.codec), synthesizing only cache misses in one batch"""
+        codec = codec or self.codec
+        results = [audio_cache.get('tacotron2', 'ljspeech', text, self.sample_rate, codec) for text in texts]
+        pending = [i for i, audio_data in enumerate(results) if audio_data is None]
+        if not pending:
+            return results
         
-        for line in conversation_lines:
-            if line.strip():
-                # Extract just the text part (remove speaker labels)
-                text = line.strip()
-                if ': ' in text:
-                    text = text.split(': ', 1)[1]
-                
-                audio_data = self.text_to_speech(text)
-                if audio_data:
-                    audio_segments.append({
-                        'text': text,
-                        'audio': audio_data
-                    })
+        waveforms = self.synthesize_batch([texts[i] for i in pending])
+        for i, audio in zip(pending, waveforms):
+            if audio is None:
+                continue
+            try:
+                results[i] = self._encode(audio, codec=codec)
+            except Exception as e:
+                print(f"Error in text-to-speech: {e}")
+                continue
+            audio_cache.put('tacotron2', 'ljspeech', texts[i], self.sample_rate, results[i], codec)
+        
+        return results
+    
+    def iter_conversation_speech(self, conversation_lines, batch_size=8, first_batch_size=1, codec=None):
+        """Yield audio segments in order as each batch finishes, starting with a small first batch"""
+        # Accepts raw strings or Lines already parsed by conversation_parser
+        lines = parse_conversation(conversation_lines)
+        texts = [line.text for line in lines]
         
-        return audio_segments
+        start = 0
+        size = max(1, first_batch_size)
+        while start < len(texts):
+            chunk = texts[start:start + size]
+            for line, audio_data in zip(lines[start:start + size], self.text_to_speech_batch(chunk, codec)):
+                if audio_data:
+                    yield {
+                        'text': line.text,
+                        'audio': audio_data,
+                        'speaker': line.speaker
+                    }
+            start += size
+            size = max(1, batch_size)
+    
+    def conversation_to_speech(self, conversation_lines, batch_size=8):
+        """Convert a conversation to speech using Fairseq, synthesizing batch_size lines per forward pass"""
+        return list(self.iter_conversation_speech(conversation_lines, batch_size, first_batch_size=batch_size))
 
 # Global instance
 fairseq_tts = FairseqTTS() 
\ No newline at end of file
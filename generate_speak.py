@@ -1,24 +1,32 @@
 import torch
 import argparse
-import tempfile
-import os
-import soundfile as sf
 import nltk
 from fairseq.checkpoint_utils import load_model_ensemble_and_task_from_hf_hub
+from fairseq.data.data_utils import collate_tokens
 from fairseq.models.text_to_speech.hub_interface import TTSHubInterface
-
-# Download required NLTK data
-try:
-    nltk.download('averaged_perceptron_tagger_eng', quiet=True)
-except:
-    pass
+from tts_models import model_registry
+from audio_cache import audio_cache
+from audio_io import PCM_CODEC, encode_audio
+from conversation_parser import parse_conversation
 
 # Add safe globals for torch serialization
 torch.serialization.add_safe_globals([argparse.Namespace])
 
+def ensure_nltk_data():
+    """Download the tagger used by the phonemizer if it isn't installed yet"""
+    try:
+        nltk.data.find('taggers/averaged_perceptron_tagger_eng')
+    except LookupError:
+        try:
+            nltk.download('averaged_perceptron_tagger_eng', quiet=True)
+        except:
+            pass
+
 def initialize_fairseq_tts():
     """Initialize Fairseq TTS model"""
     try:
+        # Checked here rather than at import so importing this module stays cheap
+        ensure_nltk_data()
         print("Loading Fairseq TTS model...")
         models, cfg, task = load_model_ensemble_and_task_from_hf_hub(
             "facebook/fastspeech2-en-ljspeech",
@@ -40,12 +48,32 @@ def initialize_fairseq_tts():
         print(f"Error initializing Fairseq TTS: {e}")
         return None, None, None
 
-def text_to_speech_fairseq(text, models, task, generator):
-    """Convert text to speech using Fairseq"""
+def _load_fastspeech2():
+    """Registry loader for the FastSpeech2 + HiFiGAN bundle"""
+    models, task, generator = initialize_fairseq_tts()
+    if models is None:
+        return None
+    return models, task, generator
+
+def get_fairseq_tts():
+    """Return the shared (models, task, generator), loading them once per process"""
+    bundle = model_registry.get('fastspeech2')
+    if bundle is None:
+        return None, None, None
+    return bundle
+
+def text_to_speech_fairseq(text, models, task, generator, codec=None):
+    """Convert text to speech using Fairseq, encoded with codec (default lossless PCM_CODEC)"""
+    codec = codec or PCM_CODEC
     try:
         if models is None or task is None or generator is None:
             print("TTS model not properly initialized")
             return None
+        
+        # Skip inference for lines we've already synthesized
+        audio_data = audio_cache.get('fastspeech2', 'ljspeech', text, task.sr, codec)
+        if audio_data is not None:
+            return audio_data
             
         # Get model input
         sample = TTSHubInterface.get_model_input(task, text)
@@ -53,52 +81,100 @@ def text_to_speech_fairseq(text, models, task, generator):
         # Generate prediction
         wav, rate = TTSHubInterface.get_prediction(task, models[0], generator, sample)
         
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as fp:
-            temp_filename = fp.name
+        audio_data = encode_audio(wav, rate, codec)
+        audio_cache.put('fastspeech2', 'ljspeech', text, rate, audio_data, codec)
+        return audio_data
         
-        # Save audio
-        sf.write(temp_filename, wav, rate)
+    except Exception as e:
+        print(f"Error in text-to-speech: {e}")
+        return None
+
+def text_to_speech_fairseq_batch(texts, models, task, generator, codec=None):
+    """Convert several texts to speech in one FastSpeech2 forward pass"""
+    codec = codec or PCM_CODEC
+    if models is None or task is None or generator is None:
+        print("TTS model not properly initialized")
+        return [None] * len(texts)
+    
+    # Only lines missing from the cache go through the model
+    results = [audio_cache.get('fastspeech2', 'ljspeech', text, task.sr, codec) for text in texts]
+    pending = [i for i, audio_data in enumerate(results) if audio_data is None]
+    if not pending:
+        return results
+    
+    try:
+        # Phonemize each line, then pad them into a single batch
+        samples = [TTSHubInterface.get_model_input(task, texts[i]) for i in pending]
+        src_tokens = collate_tokens(
+            [s['net_input']['src_tokens'][0] for s in samples],
+            task.src_dict.pad()
+        )
+        src_lengths = torch.cat([s['net_input']['src_lengths'] for s in samples])
+        speakers = [s['speaker'] for s in samples]
+        speaker = None if speakers[0] is None else torch.cat(speakers)
         
-        # Read back as bytes for Streamlit
-        with open(temp_filename, 'rb') as f:
-            audio_data = f.read()
+        batch = {
+            'net_input': {
+                'src_tokens': src_tokens,
+                'src_lengths': src_lengths,
+                'prev_output_tokens': None,
+            },
+            'target_lengths': None,
+            'speaker': speaker,
+        }
         
-        # Clean up temp file
-        os.unlink(temp_filename)
+        # The generator trims each prediction to its own length
+        with torch.no_grad():
+            predictions = generator.generate(models[0], batch)
         
-        return audio_data
+        for i, prediction in zip(pending, predictions):
+            audio_data = encode_audio(prediction['waveform'].cpu().numpy(), task.sr, codec)
+            audio_cache.put('fastspeech2', 'ljspeech', texts[i], task.sr, audio_data, codec)
+            results[i] = audio_data
+        return results
         
     except Exception as e:
-        print(f"Error in text-to-speech: {e}")
-        return None
+        # Fall back to line-by-line synthesis so one bad line doesn't lose the batch
+        print(f"Error in batched text-to-speech, falling back to single lines: {e}")
+        for i in pending:
+            results[i] = text_to_speech_fairseq(texts[i], models, task, generator, codec)
+        return results
 
-def conversation_to_speech_fairseq(conversation_lines):
-    """Convert conversation to speech using Fairseq"""
-    # Initialize model
-    models, task, generator = initialize_fairseq_tts()
+def iter_conversation_speech_fairseq(conversation_lines, batch_size=8, first_batch_size=1, codec=None):
+    """
+    Yield audio segments for a conversation in order as each batch finishes
+    first_batch_size: size of the first batch, kept small so the first line is ready quickly
+    codec: output codec from audio_io.CODECS (default PCM_CODEC)
+    """
+    # Reuse the process-wide model instead of reloading it per call
+    models, task, generator = get_fairseq_tts()
     
     if models is None:
         print("Failed to initialize Fairseq TTS")
-        return []
+        return
     
-    audio_segments = []
+    # Accepts raw strings or Lines already parsed by conversation_parser
+    lines = parse_conversation(conversation_lines)
+    texts = [line.text for line in lines]
     
-    for line in conversation_lines:
-        if line.strip():
-            # Extract just the text part (remove speaker labels)
-            text = line.strip()
-            if ': ' in text:
-                text = text.split(': ', 1)[1]
-            
-            audio_data = text_to_speech_fairseq(text, models, task, generator)
+    start = 0
+    size = max(1, first_batch_size)
+    while start < len(texts):
+        chunk = texts[start:start + size]
+        audio_batch = text_to_speech_fairseq_batch(chunk, models, task, generator, codec)
+        for line, audio_data in zip(lines[start:start + size], audio_batch):
             if audio_data:
-                audio_segments.append({
-                    'text': text,
-                    'audio': audio_data
-                })
-    
-    return audio_segments
+                yield {
+                    'text': line.text,
+                    'audio': audio_data,
+                    'speaker': line.speaker
+                }
+        start += size
+        size = max(1, batch_size)
+
+def conversation_to_speech_fairseq(conversation_lines, batch_size=8, codec=None):
+    """Convert conversation to speech using Fairseq, synthesizing batch_size lines per forward pass"""
+    return list(iter_conversation_speech_fairseq(conversation_lines, batch_size, first_batch_size=batch_size, codec=codec))
 
 # Test function
 if __name__ == "__main__":
@@ -109,7 +185,7 @@ if __name__ == "__main__":
     
     if models is not None:
         # Test single text
-        audio_data = text_to_speech_fairseq(text, models, task, generator)
+        audio_data = text_to_speech_fairseq(text, models, task, generator, codec='wav')
         if audio_data:
             print("TTS test successful!")
             # Save test file
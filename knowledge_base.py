@@ -1,3 +1,304 @@
-import chromadb
+import os
+import re
+import json
+import zlib
+import hashlib
+import tempfile
+import threading
+import numpy as np
 
+# Dimension of the hashing fallback embedding
+HASH_DIM = 512
 
+
+def _features(text):
+    """Word unigrams, bigrams and in-word character trigrams"""
+    words = re.findall(r'\w+', text.lower())
+    features = list(words)
+    features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"#{word}#"
+        features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    return features
+
+
+def hash_embed(texts, dim=HASH_DIM):
+    """Signed feature-hashing embedding; needs no model download and is stable across processes"""
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for feature in _features(text):
+            h = zlib.crc32(feature.encode('utf-8'))
+            vectors[row, h % dim] += 1.0 if h & 0x80000000 else -1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class SentenceTransformerEmbedder:
+    def __init__(self, model_name):
+        """Local sentence-transformers model, used when KB_EMBEDDING_MODEL is set"""
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device='cpu')
+
+    def __call__(self, texts):
+        vectors = self.model.encode(texts, batch_size=64, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def _default_embedder():
+    model_name = os.getenv('KB_EMBEDDING_MODEL')
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except Exception as e:
+            print(f"Error loading embedding model '{model_name}', using hashing fallback: {e}")
+    return hash_embed
+
+
+class ConversationLibrary:
+    def __init__(self, path=None, threshold=None, embedder=None, flush_every=100):
+        """Semantic store of generated conversations keyed by the requirement that produced them"""
+        self.path = path or os.getenv('KB_PATH', '.conversation_library')
+        self.threshold = float(threshold if threshold is not None else os.getenv('KB_SIMILARITY_THRESHOLD', 0.9))
+        self.embedder = embedder
+        self.flush_every = flush_every
+        self._records = []
+        self._vectors = None
+        self._size = 0
+        # Running hash of the stored requirements, saved with the vectors to check they still line up
+        self._digest = hashlib.sha256()
+        # Bytes of the JSONL file already read; anything after it was appended by another process
+        self._offset = 0
+        self._unflushed = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _ensure_loaded(self):
+        # Deferred until first use so importing the module doesn't read the whole library
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    if self.embedder is None:
+                        self.embedder = _default_embedder()
+                    self._load()
+                    self._loaded = True
+
+    @property
+    def _records_path(self):
+        return os.path.join(self.path, 'conversations.jsonl')
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.path, 'index.npz')
+
+    def __len__(self):
+        self._ensure_loaded()
+        with self._lock:
+            self._refresh()
+            return self._size
+
+    def _read_records(self):
+        """Complete records appended to the JSONL file since the last read; called with the lock held"""
+        try:
+            with open(self._records_path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        except OSError as e:
+            print(f"Error loading conversation library: {e}")
+            return []
+        # A line without its newline is still being written; leave it for the next read
+        end = data.rfind(b'\n') + 1
+        self._offset += end
+        records = []
+        for line in data[:end].splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A line torn by a crash mid-append
+                continue
+        return records
+
+    def _load(self):
+        """Read records, reuse saved vectors that match them and embed the rest"""
+        self._records = self._read_records()
+        if not self._records:
+            return
+
+        vectors = None
+        try:
+            with np.load(self._index_path) as index:
+                vectors = index['vectors']
+                saved_digest = bytes(index['digest'])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        # The saved vectors are only valid for exactly the records they were computed from, in order
+        if vectors is not None and len(vectors) > len(self._records):
+            vectors = None
+        for record in self._records[:0 if vectors is None else len(vectors)]:
+            self._update_digest(record)
+        if vectors is not None and self._digest.digest() != saved_digest:
+            vectors = None
+            self._digest = hashlib.sha256()
+        if vectors is not None and self._records:
+            # Saved vectors from a different embedder can't be compared with new queries
+            probe = self.embedder([self._records[0]['requirement']])
+            if vectors.shape[1] != probe.shape[1]:
+                vectors = None
+                self._digest = hashlib.sha256()
+
+        saved = 0 if vectors is None else len(vectors)
+        missing = self._records[saved:]
+        if missing:
+            embedded = self.embedder([r['requirement'] for r in missing])
+            vectors = embedded if vectors is None else np.vstack([vectors, embedded])
+            for record in missing:
+                self._update_digest(record)
+            # Save now so the next start doesn't embed them again
+            self._vectors = vectors
+            self._size = len(self._records)
+            self._flush()
+        self._vectors = vectors
+        self._size = len(self._records)
+
+    def _update_digest(self, record):
+        self._digest.update(record['requirement'].encode('utf-8') + b'\x00')
+
+    def _append_vectors(self, vectors):
+        # Grow capacity geometrically so inserts stay amortized O(1)
+        needed = self._size + len(vectors)
+        if self._vectors is None or needed > len(self._vectors):
+            capacity = max(needed, 2 * (0 if self._vectors is None else len(self._vectors)), 1024)
+            grown = np.zeros((capacity, vectors.shape[1]), dtype=np.float32)
+            if self._vectors is not None:
+                grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+        self._vectors[self._size:needed] = vectors
+        self._size = needed
+
+    def add(self, requirement, conversation):
+        """Store one generated conversation"""
+        self.add_many([(requirement, conversation)])
+
+    def add_many(self, pairs):
+        """Store many (requirement, conversation) pairs with a single embedding call"""
+        pairs = [(r, c) for r, c in pairs if r and r.strip() and c]
+        if not pairs:
+            return
+        self._ensure_loaded()
+        vectors = self.embedder([r for r, _ in pairs])
+        records = [{'requirement': r, 'conversation': c} for r, c in pairs]
+
+        with self._lock:
+            try:
+                os.makedirs(self.path, exist_ok=True)
+                with open(self._records_path, 'a', encoding='utf-8') as f:
+                    # One write, so records from another process's appends don't interleave with ours
+                    f.write(''.join(json.dumps(record) + '\n' for record in records))
+            except OSError as e:
+                print(f"Error saving conversation library: {e}")
+                # Still usable by this process until it restarts
+                self._extend(records, vectors)
+                return
+            # Read back from the file, so records keep the file's order even with several writers
+            self._refresh(known={r['requirement']: vector for r, vector in zip(records, vectors)})
+
+    def _extend(self, records, vectors):
+        # Called with the lock held
+        self._records.extend(records)
+        for record in records:
+            self._update_digest(record)
+        self._append_vectors(vectors)
+        self._unflushed += len(records)
+        if self._unflushed >= self.flush_every:
+            self._flush()
+
+    def _refresh(self, known=None):
+        """
+        Pick up records appended since the last read, including other processes' (e.g. API workers)
+        known: {requirement: vector} for records this process just embedded; called with the lock held
+        """
+        try:
+            size = os.path.getsize(self._records_path)
+        except OSError:
+            return
+        if size < self._offset:
+            # The file was replaced or truncated behind our back, so start over from it
+            self._records, self._vectors, self._size = [], None, 0
+            self._digest = hashlib.sha256()
+            self._offset = self._unflushed = 0
+            self._load()
+            return
+        if size == self._offset:
+            return
+        records = self._read_records()
+        if not records:
+            return
+        known = known or {}
+        missing = [r['requirement'] for r in records if r['requirement'] not in known]
+        embedded = iter(self.embedder(missing) if missing else [])
+        vectors = np.stack([
+            known[r['requirement']] if r['requirement'] in known else next(embedded) for r in records
+        ])
+        self._extend(records, vectors)
+
+    def save(self):
+        """Write the vector index so the next load doesn't re-embed"""
+        self._ensure_loaded()
+        with self._lock:
+            if self._unflushed:
+                self._flush()
+
+    def _flush(self):
+        # Called with the lock held; the JSONL file stays the source of truth and the index is
+        # stored with a hash of the requirements it covers, so a stale index is rebuilt on load
+        temp_path = None
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.path, prefix='index.', suffix='.tmp', delete=False) as f:
+                temp_path = f.name
+                np.savez(
+                    f, vectors=self._vectors[:self._size],
+                    digest=np.frombuffer(self._digest.digest(), dtype=np.uint8)
+                )
+            os.replace(temp_path, self._index_path)
+            self._unflushed = 0
+        except OSError as e:
+            print(f"Error saving conversation vectors: {e}")
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def search(self, requirement, k=5):
+        """Return up to k (similarity, requirement, conversation) tuples, best first"""
+        self._ensure_loaded()
+        if not requirement or not requirement.strip():
+            return []
+        query = self.embedder([requirement])[0]
+        with self._lock:
+            self._refresh()
+            if not self._size:
+                return []
+            scores = self._vectors[:self._size] @ query
+            k = min(k, self._size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (float(scores[i]), self._records[i]['requirement'], self._records[i]['conversation'])
+                for i in top
+            ]
+
+    def lookup(self, requirement):
+        """Return (conversation, similarity) for the closest stored requirement above the threshold"""
+        results = self.search(requirement, k=1)
+        if not results:
+            return None
+        similarity, _, conversation = results[0]
+        if similarity < self.threshold:
+            return None
+        return conversation, similarity
+
+
+# Global instance
+knowledge_base = ConversationLibrary()
@@ -0,0 +1,77 @@
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PracticeJobs:
+    def __init__(self, max_workers=None, ttl=600):
+        """Background recording/grading jobs so page reruns never block on the microphone"""
+        if max_workers is None:
+            max_workers = int(os.getenv('PRACTICE_WORKERS', 4))
+        # A bounded FIFO pool: jobs from all sessions queue fairly instead of piling up threads
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='practice')
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.ttl = ttl
+
+    def submit(self, expected_text, backend=None, practice_line=None):
+        """
+        Start recording and grading a line; returns a job ID to poll
+        practice_line: callable(expected_text, backend) doing the work, default SpeechPractice.practice_line
+        """
+        if practice_line is None:
+            # speech_recognition is only imported once someone actually practices
+            from speech_practice import speech_practice
+            practice_line = speech_practice.practice_line
+        self._prune()
+        job_id = uuid.uuid4().hex
+        future = self._executor.submit(practice_line, expected_text, backend)
+        with self._lock:
+            self._jobs[job_id] = {'future': future, 'created': time.time()}
+        return job_id
+
+    def status(self, job_id):
+        """'queued', 'running', 'done' or 'unknown'"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return 'unknown'
+        future = job['future']
+        if future.done():
+            return 'done'
+        return 'running' if future.running() else 'queued'
+
+    def result(self, job_id):
+        """Return and forget a finished job's result; None while it is still running"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job['future'].done():
+                return None
+            del self._jobs[job_id]
+        try:
+            return job['future'].result()
+        except Exception as e:
+            return {
+                'success': False,
+                'feedback': [f"❌ Error during practice: {str(e)}"]
+            }
+
+    def cancel(self, job_id):
+        """Drop a job; it is cancelled if it hasn't started yet"""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is not None:
+            job['future'].cancel()
+
+    def _prune(self):
+        # Forget results nobody collected, e.g. from closed browser tabs
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for job_id in [j for j, job in self._jobs.items() if job['future'].done() and job['created'] < cutoff]:
+                del self._jobs[job_id]
+
+
+# Global instance
+practice_jobs = PracticeJobs()
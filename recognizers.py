@@ -0,0 +1,139 @@
+import os
+import numpy as np
+import speech_recognition as sr
+from tts_models import model_registry
+
+# Clips share a wav2vec2 forward pass when the shortest needs at most this much padding, as a
+# fraction of its length; 0 batches only clips of exactly the same length
+WAV2VEC2_BUCKET_TOLERANCE = float(os.getenv('WAV2VEC2_BUCKET_TOLERANCE', 0.05))
+
+
+class GoogleRecognizer:
+    name = 'google'
+
+    def __init__(self, recognizer):
+        """Google Web Speech API via speech_recognition (needs network access)"""
+        self.recognizer = recognizer
+
+    def warm_up(self):
+        return True
+
+    def transcribe(self, audio):
+        try:
+            return self.recognizer.recognize_google(audio)
+        except sr.UnknownValueError:
+            return None
+        except sr.RequestError as e:
+            print(f"Could not request results: {e}")
+            return None
+
+    def transcribe_batch(self, audios):
+        # The web API takes one recording per request
+        return [self.transcribe(audio) for audio in audios]
+
+
+def _load_wav2vec2():
+    """Registry loader for torchaudio's wav2vec2 CTC model"""
+    import torch
+    import torchaudio
+    bundle = torchaudio.pipelines.WAV2VEC2_ASR_BASE_960H
+    model = bundle.get_model().to(torch.device("cpu")).eval()
+    return model, bundle.get_labels(), int(bundle.sample_rate)
+
+
+class Wav2Vec2Recognizer:
+    name = 'wav2vec2'
+
+    def __init__(self, recognizer=None):
+        """Offline CPU recognition with wav2vec2; the model is loaded once per process"""
+
+    def warm_up(self):
+        return model_registry.get('wav2vec2') is not None
+
+    @staticmethod
+    def _decode(emission, labels):
+        """Greedy CTC decoding: collapse repeats, drop blanks, '|' separates words"""
+        indices = emission.argmax(dim=-1).tolist()
+        tokens = []
+        previous = None
+        for index in indices:
+            if index != previous and index != 0:
+                tokens.append(labels[index])
+            previous = index
+        return ''.join(tokens).replace('|', ' ').strip()
+
+    @staticmethod
+    def _buckets(waveforms, tolerance):
+        """Indices of non-empty clips grouped by length; no group pads its shortest clip by more than tolerance"""
+        order = sorted((i for i, waveform in enumerate(waveforms) if len(waveform)), key=lambda i: len(waveforms[i]))
+        buckets = []
+        for i in order:
+            if buckets and len(waveforms[i]) <= len(waveforms[buckets[-1][0]]) * (1 + tolerance):
+                buckets[-1].append(i)
+            else:
+                buckets.append([i])
+        return buckets
+
+    def transcribe_samples(self, waveforms, tolerance=None):
+        """
+        Transcribe float32 mono waveforms at the model's sample rate
+        Clips of similar length (see WAV2VEC2_BUCKET_TOLERANCE) are zero-padded to a common length
+        and share a forward pass; lengths mask the padding in the transformer and in decoding.
+        The base model's feature extractor group-normalizes over the whole input, padding
+        included, so a padded clip's transcript can differ slightly from the one it gets alone;
+        the tolerance keeps that padding to a few percent of the clip
+        """
+        import torch
+        loaded = model_registry.get('wav2vec2')
+        if loaded is None or not waveforms:
+            return [None] * len(waveforms)
+        model, labels, _ = loaded
+        if tolerance is None:
+            tolerance = WAV2VEC2_BUCKET_TOLERANCE
+
+        texts = [None] * len(waveforms)
+        for indices in self._buckets(waveforms, tolerance):
+            lengths = [len(waveforms[i]) for i in indices]
+            batch = np.zeros((len(indices), max(lengths)), dtype=np.float32)
+            for row, i in enumerate(indices):
+                batch[row, :lengths[row]] = waveforms[i]
+            with torch.inference_mode():
+                emissions, frames = model(torch.from_numpy(batch), torch.tensor(lengths))
+            for row, i in enumerate(indices):
+                # Frames past a clip's own length only cover padding
+                emission = emissions[row] if frames is None else emissions[row, :int(frames[row])]
+                texts[i] = self._decode(emission, labels) or None
+        return texts
+
+    @property
+    def sample_rate(self):
+        loaded = model_registry.get('wav2vec2')
+        return loaded[2] if loaded else 16000
+
+    def _waveform(self, audio):
+        # speech_recognition resamples and converts to 16-bit for us
+        raw = audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2)
+        return np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+
+    def transcribe(self, audio):
+        return self.transcribe_batch([audio])[0]
+
+    def transcribe_batch(self, audios):
+        try:
+            return self.transcribe_samples([self._waveform(audio) for audio in audios])
+        except Exception as e:
+            print(f"Error in local speech recognition: {e}")
+            return [None] * len(audios)
+
+
+RECOGNIZERS = {
+    'google': GoogleRecognizer,
+    'wav2vec2': Wav2Vec2Recognizer,
+}
+
+
+def create_recognizer(name, recognizer):
+    """Build a recognition backend by name"""
+    if name not in RECOGNIZERS:
+        raise ValueError(f"Unknown speech recognizer '{name}', choose from {', '.join(RECOGNIZERS)}")
+    return RECOGNIZERS[name](recognizer)
@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import threading
+from audio_store import audio_store
+
+# Marks a session entry whose value was moved to the shared store
+DEMOTED = '__demoted__'
+
+
+def estimate_size(value, _seen=None):
+    """Approximate deep size in bytes of a session value: containers, strings, bytes and slotted objects"""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _seen) for item in value)
+    elif hasattr(value, '__slots__'):
+        size += sum(estimate_size(getattr(value, name, None), _seen) for name in value.__slots__)
+    return size
+
+
+def is_demoted(value):
+    return isinstance(value, dict) and DEMOTED in value
+
+
+class SessionStore:
+    def __init__(self, max_bytes=None, idle_ttl=3600, log_every=60, store=None, stats_dir=None):
+        """
+        Per-session byte budget for Streamlit session state, with process-wide accounting
+        A session over budget has its oldest entries demoted: their values move to the shared
+        on-disk store and the session keeps only a reference, which restore() follows
+        stats_dir: directory where each process publishes its accounting for collect_reports()
+        """
+        if max_bytes is None:
+            max_bytes = int(os.getenv('SESSION_MAX_BYTES', 2 * 1024 * 1024))
+        if stats_dir is None:
+            stats_dir = os.getenv('SESSION_STATS_DIR', '.session_stats')
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.log_every = log_every
+        self.store = store if store is not None else audio_store
+        self.stats_dir = stats_dir
+        self._usage = {}  # session_id -> (bytes, last_seen)
+        self._lock = threading.Lock()
+        self._last_log = 0.0
+
+    def enforce(self, session_id, state, demotable=()):
+        """
+        Account a session's state and demote its oldest entries until it fits the budget
+        demotable: keys of dict or list values whose entries may move to the shared store, tried
+        in order; their entries must be JSON-serializable
+        Returns the session's size in bytes after demotion
+        """
+        total = sum(estimate_size(state[key]) for key in list(state.keys()))
+
+        demoted = 0
+        for key in demotable:
+            value = state.get(key)
+            if not value:
+                continue
+            # Dicts keep insertion order and lists are appended to, so the first entry is the oldest
+            positions = list(value) if isinstance(value, dict) else range(len(value))
+            for position in positions:
+                if total <= self.max_bytes:
+                    break
+                entry = value[position]
+                if is_demoted(entry):
+                    continue
+                try:
+                    reference = {DEMOTED: self.store.put_json(entry)}
+                except (OSError, TypeError, ValueError) as e:
+                    print(f"Could not demote session entry: {e}")
+                    continue
+                value[position] = reference
+                freed = estimate_size(entry) - estimate_size(reference)
+                total -= freed
+                demoted += freed
+        if demoted:
+            print(f"Session {session_id[:8]} over budget, moved {demoted / 1024:.1f} KB to the shared store")
+
+        with self._lock:
+            self._usage[session_id] = (total, time.time())
+        self._maybe_log()
+        return total
+
+    def restore(self, value):
+        """The value itself, or for a demoted entry the value read back from the shared store (None if pruned)"""
+        if not is_demoted(value):
+            return value
+        return self.store.get_json(value[DEMOTED])
+
+    def _prune(self):
+        # Forget sessions that stopped rerunning, e.g. closed browser tabs
+        cutoff = time.time() - self.idle_ttl
+        with self._lock:
+            for session_id in [s for s, (_, seen) in self._usage.items() if seen < cutoff]:
+                del self._usage[session_id]
+
+    def report(self):
+        """Per-session and total bytes held in session state by this process"""
+        self._prune()
+        with self._lock:
+            per_session = {session_id: size for session_id, (size, _) in self._usage.items()}
+        return {
+            'sessions': len(per_session),
+            'total_bytes': sum(per_session.values()),
+            'max_session_bytes': max(per_session.values(), default=0),
+            'budget_bytes': self.max_bytes,
+            'per_session': per_session,
+        }
+
+    def _stats_path(self):
+        return os.path.join(self.stats_dir, f"{socket.gethostname()}-{os.getpid()}.json")
+
+    def publish(self, report=None):
+        """Write this process's totals to stats_dir, where other processes (e.g. the API) collect them"""
+        report = report or self.report()
+        summary = {key: value for key, value in report.items() if key != 'per_session'}
+        summary['updated'] = time.time()
+        temp_path = None
+        try:
+            os.makedirs(self.stats_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=self.stats_dir, suffix='.tmp', delete=False) as f:
+                temp_path = f.name
+                json.dump(summary, f)
+            os.replace(temp_path, self._stats_path())
+        except OSError as e:
+            print(f"Error publishing session memory: {e}")
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _maybe_log(self):
+        now = time.time()
+        with self._lock:
+            if now - self._last_log < self.log_every:
+                return
+            self._last_log = now
+        report = self.report()
+        self.publish(report)
+        print(
+            f"Session memory: {report['sessions']} sessions, "
+            f"{report['total_bytes'] / 1024 / 1024:.2f} MB total, "
+            f"largest {report['max_session_bytes'] / 1024 / 1024:.2f} MB "
+            f"(budget {report['budget_bytes'] / 1024 / 1024:.2f} MB)"
+        )
+
+
+def collect_reports(stats_dir=None, max_age=None):
+    """
+    Session memory published by every app process sharing stats_dir
+    Reports older than max_age seconds (default 10 minutes) are from processes that stopped and are removed
+    """
+    if stats_dir is None:
+        stats_dir = os.getenv('SESSION_STATS_DIR', '.session_stats')
+    if max_age is None:
+        max_age = 600
+    now = time.time()
+    processes = {}
+    try:
+        names = sorted(os.listdir(stats_dir))
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(stats_dir, name)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if now - report.get('updated', 0) > max_age:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        processes[name[:-len('.json')]] = report
+
+    return {
+        'processes': len(processes),
+        'sessions': sum(report['sessions'] for report in processes.values()),
+        'total_bytes': sum(report['total_bytes'] for report in processes.values()),
+        'max_session_bytes': max((report['max_session_bytes'] for report in processes.values()), default=0),
+        'per_process': processes,
+    }
+
+
+# Global instance
+session_store = SessionStore()
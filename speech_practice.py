@@ -1,20 +1,41 @@
 import speech_recognition as sr
 import tempfile
 import os
+import threading
 import base64
-from difflib import SequenceMatcher
-import re
+from alignment import align, edit_distance, edit_distance_batch
+from recognizers import create_recognizer
+from voice_activity import analyze_voice_activity
+from conversation_parser import Line, clean_text
 
 class SpeechPractice:
-    def __init__(self):
+    def __init__(self, backend=None):
         self.recognizer = sr.Recognizer()
         self.recognizer.energy_threshold = 4000
         self.recognizer.dynamic_energy_threshold = True
+        # Recognition backend: 'google' (network) or 'wav2vec2' (local CPU)
+        self.default_backend = backend or os.getenv('SPEECH_RECOGNIZER', 'google')
+        self.backends = {}
+        self._backends_lock = threading.Lock()
+        # Practice jobs run on several threads but share one microphone and one recognizer, whose
+        # energy threshold changes while recording, so recordings run one at a time
+        self._microphone_lock = threading.Lock()
+    
+    def get_backend(self, name=None):
+        """Return the recognition backend, creating it on first use"""
+        name = name or self.default_backend
+        backend = self.backends.get(name)
+        if backend is None:
+            with self._backends_lock:
+                backend = self.backends.get(name)
+                if backend is None:
+                    backend = self.backends[name] = create_recognizer(name, self.recognizer)
+        return backend
         
     def record_speech(self, timeout=5, phrase_time_limit=10):
         """Record user speech from microphone"""
         try:
-            with sr.Microphone() as source:
+            with self._microphone_lock, sr.Microphone() as source:
                 # Adjust for ambient noise
                 self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
                 
@@ -31,16 +52,26 @@ class SpeechPractice:
             print(f"Error recording speech: {e}")
             return None
     
-    def speech_to_text(self, audio):
-        """Convert speech to text using Google Speech Recognition"""
-        try:
-            text = self.recognizer.recognize_google(audio)
-            return text.lower().strip()
-        except sr.UnknownValueError:
-            return None
-        except sr.RequestError as e:
-            print(f"Could not request results: {e}")
+    def speech_to_text(self, audio, backend=None):
+        """Convert speech to text with the selected recognition backend"""
+        text = self.get_backend(backend).transcribe(audio)
+        if not text:
             return None
+        return text.lower().strip()
+    
+    @staticmethod
+    def _clean(text):
+        # Lines from conversation_parser carry their cleaned text already
+        if isinstance(text, Line):
+            return text.clean
+        return clean_text(text)
+    
+    @staticmethod
+    def _similarity(distance, user_length, expected_length):
+        longest = max(user_length, expected_length)
+        if longest == 0:
+            return 0
+        return round((1 - distance / longest) * 100, 1)
     
     def calculate_pronunciation_score(self, user_text, expected_text):
         """Calculate pronunciation accuracy score (0-100)"""
@@ -48,20 +79,55 @@ class SpeechPractice:
             return 0
         
         # Clean and normalize texts
-        user_clean = re.sub(r'[^\w\s]', '', user_text.lower())
-        expected_clean = re.sub(r'[^\w\s]', '', expected_text.lower())
+        user_clean = self._clean(user_text)
+        expected_clean = self._clean(expected_text)
         
-        # Calculate similarity using SequenceMatcher
-        similarity = SequenceMatcher(None, user_clean, expected_clean).ratio()
+        # Character-level edit distance, as a percentage similarity
+        distance = edit_distance(expected_clean, user_clean)
+        return self._similarity(distance, len(user_clean), len(expected_clean))
+    
+    def score_pronunciation(self, user_text, expected_text):
+        """Score a line and return the word-level alignment alongside it"""
+        if not user_text or not expected_text:
+            return {'score': 0, 'word_alignment': [], 'word_errors': 0}
+        
+        expected_words = self._clean(expected_text).split()
+        user_words = self._clean(user_text).split()
+        word_errors, ops = align(expected_words, user_words)
         
-        # Convert to percentage
-        score = similarity * 100
+        return {
+            'score': self.calculate_pronunciation_score(user_text, expected_text),
+            'word_alignment': ops,
+            'word_errors': word_errors
+        }
+    
+    def score_batch(self, pairs, with_alignment=False):
+        """Score many (user_text, expected_text) pairs, e.g. for offline grading"""
+        pairs = list(pairs)
+        results = [
+            {'score': 0, 'word_alignment': [], 'word_errors': 0} if with_alignment else {'score': 0}
+            for _ in pairs
+        ]
+        scored = [k for k, (user_text, expected_text) in enumerate(pairs) if user_text and expected_text]
+        user_clean = [self._clean(pairs[k][0]) for k in scored]
+        expected_clean = [self._clean(pairs[k][1]) for k in scored]
+        # All character-level distances in one vectorized pass
+        distances = edit_distance_batch(expected_clean, user_clean)
         
-        return round(score, 1)
+        for k, distance, user, expected in zip(scored, distances, user_clean, expected_clean):
+            results[k]['score'] = self._similarity(int(distance), len(user), len(expected))
+            if with_alignment:
+                word_errors, ops = align(expected.split(), user.split())
+                results[k].update({'word_alignment': ops, 'word_errors': word_errors})
+        return results
     
-    def analyze_fluency(self, audio_duration, word_count):
-        """Analyze speaking fluency"""
-        if word_count == 0:
+    def analyze_fluency(self, audio_duration, word_count, pause_count=0, mean_pause=0.0):
+        """
+        Analyze speaking fluency
+        audio_duration: seconds of actual speech (silence before and after excluded)
+        pause_count, mean_pause: pauses inside the utterance, see voice_activity
+        """
+        if word_count == 0 or audio_duration <= 0:
             return 0
         
         # Calculate words per minute
@@ -76,10 +142,16 @@ class SpeechPractice:
             fluency_score = 60
         else:
             fluency_score = 40
+        
+        # Hesitation: allow about one pause per eight words, then 5 points per extra pause
+        extra_pauses = max(0, pause_count - word_count // 8)
+        fluency_score -= min(20, 5 * extra_pauses)
+        if mean_pause > 1.0:
+            fluency_score -= 10
             
-        return round(fluency_score, 1)
+        return round(max(fluency_score, 0), 1)
     
-    def get_feedback(self, pronunciation_score, fluency_score, user_text, expected_text):
+    def get_feedback(self, pronunciation_score, fluency_score, user_text, expected_text, pause_count=0, mean_pause=0.0):
         """Generate feedback based on scores"""
         feedback = []
         
@@ -101,10 +173,14 @@ class SpeechPractice:
         else:
             feedback.append("🐌 Speaking too slowly or too fast. Aim for natural conversation pace.")
         
+        # Pause feedback
+        if pause_count and mean_pause > 1.0:
+            feedback.append(f"⏸️ {pause_count} long pause(s) averaging {mean_pause:.1f}s. Try to keep the sentence flowing.")
+        
         # Specific word feedback
         if user_text and expected_text:
-            user_words = set(user_text.split())
-            expected_words = set(expected_text.split())
+            user_words = set(self._clean(user_text).split())
+            expected_words = set(self._clean(expected_text).split())
             missing_words = expected_words - user_words
             extra_words = user_words - expected_words
             
@@ -115,16 +191,68 @@ class SpeechPractice:
         
         return feedback
     
-    def practice_line(self, expected_text):
-        """Practice a single conversation line"""
-        result = {
+    @staticmethod
+    def _empty_result():
+        return {
             'success': False,
             'user_text': None,
             'pronunciation_score': 0,
             'fluency_score': 0,
             'feedback': [],
-            'audio_duration': 0
+            'audio_duration': 0,
+            'speech_duration': 0,
+            'pause_count': 0,
+            'mean_pause': 0,
+            'word_alignment': []
         }
+    
+    def grade(self, audio, user_text, expected_text):
+        """Score a recognized attempt; shared by live practice and batch grading"""
+        result = self._empty_result()
+        if not user_text:
+            result['feedback'].append("❌ Could not understand speech. Please speak clearly.")
+            return result
+        
+        # Calculate scores
+        pronunciation = self.score_pronunciation(user_text, expected_text)
+        pronunciation_score = pronunciation['score']
+        # Time only the speech itself, not the silence around it
+        activity = analyze_voice_activity(audio.frame_data, audio.sample_rate, audio.sample_width)
+        audio_duration = activity['total_duration']
+        speech_duration = activity['speech_duration'] or audio_duration
+        word_count = len(user_text.split())
+        fluency_score = self.analyze_fluency(
+            speech_duration, word_count, activity['pause_count'], activity['mean_pause']
+        )
+        
+        # Generate feedback
+        feedback = self.get_feedback(
+            pronunciation_score, fluency_score, user_text, expected_text,
+            activity['pause_count'], activity['mean_pause']
+        )
+        
+        result.update({
+            'success': True,
+            'user_text': user_text,
+            'pronunciation_score': pronunciation_score,
+            'fluency_score': fluency_score,
+            'feedback': feedback,
+            'audio_duration': audio_duration,
+            'speech_duration': speech_duration,
+            'pause_count': activity['pause_count'],
+            'mean_pause': activity['mean_pause'],
+            'word_alignment': pronunciation['word_alignment']
+        })
+        return result
+    
+    def speech_to_text_batch(self, audios, backend=None):
+        """Convert several recordings to text, batching them when the backend supports it"""
+        texts = self.get_backend(backend).transcribe_batch(audios)
+        return [text.lower().strip() if text else None for text in texts]
+    
+    def practice_line(self, expected_text, backend=None):
+        """Practice a single conversation line"""
+        result = self._empty_result()
         
         try:
             # Record user speech
@@ -133,29 +261,9 @@ class SpeechPractice:
                 result['feedback'].append("❌ No speech detected. Please try again.")
                 return result
             
-            # Convert to text
-            user_text = self.speech_to_text(audio)
-            if not user_text:
-                result['feedback'].append("❌ Could not understand speech. Please speak clearly.")
-                return result
-            
-            # Calculate scores
-            pronunciation_score = self.calculate_pronunciation_score(user_text, expected_text)
-            audio_duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
-            word_count = len(user_text.split())
-            fluency_score = self.analyze_fluency(audio_duration, word_count)
-            
-            # Generate feedback
-            feedback = self.get_feedback(pronunciation_score, fluency_score, user_text, expected_text)
-            
-            result.update({
-                'success': True,
-                'user_text': user_text,
-                'pronunciation_score': pronunciation_score,
-                'fluency_score': fluency_score,
-                'feedback': feedback,
-                'audio_duration': audio_duration
-            })
+            # Convert to text and score it
+            user_text = self.speech_to_text(audio, backend)
+            result = self.grade(audio, user_text, expected_text)
             
         except Exception as e:
             result['feedback'].append(f"❌ Error during practice: {str(e)}")
@@ -0,0 +1,49 @@
+import random
+
+from alignment import align, edit_distance, edit_distance_batch
+from speech_practice import SpeechPractice
+
+
+def random_text(rng, longest):
+    return ''.join(rng.choice("abcdé fg'") for _ in range(rng.randint(0, longest)))
+
+
+def test_batch_matches_scalar_distance_across_block_boundaries():
+    rng = random.Random(0)
+    # Lengths around 64 and 128 cross the bit-parallel block boundaries
+    for longest in (5, 63, 64, 65, 128, 129, 300):
+        sources = [random_text(rng, longest) for _ in range(300)]
+        targets = [random_text(rng, longest) for _ in range(300)]
+        expected = [edit_distance(source, target) for source, target in zip(sources, targets)]
+        assert edit_distance_batch(sources, targets, chunk_size=64).tolist() == expected
+
+
+def test_batch_edge_cases():
+    sources = ["", "abc", "", "kitten", "naïve café"]
+    targets = ["abc", "", "", "sitting", "naive cafe"]
+    assert edit_distance_batch(sources, targets).tolist() == [3, 3, 0, 3, 2]
+    assert edit_distance_batch([], []).tolist() == []
+
+
+def test_align_reports_word_operations():
+    distance, ops = align("i would like a coffee".split(), "i like the coffee".split())
+    assert distance == 2
+    assert ('delete', 'would', None) in ops
+    assert ('substitute', 'a', 'the') in ops
+
+
+def test_score_batch_matches_single_scoring():
+    practice = SpeechPractice()
+    pairs = [
+        ("I'd like a coffee", "I would like a coffee, please."),
+        ("good morning", "Good morning!"),
+        ("", "Hello"),
+        (None, "Hello"),
+        ("where is the station " * 5, "Where is the train station? " * 5),
+    ]
+    assert practice.score_batch(pairs, with_alignment=True) == [
+        practice.score_pronunciation(user_text, expected_text) for user_text, expected_text in pairs
+    ]
+    assert [result['score'] for result in practice.score_batch(pairs)] == [
+        practice.calculate_pronunciation_score(user_text, expected_text) for user_text, expected_text in pairs
+    ]
@@ -0,0 +1,117 @@
+import base64
+import io
+import time
+import wave
+
+import numpy as np
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('httpx')
+
+from fastapi.testclient import TestClient
+
+import api
+from audio_io import CODECS, decode_audio, encode_audio
+from speech_practice import speech_practice
+from tts_engines import EngineRegistry, TTSEngine
+
+
+class FixedRecognizer:
+    def warm_up(self):
+        return True
+
+    def transcribe(self, audio):
+        return "good morning"
+
+
+def wav_base64(sample_width, seconds=1.0, sample_rate=16000):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    samples = (0.5 * np.sin(2 * np.pi * 220 * t) * (2 ** 31 - 1)).astype('<i4')
+    # Keep the top sample_width bytes of each little-endian int32
+    frames = samples.view(np.uint8).reshape(-1, 4)[:, 4 - sample_width:].tobytes()
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(frames)
+    return base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(speech_practice.backends, 'fixed', FixedRecognizer())
+    with TestClient(api.app) as client:
+        yield client
+
+
+@pytest.mark.parametrize('sample_width', [2, 3])
+def test_grade_accepts_16_and_24_bit_wav(client, sample_width):
+    response = client.post('/grade', json={
+        'audio': wav_base64(sample_width), 'expected': "Good morning!", 'backend': 'fixed',
+    })
+    assert response.status_code == 200
+    assert response.json()['success']
+    assert response.json()['pronunciation_score'] == 100
+
+
+def test_grade_rejects_audio_that_is_not_a_recording(client):
+    response = client.post('/grade', json={
+        'audio': base64.b64encode(b'RIFF\x00\x00not really a wav').decode('ascii'),
+        'expected': "Hello", 'backend': 'fixed',
+    })
+    assert response.status_code == 400
+    assert response.json()['detail'].startswith("Could not decode audio")
+
+
+def test_grading_error_is_reported_in_the_result(client, monkeypatch):
+    def broken(audio, user_text, expected_text):
+        raise KeyError(3)
+
+    monkeypatch.setattr(speech_practice, 'grade', broken)
+    response = client.post('/grade', json={'audio': wav_base64(2), 'expected': "Hello", 'backend': 'fixed'})
+    assert response.status_code == 200
+    assert not response.json()['success']
+    assert response.json()['feedback'] == ["❌ Error during grading: 3"]
+
+
+class WavOrMp3Engine(TTSEngine):
+    name = 'tone'
+    label = "Tone"
+    codec = 'mp3'
+    codecs = tuple(CODECS)
+
+    def _synthesize_batch(self, texts, voices, codec):
+        return [encode_audio(np.zeros(2205, dtype=np.float32), 22050, codec) for _ in texts]
+
+
+@pytest.fixture
+def tone_engine(monkeypatch):
+    registry = EngineRegistry()
+    registry.register(WavOrMp3Engine)
+    monkeypatch.setattr(api, 'tts_engines', registry)
+    monkeypatch.setattr(api, '_batchers', {})
+
+
+def test_synthesize_serves_the_requested_codec(client, tone_engine):
+    default = client.post('/synthesize', json={'lines': ["A: Hello"], 'engine': 'tone'}).json()
+    assert default['mime'] == 'audio/mpeg'
+    wav = client.post('/synthesize', json={'lines': ["A: Hello"], 'engine': 'tone', 'codec': 'wav'}).json()
+    assert wav['mime'] == 'audio/wav'
+    samples, rate = decode_audio(base64.b64decode(wav['segments'][0]['audio']))
+    assert (len(samples), rate) == (2205, 22050)
+
+
+def test_synthesize_rejects_an_unknown_codec(client, tone_engine):
+    response = client.post('/synthesize', json={'lines': ["A: Hello"], 'engine': 'tone', 'codec': 'flac'})
+    assert response.status_code == 400
+
+
+def test_stats_include_app_session_memory(client, monkeypatch, tmp_path):
+    monkeypatch.setenv('SESSION_STATS_DIR', str(tmp_path))
+    (tmp_path / 'app-1.json').write_text(
+        '{"sessions": 2, "total_bytes": 4096, "max_session_bytes": 3072, "updated": %f}' % time.time()
+    )
+    memory = client.get('/stats').json()['session_memory']
+    assert (memory['processes'], memory['sessions'], memory['total_bytes']) == (1, 2, 4096)
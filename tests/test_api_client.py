@@ -0,0 +1,47 @@
+import pytest
+
+httpx = pytest.importorskip('httpx')
+
+from api_client import ApiClient, retry_after
+from speech_practice import speech_practice
+
+
+class Recording:
+    def get_wav_data(self):
+        return b"RIFF"
+
+
+def api_client(handler):
+    client = ApiClient('http://api.test')
+    client._http = httpx.Client(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    return client
+
+
+def busy(request):
+    return httpx.Response(503, headers={'Retry-After': '3'}, json={'detail': "generate queue is full, retry shortly"})
+
+
+def test_full_queue_raises_with_retry_after():
+    with pytest.raises(httpx.HTTPError) as error:
+        api_client(busy).generate("ordering coffee")
+    assert retry_after(error.value) == '3'
+
+
+def test_other_failures_have_no_retry_hint():
+    with pytest.raises(httpx.HTTPError) as error:
+        api_client(lambda request: httpx.Response(500)).generate("ordering coffee")
+    assert retry_after(error.value) is None
+
+    def refuse(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    with pytest.raises(httpx.HTTPError) as error:
+        api_client(refuse).names()
+    assert retry_after(error.value) is None
+
+
+def test_busy_grader_is_reported_in_the_result(monkeypatch):
+    monkeypatch.setattr(speech_practice, 'record_speech', Recording)
+    result = api_client(busy).practice_line("Good morning!")
+    assert not result['success']
+    assert result['feedback'] == ["⏳ The grading service is busy. Please try again in 3s."]
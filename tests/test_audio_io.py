@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('soundfile')
+
+from audio_io import CODECS, audio_duration, codec_mime, decode_audio, encode_audio, resample
+from audio_store import AudioStore
+
+
+def tone(seconds, sample_rate):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+@pytest.mark.parametrize('codec, mime, rate', [
+    ('wav', 'audio/wav', 22050),
+    # Opus has no 22.05 kHz mode, so the line goes up to 24 kHz
+    ('ogg', 'audio/ogg', 24000),
+    ('mp3', 'audio/mpeg', 22050),
+])
+def test_round_trip(codec, mime, rate, tmp_path):
+    audio_data = encode_audio(tone(1.0, 22050), 22050, codec)
+    assert codec_mime(codec) == mime
+
+    samples, decoded_rate = decode_audio(audio_data)
+    assert decoded_rate == rate
+    # Lossy codecs pad to whole frames; the length must still come back within 10 ms
+    assert len(samples) / rate == pytest.approx(1.0, abs=0.01)
+    assert audio_duration(audio_data) == pytest.approx(1.0, abs=0.01)
+    # The store names the file after the MIME type, so it is served with the right type
+    assert AudioStore(str(tmp_path)).put(audio_data, mime).endswith('.' + codec)
+
+
+def test_wav_is_sample_exact():
+    samples, rate = decode_audio(encode_audio(tone(0.5, 16000), 16000, 'wav'))
+    assert (len(samples), rate) == (8000, 16000)
+    assert np.abs(samples - tone(0.5, 16000)).max() < 1e-4
+
+
+@pytest.mark.parametrize('rate, opus_rate', [(8000, 8000), (22050, 24000), (44100, 48000), (96000, 48000)])
+def test_opus_rates(rate, opus_rate):
+    _, decoded_rate = decode_audio(encode_audio(tone(0.2, rate), rate, 'ogg'))
+    assert decoded_rate == opus_rate
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError, match='flac'):
+        encode_audio(tone(0.1, 16000), 16000, 'flac')
+    assert set(CODECS) == {'wav', 'ogg', 'mp3'}
+
+
+def test_resample_keeps_duration():
+    assert len(resample(tone(0.5, 22050), 22050, 24000)) == 12000
+    samples = tone(0.5, 24000)
+    assert resample(samples, 24000, 24000) is samples
@@ -0,0 +1,91 @@
+import wave
+
+import numpy as np
+import pytest
+
+import batch_grade
+from speech_practice import SpeechPractice
+
+
+class ListRecognizer:
+    """Recognition backend returning fixed transcripts, in place of a network or model call"""
+
+    def __init__(self, texts):
+        self.texts = texts
+
+    def warm_up(self):
+        return True
+
+    def transcribe_batch(self, audios):
+        return [self.texts[len(audio.frame_data)] for audio in audios]
+
+
+def write_wav(path, seconds, sample_rate=16000):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    samples = (np.sin(2 * np.pi * 220 * t) * 8000).astype('<i2')
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return str(path)
+
+
+@pytest.fixture
+def practice(monkeypatch):
+    practice = SpeechPractice('fixed')
+    monkeypatch.setattr(batch_grade, '_practice', practice)
+    return practice
+
+
+def test_bad_item_is_reported_without_losing_the_batch(tmp_path, practice, monkeypatch):
+    good = write_wav(tmp_path / 'good.wav', 1.0)
+    bad = write_wav(tmp_path / 'bad.wav', 0.5)
+    practice.backends['fixed'] = ListRecognizer({32000: "good morning", 16000: "see you tomorrow"})
+
+    grade = practice.grade
+
+    def failing_grade(audio, user_text, expected_text):
+        if user_text == "see you tomorrow":
+            raise KeyError(3)
+        return grade(audio, user_text, expected_text)
+
+    monkeypatch.setattr(practice, 'grade', failing_grade)
+    items = [
+        {'audio': good, 'expected': "Good morning"},
+        {'audio': bad, 'expected': "See you tomorrow"},
+        {'audio': str(tmp_path / 'missing.wav'), 'expected': "Hello"},
+    ]
+    rows = batch_grade.grade_batch(items)
+
+    assert [row['audio'] for row in rows] == [item['audio'] for item in items]
+    assert rows[0]['success'] and rows[0]['error'] is None
+    assert rows[0]['pronunciation_score'] == 100
+    assert not rows[1]['success']
+    assert rows[1]['error'] == "Could not grade audio: 3"
+    assert rows[1]['feedback'] == ["❌ Could not grade audio: 3"]
+    assert not rows[2]['success']
+    assert rows[2]['error'].startswith("Could not decode audio")
+
+
+def test_recognition_failure_marks_the_batch_failed(tmp_path, practice):
+    class BrokenRecognizer(ListRecognizer):
+        def transcribe_batch(self, audios):
+            raise RuntimeError("backend down")
+
+    practice.backends['fixed'] = BrokenRecognizer({})
+    rows = batch_grade.grade_batch([{'audio': write_wav(tmp_path / 'a.wav', 0.5), 'expected': "Hi"}])
+    assert not rows[0]['success']
+    assert rows[0]['error'] == "Could not recognize speech: backend down"
+
+
+def test_result_writer_writes_failed_rows(tmp_path, practice):
+    practice.backends['fixed'] = ListRecognizer({16000: "hello"})
+    rows = batch_grade.grade_batch([
+        {'audio': write_wav(tmp_path / 'a.wav', 0.5), 'expected': "Hello"},
+        {'audio': str(tmp_path / 'missing.wav'), 'expected': "Hello"},
+    ])
+    output = tmp_path / 'results.jsonl'
+    with batch_grade.ResultWriter(str(output)) as writer:
+        writer.write(rows)
+    assert len(output.read_text(encoding='utf-8').splitlines()) == 2
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('soundfile')
+
+import tts_engines
+from audio_cache import AudioCache
+from audio_io import CODECS, decode_audio, encode_audio
+from conversation_track import build_track, pcm_segments
+from tts_engines import TTSEngine
+
+
+def tone(seconds, sample_rate, frequency=440.0):
+    t = np.arange(int(round(seconds * sample_rate))) / sample_rate
+    return (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def segment(text, speaker, seconds, sample_rate):
+    return {'text': text, 'speaker': speaker, 'samples': tone(seconds, sample_rate), 'sample_rate': sample_rate}
+
+
+def test_offsets_gaps_and_resampling_are_exact():
+    segments = [
+        # 22.05 kHz, as from the local engines, is resampled to the track's 24 kHz
+        segment("Hello", 'A', 0.5, 22050),
+        segment("Hi there", 'B', 0.25, 24000),
+        segment("How are you?", 'B', 0.5, 24000),
+        segment("Fine, thanks.", 'A', 1.0, 16000),
+    ]
+    audio_data, offsets = build_track(segments, gap=0.3, speaker_gap=0.6, codec='wav')
+
+    assert [(o['text'], o['speaker'], o['start'], o['end']) for o in offsets] == [
+        ("Hello", 'A', 0.0, 0.5),
+        # The speaker changes: 0.6 s of silence
+        ("Hi there", 'B', 1.1, 1.35),
+        # Same speaker: 0.3 s
+        ("How are you?", 'B', 1.65, 2.15),
+        ("Fine, thanks.", 'A', 2.75, 3.75),
+    ]
+
+    samples, rate = decode_audio(audio_data)
+    assert rate == 24000
+    assert len(samples) == 3.75 * 24000
+    # Each line sits exactly between its offsets and the gaps are silent
+    silent = np.ones(len(samples), dtype=bool)
+    for offset in offsets:
+        start, end = int(offset['start'] * rate), int(offset['end'] * rate)
+        assert np.abs(samples[start:end]).max() > 0.4
+        silent[start:end] = False
+    assert np.all(samples[silent] == 0)
+
+
+def test_no_segments_gives_no_track():
+    assert build_track([]) == (None, [])
+
+
+def test_undecodable_segment_is_skipped():
+    good = {'text': "Hello", 'speaker': 'A', 'audio': encode_audio(tone(0.5, 24000), 24000, 'wav')}
+    bad = {'text': "Broken", 'speaker': 'B', 'audio': b"not audio"}
+    decoded = list(pcm_segments([good, bad]))
+    assert [s['text'] for s in decoded] == ["Hello"]
+    assert len(decoded[0]['samples']) == 12000
+    assert 'audio' not in decoded[0]
+
+
+class LocalToneEngine(TTSEngine):
+    """Stands in for a local engine: any codec, half a second of 22.05 kHz tone per line"""
+    name = 'local-tone'
+    codec = 'mp3'
+    codecs = tuple(CODECS)
+    sample_rate = 22050
+
+    def __init__(self):
+        super().__init__()
+        self.codecs_requested = []
+
+    def _synthesize_batch(self, texts, voices, codec):
+        self.codecs_requested.append(codec)
+        return [encode_audio(tone(0.5, self.sample_rate), self.sample_rate, codec) for _ in texts]
+
+
+class CloudToneEngine(LocalToneEngine):
+    """Stands in for gTTS: MP3 only"""
+    name = 'cloud-tone'
+    codecs = ()
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(tts_engines, 'audio_cache', AudioCache(str(tmp_path)))
+
+
+def test_local_engine_hands_the_track_pcm():
+    engine = LocalToneEngine()
+    segments = list(engine.stream_pcm(["A: Hello", "B: Hi"]))
+    # Asked for WAV rather than its default MP3, so every sample arrives intact
+    assert engine.codecs_requested == ['wav']
+    assert [len(s['samples']) for s in segments] == [11025, 11025]
+
+    _, offsets = build_track(segments, codec='wav')
+    assert [(o['start'], o['end']) for o in offsets] == [(0.0, 0.5), (1.1, 1.6)]
+
+
+def test_fixed_format_engine_is_decoded():
+    engine = CloudToneEngine()
+    segments = list(engine.stream_pcm(["A: Hello"]))
+    assert engine.codecs_requested == ['mp3']
+    assert segments[0]['sample_rate'] == 22050
+    # MP3 frames pad the line, but never shorten it
+    assert len(segments[0]['samples']) >= 11025
@@ -0,0 +1,83 @@
+import pytest
+
+torch = pytest.importorskip('torch')
+torchaudio = pytest.importorskip('torchaudio')
+pytest.importorskip('soundfile')
+
+import fairseq_tts
+from audio_io import decode_audio
+from tts_models import ModelRegistry
+
+
+class FakeModule:
+    def to(self, device):
+        return self
+
+
+class FakeProcessor:
+    def __call__(self, texts):
+        lengths = torch.tensor([len(text) for text in texts])
+        tokens = torch.zeros(len(texts), int(lengths.max()), dtype=torch.long)
+        return tokens, lengths
+
+
+class FakeTacotron2(FakeModule):
+    def infer(self, tokens, lengths):
+        # Ten mel frames per character, so output length follows input length
+        mel_lengths = lengths * 10
+        mel = torch.ones(len(tokens), 80, int(mel_lengths.max()))
+        return mel, mel_lengths, None
+
+
+class FakeVocoder(FakeModule):
+    sample_rate = 22050
+
+    def __call__(self, mel, lengths):
+        wave_lengths = lengths * 100
+        return 0.5 * torch.ones(len(mel), int(wave_lengths.max())), wave_lengths
+
+
+class FakeBundle:
+    """Mirrors torchaudio's Tacotron2 TTS bundles, which have get_vocoder() and no get_wavernn()"""
+
+    def get_text_processor(self):
+        return FakeProcessor()
+
+    def get_tacotron2(self):
+        return FakeTacotron2()
+
+    def get_vocoder(self):
+        return FakeVocoder()
+
+
+@pytest.fixture
+def fake_bundle(monkeypatch):
+    monkeypatch.setattr(torchaudio.pipelines, 'TACOTRON2_WAVERNN_CHAR_LJSPEECH', FakeBundle(), raising=False)
+    registry = ModelRegistry()
+    registry.register('tacotron2', fairseq_tts._load_tacotron2)
+    monkeypatch.setattr(fairseq_tts, 'model_registry', registry)
+
+
+def test_loader_uses_the_bundle_vocoder(fake_bundle):
+    processor, model, vocoder = fairseq_tts._load_tacotron2()
+    assert isinstance(processor, FakeProcessor)
+    assert isinstance(model, FakeTacotron2)
+    assert isinstance(vocoder, FakeVocoder)
+
+
+def test_batch_keeps_line_order_and_lengths(fake_bundle):
+    tts = fairseq_tts.FairseqTTS()
+    waveforms = tts.synthesize_batch(["Hi", "Good morning", "Bye"])
+    assert [len(waveform) for waveform in waveforms] == [2000, 12000, 3000]
+    # Each line is normalized to full scale
+    assert all(abs(float(waveform.max()) - 1.0) < 1e-6 for waveform in waveforms)
+
+
+def test_text_to_speech_encodes_wav(fake_bundle, tmp_path, monkeypatch):
+    from audio_cache import AudioCache
+    monkeypatch.setattr(fairseq_tts, 'audio_cache', AudioCache(str(tmp_path)))
+    tts = fairseq_tts.FairseqTTS()
+    tts.codec = 'wav'
+    samples, rate = decode_audio(tts.text_to_speech("Hello"))
+    assert rate == 22050
+    assert len(samples) == 5000
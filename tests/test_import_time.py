@@ -0,0 +1,16 @@
+from benchmarks.bench_import_time import HEAVY_MODULES, STARTUP_MODULES, measure
+
+
+def test_startup_modules_leave_heavy_dependencies_unloaded():
+    # Asserts on what gets imported, not on timings, so a slow machine doesn't fail the test
+    results = measure()
+    assert results['heavy_imported'] == [], f"imported at start-up: {', '.join(results['heavy_imported'])}"
+    # The -X importtime report was parsed; modules first imported by another one are nested in it
+    assert results['modules_us'] and set(results['modules_us']) <= set(STARTUP_MODULES)
+
+
+def test_heavy_modules_are_detected():
+    # The check itself must notice a heavy import, or the test above would pass vacuously
+    results = measure(['speech_practice'])
+    assert 'speech_recognition' in results['heavy_imported']
+    assert set(results['heavy_imported']) <= set(HEAVY_MODULES)
@@ -0,0 +1,107 @@
+import json
+import threading
+
+from knowledge_base import ConversationLibrary, hash_embed
+
+HOTEL = ("checking in at a hotel", "A: I have a reservation.\nB: Welcome, may I see your ID?")
+INTERVIEW = ("a job interview for a developer role", "A: Tell me about yourself.\nB: I build web apps.")
+
+
+def library(path, **kwargs):
+    return ConversationLibrary(path=str(path), threshold=0.9, embedder=hash_embed, **kwargs)
+
+
+def test_library_reloads_from_disk(tmp_path):
+    first = library(tmp_path, flush_every=1)
+    first.add(*HOTEL)
+    first.add(*INTERVIEW)
+    reloaded = library(tmp_path)
+    assert len(reloaded) == 2
+    assert reloaded.lookup(HOTEL[0])[0] == HOTEL[1]
+    assert reloaded.lookup(INTERVIEW[0])[0] == INTERVIEW[1]
+
+
+def test_two_writers_sharing_files_stay_aligned(tmp_path):
+    hotel_writer = library(tmp_path, flush_every=1)
+    interview_writer = library(tmp_path, flush_every=1)
+    # Both load the (empty) library before either writes
+    assert len(hotel_writer) == len(interview_writer) == 0
+    hotel_writer.add(*HOTEL)
+    interview_writer.add(*INTERVIEW)
+
+    reloaded = library(tmp_path)
+    conversation, similarity = reloaded.lookup(HOTEL[0])
+    assert conversation == HOTEL[1]
+    assert similarity > 0.99
+    assert reloaded.lookup(INTERVIEW[0])[0] == INTERVIEW[1]
+
+
+def test_records_appended_after_the_last_flush_are_embedded(tmp_path):
+    writer = library(tmp_path, flush_every=100)
+    writer.add(*HOTEL)
+    writer.save()
+    # Simulates a crash between the JSONL append and the next flush
+    writer.add(*INTERVIEW)
+
+    reloaded = library(tmp_path)
+    assert len(reloaded) == 2
+    assert reloaded.lookup(INTERVIEW[0])[0] == INTERVIEW[1]
+    assert reloaded.lookup(HOTEL[0])[0] == HOTEL[1]
+
+
+def test_index_for_different_records_is_rebuilt(tmp_path):
+    writer = library(tmp_path, flush_every=1)
+    writer.add(*HOTEL)
+    writer.add(*INTERVIEW)
+    # Rewrite the records in a different order behind the index's back
+    records_path = tmp_path / 'conversations.jsonl'
+    lines = records_path.read_text(encoding='utf-8').splitlines()
+    records_path.write_text('\n'.join(reversed(lines)) + '\n', encoding='utf-8')
+
+    reloaded = library(tmp_path)
+    assert reloaded.lookup(HOTEL[0])[0] == HOTEL[1]
+    assert reloaded.lookup(INTERVIEW[0])[0] == INTERVIEW[1]
+
+
+def test_torn_last_record_is_skipped(tmp_path):
+    library(tmp_path, flush_every=1).add(*HOTEL)
+    with open(tmp_path / 'conversations.jsonl', 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'requirement': 'half'})[:10])
+    reloaded = library(tmp_path)
+    assert len(reloaded) == 1
+    assert reloaded.lookup(HOTEL[0])[0] == HOTEL[1]
+
+
+def test_records_from_another_process_are_picked_up(tmp_path):
+    worker_a = library(tmp_path, flush_every=1)
+    worker_b = library(tmp_path, flush_every=1)
+    assert worker_b.lookup(HOTEL[0]) is None
+    worker_a.add(*HOTEL)
+    worker_b.add(*INTERVIEW)
+
+    # Each worker sees the other's record, in file order
+    assert worker_b.lookup(HOTEL[0])[0] == HOTEL[1]
+    assert worker_a.lookup(INTERVIEW[0])[0] == INTERVIEW[1]
+    assert len(worker_a) == len(worker_b) == 2
+    assert [r['requirement'] for r in worker_a._records] == [r['requirement'] for r in worker_b._records]
+
+
+def test_many_concurrent_writers_keep_every_record(tmp_path):
+    workers = [library(tmp_path, flush_every=3) for _ in range(4)]
+    requirements = [f"scenario {w} {i}" for w in range(4) for i in range(10)]
+
+    def write(w):
+        for i in range(10):
+            workers[w].add(f"scenario {w} {i}", f"A: conversation {w} {i}")
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reloaded = library(tmp_path)
+    assert len(reloaded) == 40
+    for requirement in requirements:
+        w, i = requirement.split()[1:]
+        assert reloaded.lookup(requirement)[0] == f"A: conversation {w} {i}"
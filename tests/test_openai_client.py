@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('openai')
+
+import conversation_generator
+from benchmarks.stubs import CONVERSATION, patched_openai, stub_server
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    # Retries would quietly open a fresh connection and hide a broken pool
+    monkeypatch.setattr(conversation_generator, 'OPENAI_MAX_RETRIES', 0)
+    counts = {}
+    with stub_server(counts=counts) as url, patched_openai(url):
+        yield counts
+
+
+def test_requests_share_one_pooled_connection(stub):
+    for _ in range(5):
+        assert conversation_generator.get_response("ordering coffee", use_cache=False) == CONVERSATION
+    assert stub['connections'] == 1
+
+
+def test_async_requests_share_one_connection_per_loop(stub):
+    async def generate():
+        # One after another, so the pool never needs a second connection
+        return [await conversation_generator.get_response_async("ordering coffee", use_cache=False)
+                for _ in range(3)]
+
+    # Each asyncio.run has its own loop, as a batch job or a Streamlit rerun thread would
+    for _ in range(3):
+        assert asyncio.run(generate()) == [CONVERSATION] * 3
+    assert stub['connections'] == 3
+    # Clients of finished loops are dropped rather than kept for the life of the process
+    assert len(conversation_generator._async_clients) <= 1
+
+
+def test_async_client_is_reused_within_a_loop():
+    async def clients():
+        return conversation_generator.get_async_client(), conversation_generator.get_async_client()
+
+    with patched_openai("http://127.0.0.1:9"):
+        first, second = asyncio.run(clients())
+        other, _ = asyncio.run(clients())
+    assert first is second
+    assert other is not first
@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+import speech_recognition as sr
+
+import speech_practice as speech_practice_module
+from practice_jobs import PracticeJobs
+from speech_practice import SpeechPractice
+
+
+class FakeMicrophone:
+    """Stands in for the sound card; the recognizer's listen and calibration are replaced below"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class EchoRecognizer:
+    created = 0
+
+    def __init__(self, name, recognizer):
+        time.sleep(0.01)
+        EchoRecognizer.created += 1
+
+    def warm_up(self):
+        return True
+
+    def transcribe(self, audio):
+        return audio.frame_data.decode('ascii')
+
+
+@pytest.fixture
+def practice(monkeypatch):
+    practice = SpeechPractice('echo')
+    EchoRecognizer.created = 0
+    monkeypatch.setattr(speech_practice_module, 'create_recognizer', EchoRecognizer)
+    monkeypatch.setattr(speech_practice_module.sr, 'Microphone', FakeMicrophone)
+
+    state = {'recording': 0, 'overlaps': 0}
+    lock = threading.Lock()
+
+    def adjust_for_ambient_noise(source, duration=1):
+        with lock:
+            state['recording'] += 1
+            if state['recording'] > 1:
+                state['overlaps'] += 1
+        practice.recognizer.energy_threshold = 300
+        time.sleep(0.005)
+
+    def listen(source, timeout=None, phrase_time_limit=None):
+        # The threshold set by this recording's calibration must still be in place
+        assert practice.recognizer.energy_threshold == 300
+        time.sleep(0.005)
+        practice.recognizer.energy_threshold = 4000
+        with lock:
+            state['recording'] -= 1
+        return sr.AudioData(b'good morning', 16000, 2)
+
+    monkeypatch.setattr(practice.recognizer, 'adjust_for_ambient_noise', adjust_for_ambient_noise)
+    monkeypatch.setattr(practice.recognizer, 'listen', listen)
+    return practice, state
+
+
+def test_concurrent_jobs_share_one_backend_and_take_turns_recording(practice):
+    practice, microphone = practice
+    jobs = PracticeJobs(max_workers=4)
+    job_ids = [jobs.submit("Good morning!", practice_line=practice.practice_line) for _ in range(12)]
+
+    deadline = time.time() + 10
+    results = []
+    for job_id in job_ids:
+        while jobs.status(job_id) != 'done' and time.time() < deadline:
+            time.sleep(0.005)
+        results.append(jobs.result(job_id))
+
+    assert all(result['success'] for result in results), [result['feedback'] for result in results]
+    assert {result['user_text'] for result in results} == {'good morning'}
+    assert EchoRecognizer.created == 1
+    assert microphone['overlaps'] == 0
+    assert all(jobs.status(job_id) == 'unknown' for job_id in job_ids)
+
+
+def test_failed_job_reports_an_error():
+    def broken(expected_text, backend):
+        raise RuntimeError("no microphone")
+
+    jobs = PracticeJobs(max_workers=2)
+    job_id = jobs.submit("Hello", practice_line=broken)
+    while jobs.status(job_id) != 'done':
+        time.sleep(0.005)
+    result = jobs.result(job_id)
+    assert not result['success']
+    assert "no microphone" in result['feedback'][0]
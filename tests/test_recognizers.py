@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+
+import recognizers
+from tts_models import ModelRegistry
+
+LABELS = ('-', '|', 'A', 'B')
+
+
+class GroupNormModel:
+    """Mimics the base wav2vec2 feature extractor: each input row is normalized over its whole length"""
+
+    def __init__(self):
+        self.batch_shapes = []
+        self.lengths = []
+
+    def __call__(self, batch, lengths=None):
+        self.batch_shapes.append(tuple(batch.shape))
+        self.lengths.append(None if lengths is None else lengths.tolist())
+        normalized = (batch - batch.mean(dim=1, keepdim=True)) / (batch.std(dim=1, keepdim=True) + 1e-5)
+        frames = normalized[:, :normalized.shape[1] // 160 * 160].reshape(len(batch), -1, 160).mean(dim=2)
+        zeros = torch.zeros_like(frames)
+        # 'A' for frames above the row mean, 'B' below it
+        # Like torchaudio, lengths come back counted in output frames
+        return torch.stack([zeros, zeros, frames, -frames], dim=2), None if lengths is None else lengths // 160
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = GroupNormModel()
+    registry = ModelRegistry()
+    registry.register('wav2vec2', lambda: (fake, LABELS, 16000))
+    monkeypatch.setattr(recognizers, 'model_registry', registry)
+    return fake
+
+
+def clip(levels, samples_per_level=480):
+    return np.concatenate([np.full(samples_per_level, level, dtype=np.float32) for level in levels])
+
+
+def test_clip_transcribes_the_same_alone_and_in_a_batch(model):
+    recognizer = recognizers.Wav2Vec2Recognizer()
+    short = clip([0.4, 1.0])
+    long = clip([0.5, -0.5, 0.5, -0.5, 0.5])
+
+    alone = recognizer.transcribe_samples([short])[0]
+    assert alone == 'BA'
+    batched = recognizer.transcribe_samples([long, short, long])
+    assert batched[1] == alone
+    assert batched[0] == batched[2] == recognizer.transcribe_samples([long])[0]
+    # Zero padding to the longer clip would have shifted the short clip's normalization
+    padded = np.concatenate([short, np.zeros(len(long) - len(short), dtype=np.float32)])
+    assert recognizer.transcribe_samples([padded])[0] != alone
+
+
+def test_equal_length_clips_share_a_forward_pass(model):
+    recognizer = recognizers.Wav2Vec2Recognizer()
+    clips = [clip([1.0, 0.2]), clip([0.2, 1.0]), clip([1.0, 0.2, 1.0])]
+    texts = recognizer.transcribe_samples(clips)
+    assert texts[:2] == ['AB', 'BA']
+    assert sorted(model.batch_shapes) == [(1, 1440), (2, 960)]
+
+
+def test_clips_of_similar_length_are_padded_into_one_pass(model):
+    recognizer = recognizers.Wav2Vec2Recognizer()
+    # 960 and 1000 samples are within 5% of each other, 1440 is not
+    near = np.concatenate([clip([0.2, 1.0]), np.full(40, 1.0, dtype=np.float32)])
+    clips = [clip([1.0, 0.2]), clip([1.0, 0.2, 1.0]), near]
+    alone = [recognizer.transcribe_samples([c])[0] for c in clips]
+    model.batch_shapes.clear()
+    model.lengths.clear()
+
+    assert recognizer.transcribe_samples(clips, tolerance=0.05) == alone
+    assert sorted(model.batch_shapes) == [(1, 1440), (2, 1000)]
+    # The padded clip's real length goes with the batch
+    assert [960, 1000] in model.lengths
+
+
+def test_zero_tolerance_only_batches_equal_lengths(model):
+    recognizer = recognizers.Wav2Vec2Recognizer()
+    clips = [clip([1.0, 0.2]), np.concatenate([clip([0.2, 1.0]), np.ones(40, dtype=np.float32)])]
+    recognizer.transcribe_samples(clips, tolerance=0)
+    assert sorted(model.batch_shapes) == [(1, 960), (1, 1000)]
+
+
+def test_empty_clip_gives_none(model):
+    recognizer = recognizers.Wav2Vec2Recognizer()
+    assert recognizer.transcribe_samples([np.zeros(0, dtype=np.float32), clip([1.0, 0.2])]) == [None, 'AB']
@@ -0,0 +1,137 @@
+import asyncio
+import multiprocessing
+import os
+import types
+
+import pytest
+
+import conversation_generator
+from conversation_generator import ResponseCache
+
+
+def test_responses_persist_across_instances(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    cache = ResponseCache(path=path)
+    cache.add("Ordering coffee", 'model', 'system', "A: Hi\nB: Hello")
+    assert ResponseCache(path=path).get("  ordering   COFFEE ", 'model', 'system') == "A: Hi\nB: Hello"
+
+
+def test_add_appends_one_line_instead_of_rewriting(tmp_path):
+    path = tmp_path / 'cache.jsonl'
+    cache = ResponseCache(path=str(path), max_entries=100)
+    for i in range(10):
+        cache.add(f"prompt {i}", 'model', 'system', f"response {i}")
+    first_lines = path.read_text(encoding='utf-8').splitlines()
+    cache.add("prompt 10", 'model', 'system', "response 10")
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert lines[:-1] == first_lines
+    assert len(lines) == 11
+
+
+def test_log_is_compacted_to_live_entries(tmp_path):
+    path = tmp_path / 'cache.jsonl'
+    cache = ResponseCache(path=str(path), max_entries=5)
+    for i in range(30):
+        cache.add(f"prompt {i}", 'model', 'system', f"response {i}")
+    assert len(path.read_text(encoding='utf-8').splitlines()) <= 2 * 5
+    # No temporary files are left next to the log
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+    reloaded = ResponseCache(path=str(path), max_entries=5)
+    assert reloaded.get("prompt 29", 'model', 'system') == "response 29"
+    assert reloaded.get("prompt 0", 'model', 'system') is None
+
+
+def test_variants_are_replayed_from_the_log(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    cache = ResponseCache(path=path, variants=2)
+    cache.add("prompt", 'model', 'system', "first")
+    cache.add("prompt", 'model', 'system', "second")
+    reloaded = ResponseCache(path=path, variants=2)
+    assert {reloaded.get("prompt", 'model', 'system') for _ in range(2)} == {"first", "second"}
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / 'cache.jsonl'
+    ResponseCache(path=str(path)).add("prompt", 'model', 'system', "response")
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"key": "abc", "crea')
+    assert ResponseCache(path=str(path)).get("prompt", 'model', 'system') == "response"
+
+
+def test_clear_empties_the_log(tmp_path):
+    path = tmp_path / 'cache.jsonl'
+    cache = ResponseCache(path=str(path))
+    cache.add("prompt", 'model', 'system', "response")
+    cache.clear()
+    assert ResponseCache(path=str(path)).get("prompt", 'model', 'system') is None
+
+
+def test_compaction_keeps_records_from_another_writer(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    first = ResponseCache(path=path, max_entries=10)
+    second = ResponseCache(path=path, max_entries=10)
+    first.add("from first", 'model', 'system', "kept")
+    # Superseded responses grow the log until the second writer compacts it
+    for i in range(25):
+        second.add("from second", 'model', 'system', f"response {i}")
+    assert len(open(path, encoding='utf-8').readlines()) < 25
+
+    reloaded = ResponseCache(path=path, max_entries=10)
+    assert reloaded.get("from first", 'model', 'system') == "kept"
+    assert reloaded.get("from second", 'model', 'system') == "response 24"
+    # The second writer picked up the first one's record as well
+    assert second.get("from first", 'model', 'system') == "kept"
+
+
+def _write_responses(path, worker):
+    cache = ResponseCache(path=path, max_entries=50)
+    for i in range(60):
+        cache.add(f"worker {worker} prompt {i % 5}", 'model', 'system', f"worker {worker} response {i}")
+
+
+@pytest.mark.skipif(conversation_generator.fcntl is None, reason="needs flock")
+def test_concurrent_processes_appending_and_compacting_lose_nothing(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_write_responses, args=(path, worker)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    reloaded = ResponseCache(path=path, max_entries=50)
+    for worker in range(4):
+        for prompt in range(5):
+            # The last response written for each prompt survived every other process's compactions
+            expected = f"worker {worker} response {55 + prompt}"
+            assert reloaded.get(f"worker {worker} prompt {prompt}", 'model', 'system') == expected
+
+
+def test_async_response_is_cached_off_the_event_loop(tmp_path, monkeypatch):
+    cache = ResponseCache(path=str(tmp_path / 'cache.jsonl'))
+    monkeypatch.setattr(conversation_generator, 'response_cache', cache)
+    running_loops = []
+    original_add = cache.add
+
+    def add(*args):
+        try:
+            running_loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            running_loops.append(None)
+        original_add(*args)
+
+    class Completions:
+        async def create(self, model, messages):
+            message = types.SimpleNamespace(content="A: Hi")
+            return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=Completions()))
+    monkeypatch.setattr(conversation_generator, 'get_async_client', lambda: client)
+    monkeypatch.setattr(cache, 'add', add)
+
+    assert asyncio.run(conversation_generator.get_response_async("prompt")) == "A: Hi"
+    # add() ran in a worker thread, where no event loop is running
+    assert running_loops == [None]
+    assert cache.get("prompt", conversation_generator.MODEL, conversation_generator.SYSTEM_PROMPT) == "A: Hi"
@@ -0,0 +1,146 @@
+import os
+import sys
+import time
+
+import pytest
+
+import session_store as session_store_module
+from audio_store import AudioStore
+from conversation_parser import parse_line
+from session_store import DEMOTED, SessionStore, collect_reports, estimate_size
+
+NOW = time.time()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AudioStore(str(tmp_path / 'store'))
+
+
+def make_sessions(store, tmp_path, max_bytes):
+    return SessionStore(max_bytes=max_bytes, log_every=3600, store=store, stats_dir=str(tmp_path / 'stats'))
+
+
+def test_estimate_size_counts_contents():
+    text = "x" * 1000
+    assert estimate_size(text) == sys.getsizeof(text)
+    assert estimate_size(b"y" * 1000) >= 1000
+    assert estimate_size({'key': text}) >= sys.getsizeof({}) + 1000
+    assert estimate_size([text, text]) == sys.getsizeof([text, text]) + sys.getsizeof(text)
+    # Lines use __slots__, so their text has to be reached through the slots
+    line = parse_line("A: " + "word " * 200)
+    assert estimate_size(line) > 1000
+
+
+def test_estimate_size_handles_cycles():
+    value = {'items': []}
+    value['items'].append(value)
+    assert estimate_size(value) < 1000
+
+
+def test_under_budget_nothing_is_demoted(store, tmp_path):
+    sessions = make_sessions(store, tmp_path, max_bytes=1024 * 1024)
+    state = {'practice_results': {'practice_0': {'score': 90}}}
+    sessions.enforce('session', state, demotable=('practice_results',))
+    assert state == {'practice_results': {'practice_0': {'score': 90}}}
+
+
+def test_oldest_entries_are_demoted_first(store, tmp_path):
+    state = {
+        'conversation': [parse_line("A: Hello")],
+        'practice_results': {f'practice_{i}': {'feedback': [f"{i}" * 2000]} for i in range(3)},
+        'audio_segments': [{'text': f"Line {i}", 'audio_id': f"{i}" * 2000} for i in range(2)],
+    }
+    originals = {key: list(value.values()) if isinstance(value, dict) else list(value) for key, value in state.items()}
+    full = sum(estimate_size(value) for value in state.values())
+
+    # Room for all but about two entries
+    sessions = make_sessions(store, tmp_path, max_bytes=full - 4000)
+    size = sessions.enforce('session', state, demotable=('practice_results', 'audio_segments'))
+    assert size <= sessions.max_bytes
+
+    # Practice results go before players, the oldest of each first; the conversation is kept
+    results = list(state['practice_results'].values())
+    assert [DEMOTED in result for result in results] == [True, True, False]
+    assert all(DEMOTED not in segment for segment in state['audio_segments'])
+    assert state['conversation'] == originals['conversation']
+
+    # Demoted entries come back unchanged from the shared store
+    assert [sessions.restore(result) for result in results] == originals['practice_results']
+
+    # A tighter budget moves the players as well, skipping entries already moved
+    sessions.max_bytes = 0
+    sessions.enforce('session', state, demotable=('practice_results', 'audio_segments'))
+    assert all(DEMOTED in segment for segment in state['audio_segments'])
+    assert [sessions.restore(segment) for segment in state['audio_segments']] == originals['audio_segments']
+    assert [sessions.restore(result) for result in state['practice_results'].values()] == originals['practice_results']
+
+
+def test_restore_of_a_pruned_entry_is_none(store, tmp_path):
+    sessions = make_sessions(store, tmp_path, max_bytes=0)
+    state = {'audio_segments': [{'text': "Hello", 'audio_id': "x" * 1000}]}
+    sessions.enforce('session', state, demotable=('audio_segments',))
+    os.remove(store.path(state['audio_segments'][0][DEMOTED]))
+    assert sessions.restore(state['audio_segments'][0]) is None
+    assert sessions.restore({'text': "kept"}) == {'text': "kept"}
+
+
+def test_prune_forgets_idle_sessions(store, tmp_path, monkeypatch):
+    clock = [NOW]
+    monkeypatch.setattr(session_store_module.time, 'time', lambda: clock[0])
+    sessions = make_sessions(store, tmp_path, max_bytes=1024 * 1024)
+    sessions.enforce('old', {'conversation': "x" * 100})
+    clock[0] += 1800
+    sessions.enforce('new', {'conversation': "x" * 100})
+
+    # An hour after the first session's last rerun it is forgotten; the second is still active
+    clock[0] += 1860
+    sessions._prune()
+    assert list(sessions._usage) == ['new']
+    assert sessions.report()['sessions'] == 1
+
+
+def test_reports_are_collected_across_processes(store, tmp_path):
+    stats_dir = str(tmp_path / 'stats')
+    sessions = make_sessions(store, tmp_path, max_bytes=1024 * 1024)
+    sessions.enforce('a', {'conversation': "x" * 1000})
+    sessions.enforce('b', {'conversation': "x" * 3000})
+    sessions.publish()
+
+    # Another process's report, and one from a process that stopped long ago
+    sessions._stats_path = lambda: os.path.join(stats_dir, 'other-1.json')
+    sessions.publish({'sessions': 1, 'total_bytes': 500, 'max_session_bytes': 500, 'budget_bytes': 0})
+    stale = os.path.join(stats_dir, 'stopped-2.json')
+    with open(stale, 'w') as f:
+        f.write('{"sessions": 9, "total_bytes": 9, "max_session_bytes": 9, "updated": 0}')
+
+    report = collect_reports(stats_dir)
+    own = sessions.report()
+    assert report['processes'] == 2
+    assert report['sessions'] == 3
+    assert report['total_bytes'] == own['total_bytes'] + 500
+    assert report['max_session_bytes'] == own['max_session_bytes']
+    # Per-session IDs stay inside the process
+    assert all('per_session' not in process for process in report['per_process'].values())
+    assert not os.path.exists(stale)
+
+
+def test_audio_store_prunes_least_recently_used(tmp_path):
+    store = AudioStore(str(tmp_path), max_bytes=2500, prune_every=1000)
+    ids = [store.put(bytes([i]) * 1000) for i in range(3)]
+    # Oldest write first, then use the oldest so the middle one is least recently used
+    for age, audio_id in zip((300, 200, 100), ids):
+        os.utime(store.path(audio_id), (NOW - age, NOW - age))
+    assert store.touch(ids[0]) is not None
+
+    assert store.prune() == 1000
+    assert [store.get(audio_id) is not None for audio_id in ids] == [True, False, True]
+    assert store.touch(ids[1]) is None
+
+
+def test_audio_store_prunes_every_few_writes(tmp_path):
+    store = AudioStore(str(tmp_path), max_bytes=2500, prune_every=2)
+    for i in range(4):
+        store.put(bytes([i]) * 1000)
+    total = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(tmp_path) for name in names)
+    assert total <= 2500
@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('soundfile')
+
+import tts_engines
+from audio_cache import AudioCache
+from audio_io import wav_bytes
+from tts_engines import EngineRegistry, TTSEngine
+
+# Half a second of audio per line, so durations and the real-time factor are exact
+HALF_SECOND = wav_bytes(np.zeros(8000, dtype=np.float32), 16000)
+
+
+class ToneEngine(TTSEngine):
+    """Engine that only implements _synthesize_batch, returning silence or None for 'fail'"""
+    name = 'tone'
+    label = "Tone"
+    voices = ('low', 'high')
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def _synthesize_batch(self, texts, voices, codec):
+        self.calls.append((texts, voices))
+        return [None if text == 'fail' else HALF_SECOND for text in texts]
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    cache = AudioCache(str(tmp_path))
+    monkeypatch.setattr(tts_engines, 'audio_cache', cache)
+    return cache
+
+
+def test_engine_without_synthesize_batch_fails_at_instantiation():
+    class Incomplete(TTSEngine):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError, match='_synthesize_batch'):
+        Incomplete()
+
+
+def test_default_stream_is_one_batch_with_a_voice_per_speaker(cache):
+    engine = ToneEngine()
+    segments = list(engine.stream(["A: Hello there", "B: Hi!", "A: fail"], voice_b='low'))
+
+    assert engine.calls == [(["Hello there", "Hi!", "fail"], ['low', 'low', 'low'])]
+    # The failed line is left out, the rest keep their order and speaker
+    assert [(s['text'], s['speaker'], s['voice_type']) for s in segments] == [
+        ("Hello there", 'A', 'low'), ("Hi!", 'B', 'low'),
+    ]
+    assert engine.metrics.snapshot()['lines'] == 2
+
+
+def test_voices_default_to_the_first_two(cache):
+    engine = ToneEngine()
+    list(engine.stream(["A: One", "B: Two", "Narrator"]))
+    assert engine.calls[0][1] == ['low', 'high', 'low']
+
+
+def test_single_line_goes_through_synthesize_batch(cache):
+    engine = ToneEngine()
+    assert engine.synthesize("Hello") == HALF_SECOND
+    assert engine.calls == [(["Hello"], [None])]
+
+
+def test_metrics_histogram_real_time_factor_and_hit_rate(cache):
+    engine = ToneEngine()
+    engine.metrics.observe(0.2, [HALF_SECOND, HALF_SECOND])
+    # A failed line makes the call's audio length unknown, so it stays out of the real-time factor
+    engine.metrics.observe(3.0, [None])
+    cache.put('tone', 'low', "Hello", 16000, HALF_SECOND)
+    cache.get('tone', 'low', "Hello", 16000)
+    cache.get('tone', 'low', "Missing", 16000)
+
+    snapshot = engine.metrics.snapshot()
+    assert snapshot['latency_buckets'] == {
+        '0.05': 0, '0.1': 0, '0.25': 1, '0.5': 1, '1.0': 1, '2.5': 1, '5.0': 2, '10.0': 2, '30.0': 2, '+Inf': 2,
+    }
+    assert snapshot['calls'] == 2
+    assert snapshot['lines'] == 3
+    assert snapshot['failures'] == 1
+    assert snapshot['bytes'] == 2 * len(HALF_SECOND)
+    assert snapshot['audio_seconds'] == pytest.approx(1.0)
+    assert snapshot['real_time_factor'] == pytest.approx(0.2)
+    assert snapshot['cache_hit_rate'] == 0.5
+
+
+def test_prometheus_text(cache):
+    registry = EngineRegistry()
+    registry.register(ToneEngine)
+    engine = registry.get('tone')
+    engine.metrics.observe(0.2, [HALF_SECOND, HALF_SECOND])
+    engine.metrics.observe(3.0, [None])
+
+    assert registry.prometheus_text() == (
+        '# TYPE tts_latency_seconds histogram\n'
+        'tts_latency_seconds_bucket{engine="tone",le="0.05"} 0\n'
+        'tts_latency_seconds_bucket{engine="tone",le="0.1"} 0\n'
+        'tts_latency_seconds_bucket{engine="tone",le="0.25"} 1\n'
+        'tts_latency_seconds_bucket{engine="tone",le="0.5"} 1\n'
+        'tts_latency_seconds_bucket{engine="tone",le="1.0"} 1\n'
+        'tts_latency_seconds_bucket{engine="tone",le="2.5"} 1\n'
+        'tts_latency_seconds_bucket{engine="tone",le="5.0"} 2\n'
+        'tts_latency_seconds_bucket{engine="tone",le="10.0"} 2\n'
+        'tts_latency_seconds_bucket{engine="tone",le="30.0"} 2\n'
+        'tts_latency_seconds_bucket{engine="tone",le="+Inf"} 2\n'
+        'tts_latency_seconds_sum{engine="tone"} 3.2\n'
+        'tts_latency_seconds_count{engine="tone"} 2\n'
+        '# TYPE tts_lines_total counter\n'
+        'tts_lines_total{engine="tone"} 3\n'
+        '# TYPE tts_failures_total counter\n'
+        'tts_failures_total{engine="tone"} 1\n'
+        '# TYPE tts_bytes_total counter\n'
+        f'tts_bytes_total{{engine="tone"}} {2 * len(HALF_SECOND)}\n'
+        '# TYPE tts_audio_seconds_total counter\n'
+        'tts_audio_seconds_total{engine="tone"} 1.0\n'
+        '# TYPE tts_real_time_factor gauge\n'
+        'tts_real_time_factor{engine="tone"} 0.2\n'
+        '# TYPE tts_cache_hit_rate gauge\n'
+        'tts_cache_hit_rate{engine="tone"} 0.0\n'
+    )
+
+
+def test_real_time_factor_is_omitted_before_any_audio(cache):
+    registry = EngineRegistry()
+    registry.register(ToneEngine)
+    registry.get('tone').metrics.observe(0.1, [None])
+    text = registry.prometheus_text()
+    assert 'tts_real_time_factor{' not in text
+    assert 'tts_failures_total{engine="tone"} 1\n' in text
@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+pytest.importorskip('gtts')
+
+import tts_generator
+from audio_cache import AudioCache
+
+
+class FakeGTTS:
+    """Stands in for gtts.gTTS: records each request and writes fixed bytes instead of calling Google"""
+    calls = []
+    failures = 0
+    lock = threading.Lock()
+
+    def __init__(self, text, lang='en', tld='com', slow=False, timeout=None):
+        self.text = text
+        self.tld = tld
+        with FakeGTTS.lock:
+            FakeGTTS.calls.append((text, tld, timeout))
+
+    def write_to_fp(self, fp):
+        with FakeGTTS.lock:
+            if FakeGTTS.failures:
+                FakeGTTS.failures -= 1
+                raise ConnectionError("stand-in network failure")
+        fp.write(f"mp3:{self.tld}:{self.text}".encode('utf-8'))
+
+
+@pytest.fixture
+def fake_gtts(monkeypatch, tmp_path):
+    FakeGTTS.calls = []
+    FakeGTTS.failures = 0
+    monkeypatch.setattr(tts_generator, 'gTTS', FakeGTTS)
+    monkeypatch.setattr(tts_generator, 'audio_cache', AudioCache(str(tmp_path)))
+    monkeypatch.setattr(tts_generator.time, 'sleep', lambda seconds: None)
+    return FakeGTTS
+
+
+def test_text_to_speech_returns_gtts_bytes(fake_gtts):
+    audio_data = tts_generator.text_to_speech("Hello there", voice_type='british', timeout=3)
+    assert audio_data == b"mp3:co.uk:Hello there"
+    assert fake_gtts.calls == [("Hello there", 'co.uk', 3)]
+
+
+def test_repeated_line_is_served_from_cache(fake_gtts):
+    first = tts_generator.text_to_speech("Hello there")
+    second = tts_generator.text_to_speech("Hello  there ")
+    assert first == second
+    assert len(fake_gtts.calls) == 1
+    # A different voice is a different cache entry
+    tts_generator.text_to_speech("Hello there", voice_type='australian')
+    assert len(fake_gtts.calls) == 2
+
+
+def test_cache_survives_a_new_memory_tier(fake_gtts, tmp_path, monkeypatch):
+    tts_generator.text_to_speech("Good morning")
+    monkeypatch.setattr(tts_generator, 'audio_cache', AudioCache(str(tmp_path)))
+    assert tts_generator.text_to_speech("Good morning") == b"mp3:com:Good morning"
+    assert len(fake_gtts.calls) == 1
+
+
+def test_retries_then_succeeds(fake_gtts):
+    fake_gtts.failures = 2
+    assert tts_generator.text_to_speech("Try again", retries=2) == b"mp3:com:Try again"
+    assert len(fake_gtts.calls) == 3
+
+
+def test_failure_after_retries_returns_none_and_is_not_cached(fake_gtts):
+    fake_gtts.failures = 2
+    assert tts_generator.text_to_speech("Offline", retries=1) is None
+    assert tts_generator.text_to_speech("Offline") == b"mp3:com:Offline"
+
+
+def test_conversation_keeps_order_and_voices(fake_gtts):
+    conversation = ["A: Hi, table for two?", "B: Right this way.", "A: Thanks!"]
+    segments = tts_generator.conversation_to_speech(conversation, voice_a='default', voice_b='irish', max_workers=3)
+    assert [segment['text'] for segment in segments] == ["Hi, table for two?", "Right this way.", "Thanks!"]
+    assert [segment['speaker'] for segment in segments] == ['A', 'B', 'A']
+    assert segments[1]['audio'] == b"mp3:ie:Right this way."
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+import speech_recognition as sr
+
+from speech_practice import SpeechPractice
+from voice_activity import analyze_voice_activity
+
+SAMPLE_RATE = 16000
+
+
+def utterance():
+    """Silence, speech, a 0.6 s pause, speech, silence, as float samples in [-1, 1]"""
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    speech = 0.5 * np.sin(2 * np.pi * 220 * t)
+    silence = lambda seconds: 0.001 * rng.standard_normal(int(seconds * SAMPLE_RATE))
+    return np.concatenate([silence(0.5), speech, silence(0.6), speech, silence(0.5)])
+
+
+def pcm(samples, sample_width):
+    """Encode float samples as little-endian PCM of the given width"""
+    if sample_width == 1:
+        return (samples * 127 + 128).astype(np.uint8).tobytes()
+    if sample_width == 3:
+        widened = (samples * (2 ** 23 - 1)).astype('<i4').view(np.uint8).reshape(-1, 4)
+        return widened[:, :3].tobytes()
+    dtype = {2: '<i2', 4: '<i4'}[sample_width]
+    return (samples * (2 ** (8 * sample_width - 1) - 1)).astype(dtype).tobytes()
+
+
+@pytest.mark.parametrize('sample_width', [1, 2, 3, 4])
+def test_every_pcm_width_finds_the_same_speech(sample_width):
+    reference = analyze_voice_activity(pcm(utterance(), 2), SAMPLE_RATE, 2)
+    activity = analyze_voice_activity(pcm(utterance(), sample_width), SAMPLE_RATE, sample_width)
+    assert activity['total_duration'] == pytest.approx(3.6)
+    assert activity['speech_duration'] == pytest.approx(reference['speech_duration'], abs=0.03)
+    assert activity['speech_duration'] == pytest.approx(2.0, abs=0.1)
+    assert activity['pause_count'] == 1
+    assert activity['mean_pause'] == pytest.approx(0.6, abs=0.06)
+
+
+def test_24_bit_negative_samples_keep_their_sign():
+    # A sign-extension slip would turn small negative samples into loud positive ones
+    activity = analyze_voice_activity(pcm(-utterance(), 3), SAMPLE_RATE, 3)
+    assert activity['speech_duration'] == pytest.approx(2.0, abs=0.1)
+    assert activity['pause_count'] == 1
+
+
+def test_unknown_width_reports_no_speech():
+    activity = analyze_voice_activity(bytes(5 * SAMPLE_RATE), SAMPLE_RATE, 5)
+    assert activity['total_duration'] == pytest.approx(1.0)
+    assert activity['speech_duration'] == 0.0
+
+
+def test_partial_trailing_sample_is_ignored():
+    activity = analyze_voice_activity(pcm(utterance(), 2) + b'\x01', SAMPLE_RATE, 2)
+    assert activity['pause_count'] == 1
+
+
+def test_grade_accepts_24_bit_audio():
+    audio = sr.AudioData(pcm(utterance(), 3), SAMPLE_RATE, 3)
+    result = SpeechPractice().grade(audio, "see you tomorrow at the office", "See you tomorrow at the office.")
+    assert result['success']
+    assert result['pronunciation_score'] == 100
+    assert result['pause_count'] == 1
+    assert result['speech_duration'] == pytest.approx(2.0, abs=0.1)
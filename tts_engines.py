@@ -0,0 +1,331 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from tts_models import model_registry
+from audio_cache import audio_cache
+from audio_io import AUDIO_CODEC, CODECS, PCM_CODEC, audio_duration, codec_mime
+from conversation_parser import parse_conversation
+from conversation_track import pcm_segments
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class EngineMetrics:
+    def __init__(self, engine):
+        """Latency histogram, audio produced and real-time factor for one engine"""
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.calls = 0
+        self.lines = 0
+        self.failures = 0
+        self.bytes = 0
+        self.audio_seconds = 0.0
+        # Synthesis time spent on lines whose audio length is known, for the real-time factor
+        self.timed_seconds = 0.0
+
+    def observe(self, seconds, results):
+        """Record one call that took seconds and produced results (audio bytes or None per line)"""
+        durations = [audio_duration(audio_data) for audio_data in results if audio_data]
+        known = [duration for duration in durations if duration is not None]
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+
+        with self._lock:
+            self.bucket_counts[bucket] += 1
+            self.latency_sum += seconds
+            self.calls += 1
+            self.lines += len(results)
+            self.failures += sum(1 for audio_data in results if not audio_data)
+            self.bytes += sum(len(audio_data) for audio_data in results if audio_data)
+            if known and len(known) == len(durations):
+                self.audio_seconds += sum(known)
+                self.timed_seconds += seconds
+
+    def snapshot(self):
+        """Current values as a plain dict, ready to serialize"""
+        with self._lock:
+            cumulative = []
+            total = 0
+            for count in self.bucket_counts:
+                total += count
+                cumulative.append(total)
+            return {
+                'engine': self.engine,
+                'calls': self.calls,
+                'lines': self.lines,
+                'failures': self.failures,
+                'bytes': self.bytes,
+                'audio_seconds': self.audio_seconds,
+                'latency_sum': self.latency_sum,
+                # Cumulative counts keyed by upper bound, as in Prometheus 'le' labels
+                'latency_buckets': dict(zip([*map(repr, LATENCY_BUCKETS), '+Inf'], cumulative)),
+                # Seconds of synthesis per second of audio; below 1.0 is faster than real time
+                'real_time_factor': self.timed_seconds / self.audio_seconds if self.audio_seconds else None,
+                'cache_hit_rate': audio_cache.stats(self.engine)['hit_rate'],
+            }
+
+
+class TTSEngine(ABC):
+    """
+    Common interface for text-to-speech engines
+    Subclasses implement _synthesize_batch; _synthesize and _stream default to it and are
+    overridden by engines with a cheaper single-line or incremental path
+    """
+    name = None
+    label = None
+    # Default output codec from audio_io.CODECS, and the others a caller may ask for instead
+    codec = PCM_CODEC
+    codecs = ()
+    sample_rate = None
+    voices = ()
+    # Key in tts_models.model_registry, for engines backed by a local model
+    model = None
+
+    def __init__(self):
+        self.metrics = EngineMetrics(self.name)
+
+    @property
+    def mime(self):
+        return codec_mime(self.codec)
+
+    def output_codec(self, codec=None):
+        """Codec the engine produces when asked for codec; fixed-format engines always use their own"""
+        return codec if codec in self.codecs else self.codec
+
+    def voices_for(self, lines, voice_a=None, voice_b=None):
+        """Voice for each parsed line: voice_a for speaker A, voice_b for B, the first voice otherwise"""
+        if not self.voices:
+            return [None] * len(lines)
+        voices = []
+        for line in lines:
+            if line.speaker == 'A':
+                voices.append(voice_a or self.voices[0])
+            elif line.speaker == 'B':
+                voices.append(voice_b or self.voices[min(1, len(self.voices) - 1)])
+            else:
+                voices.append(self.voices[0])
+        return voices
+
+    def synthesize(self, text, voice=None, codec=None):
+        """Audio bytes for one line in output_codec(codec), or None on failure"""
+        start = time.perf_counter()
+        audio_data = self._synthesize(text, voice, self.output_codec(codec))
+        self.metrics.observe(time.perf_counter() - start, [audio_data])
+        return audio_data
+
+    def synthesize_batch(self, texts, voices=None, codec=None):
+        """Audio bytes (or None) in output_codec(codec) for each text, in order"""
+        if voices is None:
+            voices = [None] * len(texts)
+        start = time.perf_counter()
+        results = self._synthesize_batch(list(texts), list(voices), self.output_codec(codec))
+        self.metrics.observe(time.perf_counter() - start, results)
+        return results
+
+    def stream(self, conversation_lines, voice_a=None, voice_b=None, codec=None):
+        """
+        Yield {'text', 'audio', ...} segments for a conversation in order, each as soon as it is ready
+        Each segment is timed from when the previous one was handed over
+        """
+        start = time.perf_counter()
+        for segment in self._stream(conversation_lines, voice_a, voice_b, self.output_codec(codec)):
+            self.metrics.observe(time.perf_counter() - start, [segment['audio']])
+            yield segment
+            start = time.perf_counter()
+
+    def stream_pcm(self, conversation_lines, voice_a=None, voice_b=None):
+        """
+        Like stream, with float32 mono 'samples' and their 'sample_rate' in place of encoded audio
+        Engines that can produce WAV are asked for it, so the waveform arrives intact and is only
+        compressed once, by whoever encodes the result; gTTS's MP3 is decoded
+        """
+        return pcm_segments(self.stream(conversation_lines, voice_a, voice_b, codec=PCM_CODEC))
+
+    def warm_up(self):
+        """Load whatever the engine needs ahead of the first request; returns True when ready"""
+        if self.model is None:
+            return True
+        return model_registry.get(self.model) is not None
+
+    def is_ready(self):
+        return self.model is None or model_registry.is_loaded(self.model)
+
+    def close(self):
+        """Release the engine's model so its memory can be reclaimed"""
+        if self.model is not None:
+            model_registry.unload(self.model)
+
+    @abstractmethod
+    def _synthesize_batch(self, texts, voices, codec):
+        """Audio bytes (or None) encoded with codec for each text, in order"""
+
+    def _synthesize(self, text, voice, codec):
+        return self._synthesize_batch([text], [voice], codec)[0]
+
+    def _stream(self, conversation_lines, voice_a, voice_b, codec):
+        # The whole conversation in one batch; engines that can hand over early lines sooner override this
+        lines = parse_conversation(conversation_lines)
+        voices = self.voices_for(lines, voice_a, voice_b)
+        results = self._synthesize_batch([line.text for line in lines], voices, codec)
+        for line, voice, audio_data in zip(lines, voices, results):
+            if audio_data:
+                yield {'text': line.text, 'audio': audio_data, 'speaker': line.speaker, 'voice_type': voice}
+
+
+class GTTSEngine(TTSEngine):
+    name = 'gtts'
+    label = "Google TTS (gTTS)"
+    # Google only serves MP3
+    codec = 'mp3'
+    sample_rate = 24000
+    voices = ('default', 'british', 'australian', 'indian', 'irish', 'canadian', 'south_african')
+
+    def __init__(self, max_workers=4, timeout=10, retries=2):
+        """Cloud synthesis; lines are fetched concurrently since each is a separate HTTP request"""
+        super().__init__()
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+
+    def _synthesize(self, text, voice, codec):
+        from tts_generator import text_to_speech
+        return text_to_speech(text, voice_type=voice or 'default', timeout=self.timeout, retries=self.retries)
+
+    def _synthesize_batch(self, texts, voices, codec):
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+            return list(executor.map(self._synthesize, texts, voices, [codec] * len(texts)))
+
+    def _stream(self, conversation_lines, voice_a, voice_b, codec):
+        from tts_generator import iter_conversation_speech
+        return iter_conversation_speech(
+            conversation_lines, voice_a or 'default', voice_b or 'british',
+            max_workers=self.max_workers, timeout=self.timeout, retries=self.retries
+        )
+
+
+class FastSpeech2Engine(TTSEngine):
+    name = 'fastspeech2'
+    label = "Fairseq TTS (Local)"
+    sample_rate = 22050
+    model = 'fastspeech2'
+    codecs = tuple(CODECS)
+
+    def __init__(self, batch_size=8, codec=None):
+        """Local FastSpeech2 + HiFiGAN; lines are synthesized batch_size per forward pass"""
+        super().__init__()
+        self.batch_size = batch_size
+        self.codec = codec or AUDIO_CODEC
+
+    def _synthesize_batch(self, texts, voices, codec):
+        from generate_speak import get_fairseq_tts, text_to_speech_fairseq_batch
+        return text_to_speech_fairseq_batch(texts, *get_fairseq_tts(), codec=codec)
+
+    def _stream(self, conversation_lines, voice_a, voice_b, codec):
+        from generate_speak import iter_conversation_speech_fairseq
+        return iter_conversation_speech_fairseq(conversation_lines, self.batch_size, codec=codec)
+
+
+class Tacotron2Engine(TTSEngine):
+    name = 'tacotron2'
+    label = "Tacotron2 (Local)"
+    sample_rate = 22050
+    model = 'tacotron2'
+    codecs = tuple(CODECS)
+
+    def __init__(self, batch_size=8, codec=None):
+        """Local torchaudio Tacotron2 + WaveRNN"""
+        super().__init__()
+        self.batch_size = batch_size
+        self.codec = codec or AUDIO_CODEC
+        self._tts = None
+
+    def _get_tts(self):
+        # The model itself is shared through model_registry; this only holds the codec setting
+        if self._tts is None:
+            from fairseq_tts import FairseqTTS
+            self._tts = FairseqTTS()
+            self._tts.codec = self.codec
+        return self._tts
+
+    def _synthesize_batch(self, texts, voices, codec):
+        return self._get_tts().text_to_speech_batch(texts, codec)
+
+    def _stream(self, conversation_lines, voice_a, voice_b, codec):
+        return self._get_tts().iter_conversation_speech(conversation_lines, self.batch_size, codec=codec)
+
+
+class EngineRegistry:
+    def __init__(self):
+        """TTS engines selectable by name; each is created on first use"""
+        self._classes = {}
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def register(self, engine_class):
+        with self._lock:
+            self._classes[engine_class.name] = engine_class
+
+    def names(self):
+        return list(self._classes)
+
+    def label(self, name):
+        return self._classes[name].label
+
+    def get(self, name):
+        """Return the engine registered as name"""
+        with self._lock:
+            if name not in self._classes:
+                raise ValueError(f"Unknown TTS engine '{name}', choose from {', '.join(self._classes)}")
+            engine = self._engines.get(name)
+            if engine is None:
+                engine = self._engines[name] = self._classes[name]()
+            return engine
+
+    def close(self, name=None):
+        """Close one engine, or all engines created so far"""
+        with self._lock:
+            engines = list(self._engines.values()) if name is None else [self._engines.get(name)]
+        for engine in engines:
+            if engine is not None:
+                engine.close()
+
+    def metrics(self):
+        """{name: metrics snapshot} for every engine used so far"""
+        with self._lock:
+            engines = list(self._engines.values())
+        return {engine.name: engine.metrics.snapshot() for engine in engines}
+
+    def prometheus_text(self):
+        """Engine metrics in the Prometheus text exposition format"""
+        snapshots = self.metrics()
+        output = ["# TYPE tts_latency_seconds histogram"]
+        for name, snapshot in snapshots.items():
+            for le, count in snapshot['latency_buckets'].items():
+                output.append(f'tts_latency_seconds_bucket{{engine="{name}",le="{le}"}} {count}')
+            output.append(f'tts_latency_seconds_sum{{engine="{name}"}} {snapshot["latency_sum"]}')
+            output.append(f'tts_latency_seconds_count{{engine="{name}"}} {snapshot["calls"]}')
+
+        # Each family's samples must be contiguous, so emit one family at a time
+        for metric, key, kind in (
+            ('tts_lines_total', 'lines', 'counter'),
+            ('tts_failures_total', 'failures', 'counter'),
+            ('tts_bytes_total', 'bytes', 'counter'),
+            ('tts_audio_seconds_total', 'audio_seconds', 'counter'),
+            ('tts_real_time_factor', 'real_time_factor', 'gauge'),
+            ('tts_cache_hit_rate', 'cache_hit_rate', 'gauge'),
+        ):
+            output.append(f"# TYPE {metric} {kind}")
+            for name, snapshot in snapshots.items():
+                if snapshot[key] is not None:
+                    output.append(f'{metric}{{engine="{name}"}} {snapshot[key]}')
+        return '\n'.join(output) + '\n'
+
+
+# Global instance
+tts_engines = EngineRegistry()
+tts_engines.register(GTTSEngine)
+tts_engines.register(FastSpeech2Engine)
+tts_engines.register(Tacotron2Engine)
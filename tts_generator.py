@@ -1,14 +1,25 @@
-import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from gtts import gTTS
-import tempfile
-import base64
-import speech_recognition as sr
-import streamlit as st
+from audio_cache import audio_cache
+from audio_io import gtts_bytes
+from conversation_parser import parse_conversation
 
-def text_to_speech(text, lang='en', tld='com', voice_type='default'):
+# gTTS returns 24 kHz MP3
+GTTS_SAMPLE_RATE = 24000
+
+def _gtts_request(text, config, timeout):
+    """Fetch one line from gTTS as MP3 bytes"""
+    # Create gTTS object with specific voice
+    tts = gTTS(text=text, lang=config['lang'], tld=config['tld'], slow=False, timeout=timeout)
+    return gtts_bytes(tts)
+
+def text_to_speech(text, lang='en', tld='com', voice_type='default', timeout=None, retries=0, backoff=0.5):
     """
     Convert text to speech and return audio data
     voice_type: 'default', 'british', 'australian', 'indian', 'irish'
+    timeout: seconds to wait for the gTTS endpoint per attempt
+    retries: extra attempts after a failure, sleeping backoff * 2**attempt between them
     """
     try:
         # Voice configurations
@@ -23,77 +34,77 @@ def text_to_speech(text, lang='en', tld='com', voice_type='default'):
         }
         
         config = voice_configs.get(voice_type, voice_configs['default'])
+        voice = f"{config['lang']}-{config['tld']}"
         
-        # Create gTTS object with specific voice
-        tts = gTTS(text=text, lang=config['lang'], tld=config['tld'], slow=False)
-        
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as fp:
-            temp_filename = fp.name
-        
-        # Save the audio file
-        tts.save(temp_filename)
+        # Serve repeated lines without another round-trip to Google
+        audio_data = audio_cache.get('gtts', voice, text, GTTS_SAMPLE_RATE)
+        if audio_data is not None:
+            return audio_data
         
-        # Read the audio file and convert to base64
-        with open(temp_filename, 'rb') as audio_file:
-            audio_data = audio_file.read()
-        
-        # Clean up the temporary file
-        os.unlink(temp_filename)
+        for attempt in range(retries + 1):
+            try:
+                audio_data = _gtts_request(text, config, timeout)
+                break
+            except Exception as e:
+                if attempt == retries:
+                    raise
+                print(f"gTTS attempt {attempt + 1} failed, retrying: {e}")
+                time.sleep(backoff * 2 ** attempt)
         
+        audio_cache.put('gtts', voice, text, GTTS_SAMPLE_RATE, audio_data)
         return audio_data
         
     except Exception as e:
         print(f"Error in text-to-speech: {e}")
         return None
 
-def conversation_to_speech(conversation_lines, voice_a='default', voice_b='british'):
+def iter_conversation_speech(conversation_lines, voice_a='default', voice_b='british',
+                             max_workers=4, timeout=10, retries=2):
     """
-    Convert a conversation (list of lines) to speech with different voices
+    Yield audio segments for a conversation in order, each as soon as it is ready
     voice_a: voice for Speaker A
     voice_b: voice for Speaker B
+    max_workers: number of lines fetched from gTTS concurrently (1 = serial)
+    timeout, retries: per-line request limits, see text_to_speech
     """
-    audio_segments = []
+    lines = []
+    
+    # Accepts raw strings or Lines already parsed by conversation_parser
+    for line in parse_conversation(conversation_lines):
+        # Choose voice based on speaker
+        if line.speaker == 'A':
+            voice_type = voice_a
+        elif line.speaker == 'B':
+            voice_type = voice_b
+        else:
+            voice_type = 'default'  # fallback
+        
+        lines.append((line.text, line.speaker, voice_type))
     
-    for i, line in enumerate(conversation_lines):
-        if line.strip():  # Skip empty lines
-            # Extract just the text part (remove speaker labels like "A:", "B:")
-            text = line.strip()
-            speaker = None
-            
-            if ': ' in text:
-                speaker_label, text = text.split(': ', 1)
-                speaker = speaker_label.strip()
-            
-            # Choose voice based on speaker
-            if speaker == 'A':
-                voice_type = voice_a
-            elif speaker == 'B':
-                voice_type = voice_b
-            else:
-                voice_type = 'default'  # fallback
-            
-            audio_data = text_to_speech(text, voice_type=voice_type)
+    def synthesize(line):
+        text, speaker, voice_type = line
+        return text_to_speech(text, voice_type=voice_type, timeout=timeout, retries=retries)
+    
+    # map() yields results in submission order, so segments keep the conversation order
+    # while later lines are still being fetched in the background
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for (text, speaker, voice_type), audio_data in zip(lines, executor.map(synthesize, lines)):
             if audio_data:
-                audio_segments.append({
+                yield {
                     'text': text,
                     'audio': audio_data,
                     'speaker': speaker,
                     'voice_type': voice_type
-                })
-    
-    return audio_segments 
+                }
 
-def record_user_speech():
-    """Record user speaking and assess pronunciation"""
-    recognizer = sr.Recognizer()
-    with sr.Microphone() as source:
-        st.info("🎤 Speak now...")
-        audio = recognizer.listen(source, timeout=5)
-    return audio
-
-# Add practice buttons for each conversation line
-if st.button("🎤 Practice Speaking"):
-    audio = record_user_speech()
-    # Compare with expected pronunciation
-    # Give feedback on accuracy 
\ No newline at end of file
+def conversation_to_speech(conversation_lines, voice_a='default', voice_b='british',
+                           max_workers=4, timeout=10, retries=2):
+    """
+    Convert a conversation (list of lines) to speech with different voices
+    voice_a: voice for Speaker A
+    voice_b: voice for Speaker B
+    """
+    return list(iter_conversation_speech(
+        conversation_lines, voice_a, voice_b,
+        max_workers=max_workers, timeout=timeout, retries=retries
+    ))
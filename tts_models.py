@@ -0,0 +1,99 @@
+import importlib
+import threading
+import time
+
+
+class ModelRegistry:
+    def __init__(self):
+        """Process-wide cache of loaded TTS models, shared by all engines"""
+        self._loaders = {}
+        self._models = {}
+        self._load_times = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        """
+        Register a loader for a model; the loader returns the model bundle or None on failure
+        loader may be a callable or a 'module:function' string, imported only when the model is first loaded
+        """
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        """Return the loaded model bundle, loading it on first use"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            if name not in self._loaders:
+                print(f"No TTS model registered as '{name}'")
+                return None
+            loader = self._loaders[name]
+            name_lock = self._locks[name]
+
+        # Per-model lock so concurrent sessions wait for a single load
+        with name_lock:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+
+            start = time.perf_counter()
+            try:
+                if isinstance(loader, str):
+                    module_name, function_name = loader.split(':')
+                    loader = getattr(importlib.import_module(module_name), function_name)
+                model = loader()
+            except Exception as e:
+                print(f"Error loading TTS model '{name}': {e}")
+                model = None
+            elapsed = time.perf_counter() - start
+
+            if model is None:
+                print(f"Failed to load TTS model '{name}' after {elapsed:.2f}s")
+                return None
+
+            self._models[name] = model
+            self._load_times[name] = elapsed
+            print(f"Loaded TTS model '{name}' in {elapsed:.2f}s")
+            return model
+
+    def warm_up(self, names=None):
+        """Load models ahead of the first request; returns {name: loaded}"""
+        if names is None:
+            with self._lock:
+                names = list(self._loaders)
+        return {name: self.get(name) is not None for name in names}
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def unload(self, name):
+        """Drop a loaded model so its memory can be reclaimed"""
+        with self._lock:
+            name_lock = self._locks.get(name)
+        if name_lock is None:
+            return False
+        with name_lock:
+            self._load_times.pop(name, None)
+            return self._models.pop(name, None) is not None
+
+    def reload(self, name):
+        """Unload and load a model again"""
+        self.unload(name)
+        return self.get(name)
+
+    def load_times(self):
+        """Seconds spent loading each currently loaded model"""
+        return dict(self._load_times)
+
+
+# Global instance
+model_registry = ModelRegistry()
+
+# Built-in models; their modules (torch, fairseq, torchaudio) are imported on first load
+model_registry.register('fastspeech2', 'generate_speak:_load_fastspeech2')
+model_registry.register('tacotron2', 'fairseq_tts:_load_tacotron2')
+model_registry.register('wav2vec2', 'recognizers:_load_wav2vec2')
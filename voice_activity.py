@@ -0,0 +1,83 @@
+import numpy as np
+
+# Frames quieter than this (RMS, full scale = 1.0) are never treated as speech; about -40 dBFS
+MIN_SPEECH_RMS = 0.01
+# Speech must be this many times louder than the noise floor
+NOISE_RATIO = 3.0
+
+_DTYPES = {1: np.uint8, 2: '<i2', 4: '<i4'}
+
+
+def _runs(mask):
+    """Start and end indices of consecutive True runs in a boolean array"""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _samples(frame_data, sample_width):
+    """
+    Little-endian PCM bytes as an integer array and its full-scale value, or None for unsupported widths
+    24-bit samples are widened to int32 by placing them in the top three bytes, so full scale is 2**31
+    """
+    count = len(frame_data) // sample_width if sample_width > 0 else 0
+    if sample_width == 3:
+        widened = np.zeros((count, 4), dtype=np.uint8)
+        widened[:, 1:] = np.frombuffer(frame_data, dtype=np.uint8, count=count * 3).reshape(count, 3)
+        return widened.view('<i4').ravel(), float(2 ** 31)
+    if sample_width not in _DTYPES:
+        return None
+    # View the buffer as samples without copying it
+    return np.frombuffer(frame_data, dtype=_DTYPES[sample_width], count=count), float(2 ** (8 * sample_width - 1))
+
+
+def analyze_voice_activity(frame_data, sample_rate, sample_width, frame_ms=30, min_pause_ms=250):
+    """
+    Energy-based voice activity over a raw PCM buffer
+    Returns speech-only duration, pause count and mean pause length in seconds; leading and
+    trailing silence (including the ambient-noise window) is excluded from both
+    """
+    total_duration = len(frame_data) / (sample_rate * sample_width) if sample_rate and sample_width else 0.0
+    result = {
+        'total_duration': total_duration,
+        'speech_duration': 0.0,
+        'pause_count': 0,
+        'mean_pause': 0.0,
+    }
+
+    decoded = _samples(frame_data, sample_width)
+    if decoded is None:
+        # Unknown sample format: report no speech, so callers fall back to the total duration
+        return result
+    samples, full_scale = decoded
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return result
+
+    frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length).astype(np.float32)
+    if sample_width == 1:
+        frames -= 128.0  # 8-bit PCM is unsigned
+    rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / frame_length) / full_scale
+
+    noise_floor = np.percentile(rms, 10)
+    voiced = rms > max(noise_floor * NOISE_RATIO, MIN_SPEECH_RMS)
+    if not voiced.any():
+        return result
+
+    # Only look between the first and last voiced frame
+    first, last = np.flatnonzero(voiced)[[0, -1]]
+    voiced = voiced[first:last + 1]
+
+    # Gaps shorter than min_pause_ms are part of normal articulation, not pauses
+    frame_seconds = frame_length / sample_rate
+    min_pause_frames = max(1, int(round(min_pause_ms / 1000 / frame_seconds)))
+    starts, ends = _runs(~voiced)
+    gap_lengths = ends - starts
+    pauses = gap_lengths[gap_lengths >= min_pause_frames]
+
+    result.update({
+        'speech_duration': float((len(voiced) - pauses.sum()) * frame_seconds),
+        'pause_count': int(len(pauses)),
+        'mean_pause': float(pauses.mean() * frame_seconds) if len(pauses) else 0.0,
+    })
+    return result